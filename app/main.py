@@ -1,19 +1,78 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routes.cvv_route import cvv_router
+from routes.cvv_route import cvv_router, gerar_curriculo
+from routes.jobs_route import jobs_router
+from routes.lote_route import lote_router
+from services import config
+from services.componentes import estado, iniciar_aquecimento, pronto
+from services.executor import encerrar_executores
+from services.extraction import encerrar_pool_extracao
+from services.jobs import encerrar_workers, iniciar_workers
+from services.render_pool import encerrar_pool_render
+from services.observabilidade import (
+    CONTENT_TYPE_LATEST,
+    MiddlewareObservabilidade,
+    configurar_logs,
+    exportar_metricas,
+)
+
+configurar_logs()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente da IA, recuperação e processos de renderização aquecem em segundo plano:
+    # o processo fica vivo na hora e pronto (/readyz) quando terminam
+    if config.AQUECIMENTO_HABILITADO:
+        iniciar_aquecimento()
+    iniciar_workers(gerar_curriculo)
+    yield
+    await encerrar_workers()
+    encerrar_pool_render()
+    encerrar_pool_extracao()
+    encerrar_executores()
+
 
-app = FastAPI(title="FastAPI")
+app = FastAPI(title="FastAPI", lifespan=lifespan)
 
 app.include_router(cvv_router)
+app.include_router(jobs_router)
+app.include_router(lote_router)
 
 @app.get("/")
 def read_root():
   return {"hello": "world"}
 
+@app.get("/livez", include_in_schema=False)
+def livez():
+    return {"status": "vivo"}
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    if pronto():
+        return {"status": "pronto", "componentes": estado()}
+    if config.AQUECIMENTO_HABILITADO:
+        # Refaz o aquecimento se ele terminou com erro (ex.: provedor fora do ar no start)
+        iniciar_aquecimento()
+    componentes = estado()
+    situacao = "erro" if any("erro" in c for c in componentes.values()) else "aquecendo"
+    return JSONResponse(
+        {"status": situacao, "componentes": componentes}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(exportar_metricas(), media_type=CONTENT_TYPE_LATEST)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+
+app.add_middleware(MiddlewareObservabilidade)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import config
+from services.contexto import estimar_tokens, reduzir_contexto
+from services.extraction import extrair_documentos_memoria
+from services.layout import LayoutPdf
+
+AREAS = [
+    "Python Django APIs REST PostgreSQL",
+    "Java Spring Boot microsserviços Kafka",
+    "Marketing digital campanhas Google Ads",
+    "Contabilidade fiscal e balanços",
+    "React TypeScript frontend",
+    "AWS Docker Kubernetes Terraform",
+]
+VAGA = "Desenvolvedor Python com Django, APIs REST, PostgreSQL, AWS e Docker"
+
+
+def gerar_cv(experiencias: int) -> bytes:
+    linhas = ["Fulano de Tal", "Desenvolvedor Backend", "fulano@example.com | (11) 99999-0000", "RESUMO",
+              "Engenheiro com experiência em sistemas distribuídos.", "EXPERIÊNCIA"]
+    for i in range(experiencias):
+        area = AREAS[i % len(AREAS)]
+        linhas += [f"Cargo {i} | Empresa {i} | {2000 + i % 25}", f"- Atuei com {area} entregando projetos de {area}. " * 3]
+    linhas += ["PROJETOS"] + [f"Projeto {i}: portfólio de {AREAS[(i * 5) % 6]} com documentação. " * 3 for i in range(experiencias // 2)]
+    linhas += ["FORMAÇÃO", "Ciência da Computação | USP | 2010", "CONTATO", "linkedin.com/in/fulano"]
+    layout = LayoutPdf()
+    for linha in linhas:
+        layout.texto(linha, "helv", 9, (0, 0, 0))
+    try:
+        return layout.salvar().getvalue()
+    finally:
+        layout.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens enviados à IA com e sem a redução de contexto")
+    parser.add_argument("--experiencias", type=int, nargs="+", default=[3, 15, 60, 200])
+    parser.add_argument("--orcamento", type=int, default=config.CONTEXTO_MAX_TOKENS)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+    config.CONTEXTO_MAX_TOKENS = args.orcamento
+
+    print(f"orçamento: {args.orcamento} tokens  embeddings: {config.CONTEXTO_EMBEDDINGS}")
+    print(f"{'experiências':>12} {'páginas':>8} {'tokens':>8} {'enviados':>9} {'redução':>8} {'ms':>7}")
+    for experiencias in args.experiencias:
+        docs = extrair_documentos_memoria(gerar_cv(experiencias))
+        total = sum(estimar_tokens(d.page_content) for d in docs)
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            reduzidos = reduzir_contexto(docs, VAGA)
+            tempos.append(time.perf_counter() - inicio)
+        enviados = sum(estimar_tokens(d.page_content) for d in reduzidos)
+        print(
+            f"{experiencias:>12} {len(docs):>8} {total:>8} {enviados:>9} "
+            f"{1 - enviados / total:>7.0%} {statistics.median(tempos) * 1000:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import config, extraction
+from services.extraction import extrair_documentos_memoria
+
+
+def extrair_texto_plano(file_content: bytes):
+    # Referência: texto corrido página a página, sem pistas de layout (como o PyMuPDFLoader)
+    with fitz.open(stream=file_content, filetype="pdf") as doc:
+        return [page.get_text("text").strip() for page in doc]
+
+
+def palavras(textos) -> list:
+    return sorted(re.findall(r"\w+", "\n".join(textos)))
+
+
+def gerar_pdf(paginas: int) -> bytes:
+    doc = fitz.open()
+    for numero in range(paginas):
+        page = doc.new_page()
+        page.insert_text((50, 50), "EXPERIÊNCIA PROFISSIONAL", fontsize=13, fontname="hebo")
+        texto = "\n".join(
+            f"Linha {i} da página {numero + 1}: experiência com Python, Django, AWS e Docker."
+            for i in range(45)
+        )
+        page.insert_text((50, 75), texto, fontsize=9)
+    conteudo = doc.tobytes()
+    doc.close()
+    return conteudo
+
+
+def medir(func, conteudo: bytes, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o texto plano com a extração de layout em série e em paralelo")
+    parser.add_argument("--paginas", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--processos", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    config.EXTRACAO_PROCESSOS = args.processos
+    config.EXTRACAO_MAX_CARACTERES = 0
+    pool = extraction.pool_extracao()
+    if pool is None:
+        print("Aviso: com 1 processo só a extração em série é medida")
+    else:
+        extraction._aquecer_pool()
+
+    print(f"{args.processos} processo(s), {os.cpu_count()} núcleo(s)")
+    print(f"{'páginas':>8} {'texto plano (ms)':>17} {'layout série (ms)':>18} {'layout paralelo (ms)':>21} {'ganho':>7}")
+    try:
+        for paginas in args.paginas:
+            conteudo = gerar_pdf(paginas)
+            config.EXTRACAO_MIN_PAGINAS_PARALELO = 10**6
+            serie = extrair_documentos_memoria(conteudo)
+            # O layout só acrescenta marcas ("## "): as palavras extraídas são as mesmas do texto plano
+            assert palavras(d.page_content for d in serie) == palavras(extrair_texto_plano(conteudo))
+            plano = medir(extrair_texto_plano, conteudo, args.repeticoes)
+            tempo_serie = medir(extrair_documentos_memoria, conteudo, args.repeticoes)
+            if pool is None:
+                print(f"{paginas:>8} {plano:>17.2f} {tempo_serie:>18.2f} {'-':>21} {'-':>7}")
+                continue
+            config.EXTRACAO_MIN_PAGINAS_PARALELO = 1
+            assert [d.page_content for d in extrair_documentos_memoria(conteudo)] == [d.page_content for d in serie]
+            paralelo = medir(extrair_documentos_memoria, conteudo, args.repeticoes)
+            print(f"{paginas:>8} {plano:>17.2f} {tempo_serie:>18.2f} {paralelo:>21.2f} {tempo_serie / paralelo:>6.2f}x")
+    finally:
+        extraction.encerrar_pool_extracao()
+
+
+if __name__ == "__main__":
+    main()
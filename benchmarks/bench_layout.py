@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.layout import LayoutPdf
+
+LARGURA = 595
+ALTURA = 842
+MARGEM = 40
+
+
+# Cópia do adicionar_texto anterior ao motor de layout, mantida como referência
+def layout_legado(paragrafos):
+    doc = fitz.open()
+    page = doc.new_page(width=LARGURA, height=ALTURA)
+    y = MARGEM
+    tamanho = 10
+    for texto in paragrafos:
+        max_caracteres = 110
+        linhas = []
+        texto = str(texto).strip()
+        while len(texto) > max_caracteres:
+            quebra = texto[:max_caracteres].rfind(' ')
+            if quebra == -1:
+                quebra = max_caracteres
+            linhas.append(texto[:quebra].strip())
+            texto = texto[quebra:].strip()
+        if texto:
+            linhas.append(texto)
+        for linha in linhas:
+            if y > ALTURA - MARGEM - tamanho:
+                page = doc.new_page(width=LARGURA, height=ALTURA)
+                y = MARGEM
+            page.insert_text((MARGEM, y + tamanho * 0.8), linha, fontname="helv", fontsize=tamanho, color=(0.2, 0.2, 0.2))
+            y += tamanho * 1.2
+    return doc
+
+
+def layout_novo(paragrafos):
+    layout = LayoutPdf(largura=LARGURA, altura=ALTURA, margem=MARGEM)
+    for texto in paragrafos:
+        layout.texto(texto, "helv", 10, (0.2, 0.2, 0.2))
+    return layout.doc
+
+
+def linhas_fora_da_margem(doc) -> int:
+    return sum(
+        1
+        for page in doc
+        for bloco in page.get_text("dict")["blocks"]
+        for linha in bloco.get("lines", [])
+        if linha["bbox"][2] > LARGURA - MARGEM + 0.5
+    )
+
+
+def gerar_paragrafos(quantidade: int, palavras: int):
+    base = "Otimizei APIs REST em Django reduzindo latência, WWW e MMM em integrações escaláveis com AWS".split()
+    return [" ".join(base[(i + j) % len(base)] for j in range(palavras)) for i in range(quantidade)]
+
+
+def medir(func, paragrafos, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        doc = func(paragrafos)
+        doc.tobytes()
+        tempos.append(time.perf_counter() - inicio)
+        doc.close()
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a quebra por caracteres com o motor de layout por largura de glifo")
+    parser.add_argument("--palavras", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--paragrafos", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'palavras':>9} {'legado (ms)':>12} {'novo (ms)':>10} {'ganho':>7} {'fora legado':>12} {'fora novo':>10}")
+    for palavras in args.palavras:
+        paragrafos = gerar_paragrafos(args.paragrafos, palavras)
+        legado = statistics.median(medir(layout_legado, paragrafos, args.repeticoes)) * 1000
+        novo = statistics.median(medir(layout_novo, paragrafos, args.repeticoes)) * 1000
+        fora_legado = linhas_fora_da_margem(layout_legado(paragrafos))
+        fora_novo = linhas_fora_da_margem(layout_novo(paragrafos))
+        print(f"{palavras:>9} {legado:>12.2f} {novo:>10.2f} {legado / novo:>6.2f}x {fora_legado:>12} {fora_novo:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.estruturado import interpretar_resposta_ia, serializar_dados
+from services.parser import parse_resposta_ia
+# Parser original do commit de base; a paridade com ele é verificada em tests/test_parser.py
+from tests.parser_original import parse_resposta_ia as parse_original
+
+
+def texto_competencias(quantidade: int) -> str:
+    itens = "\n".join(f"- Competência {i}: Python, SQL" for i in range(quantidade))
+    return f"NOME: Fulano\nCARGO: Dev\nCOMPETENCIAS:\n{itens}\nCONTATO:\n- Email: a@b.c"
+
+
+def medir(func, texto: str, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(texto)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o parser incremental contra o original")
+    parser.add_argument("--itens", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    # A coluna json mede a mesma resposta no formato do modo estruturado (LLM_MODO=estruturado)
+    print(f"{'itens':>8} {'original (ms)':>15} {'incremental (ms)':>18} {'ganho':>7} {'json (ms)':>10}")
+    for itens in args.itens:
+        texto = texto_competencias(itens)
+        legado = medir(parse_original, texto, args.repeticoes)
+        novo = medir(parse_resposta_ia, texto, args.repeticoes)
+        estruturado = medir(interpretar_resposta_ia, serializar_dados(parse_resposta_ia(texto)), args.repeticoes)
+        print(f"{itens:>8} {legado:>15.2f} {novo:>18.2f} {legado / novo:>6.2f}x {estruturado:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
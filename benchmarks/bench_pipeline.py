@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# O pipeline roda com a IA local (sem rede nem chave), tanto nos estágios quanto no servidor da carga
+os.environ.setdefault("LLM_PROVEDOR", "local")
+
+import httpx
+from langchain_core.messages import HumanMessage
+
+from corpus import CvSintetico, gerar_corpus
+from services import config
+from services.contexto import reduzir_contexto
+from services.extraction import extrair_documentos_memoria
+from services.parser import parse_resposta_ia
+from services.provedores_llm import LLMLocal, ModeloLatencia
+from services.render import criar_pdf_estilizado_cv
+from services.templates import TEMPLATE_PADRAO
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PADRAO = os.path.join(RAIZ, "benchmarks", "baseline.json")
+
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))]
+
+
+def resumo(tempos: List[float]) -> Dict[str, float]:
+    ms = [t * 1000 for t in tempos]
+    return {
+        "amostras": len(ms),
+        "media_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentil(ms, 50), 3),
+        "p95_ms": round(percentil(ms, 95), 3),
+        "p99_ms": round(percentil(ms, 99), 3),
+    }
+
+
+def _cronometrar(func: Callable[[], Any], tempos: List[float]) -> Any:
+    inicio = time.perf_counter()
+    resultado = func()
+    tempos.append(time.perf_counter() - inicio)
+    return resultado
+
+
+def medir_estagios(corpus: List[CvSintetico], repeticoes: int, template: str) -> Dict[str, Any]:
+    # A resposta da IA vem do provedor local, sem latência, para o parse e o render terem entrada realista
+    llm = LLMLocal(latencia=ModeloLatencia(0, 0, 0, 0))
+    tempos: Dict[str, List[float]] = {"extracao": [], "contexto": [], "parse": [], "render": []}
+    for cv in corpus:
+        for _ in range(repeticoes):
+            docs = _cronometrar(lambda: extrair_documentos_memoria(cv.pdf), tempos["extracao"])
+            docs = _cronometrar(lambda: reduzir_contexto(docs, cv.vaga), tempos["contexto"])
+            curriculo = "\n\n".join(d.page_content for d in docs)
+            prompt = f"CURRÍCULO ORIGINAL:\n{curriculo}\n\nVAGA DESCRITA:\n{cv.vaga}\n\nPALAVRAS-CHAVE DA VAGA:\n"
+            texto = llm.invoke([HumanMessage(content=prompt)]).content
+            dados = _cronometrar(lambda: parse_resposta_ia(texto), tempos["parse"])
+            _cronometrar(lambda: criar_pdf_estilizado_cv(dados, cv.vaga, template), tempos["render"])
+    resultado: Dict[str, Any] = {nome: resumo(valores) for nome, valores in tempos.items()}
+    resultado["rss_pico_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return resultado
+
+
+def _rss_arvore_kb(pid: int) -> int:
+    # RSS do servidor somado ao dos filhos (pool de render, workers de jobs), lido do /proc
+    filhos: Dict[int, List[int]] = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as arquivo:
+                pai = int(arquivo.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(pai, []).append(int(entrada))
+    total = 0
+    pendentes = [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pendentes.extend(filhos.get(atual, []))
+        try:
+            with open(f"/proc/{atual}/status") as arquivo:
+                for linha in arquivo:
+                    if linha.startswith("VmRSS:"):
+                        total += int(linha.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+class AmostradorRss:
+    def __init__(self, pid: int, intervalo: float = 0.05):
+        self.pid = pid
+        self.intervalo = intervalo
+        self.pico_kb = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+
+    def _rodar(self) -> None:
+        while not self._parar.is_set():
+            self.pico_kb = max(self.pico_kb, _rss_arvore_kb(self.pid))
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self) -> "AmostradorRss":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._parar.set()
+        self._thread.join()
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def iniciar_servidor(latencia_ms: Optional[float]) -> Tuple[subprocess.Popen, str]:
+    porta = _porta_livre()
+    # Sem cotas por cliente: toda a carga sai do mesmo endereço e mediria o limite, não o pipeline
+    ambiente = {**os.environ, "LLM_PROVEDOR": "local", "CACHE_HABILITADO": "0", "LOG_NIVEL": "WARNING",
+                "ADMISSAO_CLIENTE_POR_MINUTO": "0", "ADMISSAO_GLOBAL_POR_MINUTO": "0"}
+    if latencia_ms is not None:
+        ambiente.update({"LLM_LATENCIA_BASE_MS": str(latencia_ms), "LLM_LATENCIA_MS_POR_TOKEN_SAIDA": "0",
+                         "LLM_LATENCIA_MS_POR_TOKEN_ENTRADA": "0", "LLM_LATENCIA_JITTER": "0"})
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(porta)],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{porta}"
+    prazo = time.monotonic() + 60
+    while time.monotonic() < prazo:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor encerrou durante a inicialização")
+        try:
+            # Só mede depois do aquecimento, para a carga não pagar a inicialização dos componentes
+            if httpx.get(f"{url}/readyz", timeout=1).status_code == 200:
+                return processo, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("O servidor não respondeu em 60s")
+
+
+async def gerar_carga(url: str, corpus: List[CvSintetico], requisicoes: int, concorrencia: int, aquecimento: int) -> Dict[str, Any]:
+    latencias: List[float] = []
+    erros: Dict[str, int] = {}
+    proxima = 0
+
+    async def enviar(cliente: httpx.AsyncClient, indice: int, medir: bool) -> None:
+        cv = corpus[indice % len(corpus)]
+        inicio = time.perf_counter()
+        try:
+            resposta = await cliente.post(
+                f"{url}/cvv/create-cvv",
+                files={"pdf_file": ("cv.pdf", cv.pdf, "application/pdf")},
+                data={"description": cv.vaga},
+            )
+            status = str(resposta.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if not medir:
+            return
+        if status == "200":
+            latencias.append(time.perf_counter() - inicio)
+        else:
+            erros[status] = erros.get(status, 0) + 1
+
+    async def trabalhador(cliente: httpx.AsyncClient) -> None:
+        nonlocal proxima
+        while proxima < requisicoes:
+            indice, proxima = proxima, proxima + 1
+            await enviar(cliente, indice, True)
+
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(timeout=300, limits=limites) as cliente:
+        await asyncio.gather(*(enviar(cliente, i, False) for i in range(aquecimento)))
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador(cliente) for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+    return {
+        "requisicoes": requisicoes,
+        "concorrencia": concorrencia,
+        "erros": erros,
+        "vazao_rps": round(len(latencias) / duracao, 2),
+        **resumo(latencias),
+    }
+
+
+def medir_carga(corpus: List[CvSintetico], args) -> Dict[str, Any]:
+    processo, url = iniciar_servidor(args.latencia_ms)
+    try:
+        with AmostradorRss(processo.pid) as amostrador:
+            resultado = asyncio.run(gerar_carga(url, corpus, args.requisicoes, args.concorrencia, args.aquecimento))
+        resultado["rss_pico_mb"] = round(amostrador.pico_kb / 1024, 1)
+        resultado["latencia_llm"] = f"{args.latencia_ms:g} ms" if args.latencia_ms is not None else "modelo do .env"
+        return resultado
+    finally:
+        processo.terminate()
+        processo.wait(30)
+
+
+# Métrica, direção ruim (+1: subir piora) e rótulo da comparação com o baseline
+COMPARACOES = [("p50_ms", 1), ("p95_ms", 1), ("p99_ms", 1), ("vazao_rps", -1), ("rss_pico_mb", 1)]
+
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any], tolerancia: float) -> List[str]:
+    regressoes = []
+    print(f"\ncomparação com o baseline (tolerância {tolerancia:.0%})")
+    for chave in ("cpus", "cvs", "render_processos"):
+        if atual["ambiente"].get(chave) != baseline.get("ambiente", {}).get(chave):
+            print(f"aviso: {chave} difere do baseline ({baseline.get('ambiente', {}).get(chave)} -> {atual['ambiente'].get(chave)})")
+    for chave in ("concorrencia", "latencia_llm"):
+        if "carga" in atual and atual["carga"].get(chave) != baseline.get("carga", {}).get(chave):
+            print(f"aviso: {chave} da carga difere do baseline ({baseline.get('carga', {}).get(chave)} -> {atual['carga'].get(chave)})")
+    print(f"{'bloco':>10} {'métrica':>12} {'baseline':>10} {'atual':>10} {'variação':>9}")
+    for bloco in list(atual.get("estagios", {})) + ["carga"]:
+        novo = atual["estagios"].get(bloco) if bloco != "carga" else atual.get("carga")
+        antigo = baseline.get("estagios", {}).get(bloco) if bloco != "carga" else baseline.get("carga")
+        if not isinstance(novo, dict) or not isinstance(antigo, dict):
+            continue
+        for metrica, direcao in COMPARACOES:
+            if not antigo.get(metrica) or metrica not in novo:
+                continue
+            variacao = (novo[metrica] - antigo[metrica]) / antigo[metrica]
+            marca = ""
+            if variacao * direcao > tolerancia:
+                marca = " !"
+                regressoes.append(f"{bloco}.{metrica}")
+            print(f"{bloco:>10} {metrica:>12} {antigo[metrica]:>10.2f} {novo[metrica]:>10.2f} {variacao:>+8.0%}{marca}")
+    return regressoes
+
+
+def imprimir(resultado: Dict[str, Any]) -> None:
+    estagios = resultado.get("estagios", {})
+    if estagios:
+        print(f"\n{'estágio':>10} {'amostras':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}")
+        for nome, valores in estagios.items():
+            if isinstance(valores, dict):
+                print(f"{nome:>10} {valores['amostras']:>9} {valores['p50_ms']:>10.2f} {valores['p95_ms']:>10.2f} {valores['p99_ms']:>10.2f}")
+        print(f"RSS de pico do benchmark: {estagios['rss_pico_mb']} MB")
+    carga = resultado.get("carga")
+    if carga:
+        print(
+            f"\ncarga: {carga['requisicoes']} requisições, concorrência {carga['concorrencia']}, "
+            f"IA simulada: {carga['latencia_llm']}"
+        )
+        print(f"vazão: {carga['vazao_rps']} req/s  p50: {carga['p50_ms']:.1f} ms  p95: {carga['p95_ms']:.1f} ms  "
+              f"p99: {carga['p99_ms']:.1f} ms  RSS de pico do servidor: {carga['rss_pico_mb']} MB")
+        if carga["erros"]:
+            print(f"erros: {carga['erros']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de ponta a ponta: estágios do pipeline e carga HTTP no /cvv/create-cvv com a IA simulada"
+    )
+    parser.add_argument("--cvs", type=int, default=12, help="tamanho do corpus sintético (1 a 20 páginas)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3, help="repetições de cada CV nos estágios")
+    parser.add_argument("--template", default=TEMPLATE_PADRAO)
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--aquecimento", type=int, default=8)
+    parser.add_argument(
+        "--latencia-ms", type=float, default=0.0,
+        help="latência fixa da IA simulada; negativo usa o modelo de latência do .env (LLM_LATENCIA_*)",
+    )
+    parser.add_argument("--sem-estagios", action="store_true")
+    parser.add_argument("--sem-carga", action="store_true")
+    parser.add_argument("--salvar", metavar="ARQUIVO", nargs="?", const=BASELINE_PADRAO, help="grava o resultado como novo baseline")
+    parser.add_argument(
+        "--comparar", metavar="ARQUIVO", nargs="?", const=BASELINE_PADRAO, help="compara com um baseline salvo; sai com 1 se regredir"
+    )
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.latencia_ms < 0:
+        args.latencia_ms = None
+
+    corpus = gerar_corpus(args.cvs, args.semente)
+    resultado: Dict[str, Any] = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "cpu_pool": config.CPU_POOL_TIPO,
+            "render_processos": config.RENDER_PROCESSOS,
+            "cvs": args.cvs,
+            "paginas": sum(cv.paginas for cv in corpus),
+            "idiomas": sorted({cv.idioma for cv in corpus}),
+        },
+        "estagios": {},
+    }
+    print(f"corpus: {args.cvs} CVs, {resultado['ambiente']['paginas']} páginas, idiomas {resultado['ambiente']['idiomas']}")
+    if not args.sem_estagios:
+        resultado["estagios"] = medir_estagios(corpus, args.repeticoes, args.template)
+    if not args.sem_carga:
+        resultado["carga"] = medir_carga(corpus, args)
+    imprimir(resultado)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nbaseline gravado em {args.salvar}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print(f"regressões acima da tolerância: {', '.join(regressoes)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
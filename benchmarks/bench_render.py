@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import layout, templates
+from services.render import criar_pdf_estilizado_cv
+
+RESPOSTA_EXEMPLO = {
+    "NOME": "Fulano de Tal",
+    "CARGO": "Desenvolvedor Python",
+    "CONTATO": ["Telefone: 11 99999-0000", "Email: fulano@example.com"],
+    "RESUMO": "Desenvolvedor Python com experiência em Django e AWS, orquestrando APIs escaláveis "
+    "e integrações de alto desempenho para produtos digitais.",
+    "EXPERIENCIA": [
+        {
+            "titulo": f"Desenvolvedor Backend | Empresa {i} | 20{10 + i}-20{12 + i}",
+            "detalhes": [
+                "Otimizei APIs REST em Django reduzindo latência em 40%.",
+                "Implementei pipelines de CI/CD com Docker e AWS, com deploy contínuo e observabilidade.",
+            ],
+        }
+        for i in range(4)
+    ],
+    "FORMACAO": ["Ciência da Computação | Universidade Z | 2015-2019"],
+    "COMPETENCIAS": ["Linguagens: Python, SQL", "Nuvem: AWS, Docker", "Dados: PostgreSQL, Redis"],
+    "METADADOS": {"TITULO": "Desenvolvedor Python", "AUTOR": "Fulano de Tal", "PALAVRAS_CHAVE": "Python, Django, AWS"},
+}
+
+
+def limpar_caches() -> None:
+    layout._LarguraGlifosCache._tabelas.clear()
+    templates._MOLDURAS_PDF.clear()
+    templates._molduras_thread.__dict__.clear()
+
+
+def medir(template: str, segundos: float, frio: bool):
+    renders = 0
+    tamanho = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        if frio:
+            limpar_caches()
+        tamanho = len(criar_pdf_estilizado_cv(RESPOSTA_EXEMPLO, "", template).getvalue())
+        renders += 1
+    return renders / (time.perf_counter() - inicio), tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders por segundo de cada template, com e sem os caches por processo")
+    parser.add_argument("--templates", nargs="+", default=list(templates.TEMPLATES))
+    parser.add_argument("--segundos", type=float, default=3.0)
+    args = parser.parse_args()
+
+    # "sem glifos": caches quentes, mas sem compartilhar as tabelas de glifos do PyMuPDF entre documentos
+    print(f"PyMuPDF {layout.fitz.VersionBind}, tabelas de glifos compartilhadas: {layout.GLIFOS_COMPARTILHADOS}")
+    print(f"{'template':>10} {'frio (r/s)':>11} {'sem glifos (r/s)':>17} {'quente (r/s)':>13} {'ganho':>7} {'bytes':>7}")
+    compartilhados = layout.GLIFOS_COMPARTILHADOS
+    for template in args.templates:
+        frio, _ = medir(template, args.segundos, True)
+        criar_pdf_estilizado_cv(RESPOSTA_EXEMPLO, "", template)
+        layout.GLIFOS_COMPARTILHADOS = False
+        sem_glifos, _ = medir(template, args.segundos, False)
+        layout.GLIFOS_COMPARTILHADOS = compartilhados
+        quente, tamanho = medir(template, args.segundos, False)
+        print(
+            f"{template:>10} {frio:>11.1f} {sem_glifos:>17.1f} {quente:>13.1f} {quente / frio:>6.2f}x {tamanho:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
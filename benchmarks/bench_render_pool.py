@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_render import RESPOSTA_EXEMPLO
+from services import config, render_pool
+
+
+async def medir(quantidade: int, concorrencia: int, template: str) -> float:
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def um():
+        async with semaforo:
+            return await render_pool.renderizar_pdf(RESPOSTA_EXEMPLO, "", template)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(um() for _ in range(quantidade)))
+    return quantidade / (time.perf_counter() - inicio)
+
+
+async def latencia_loop(segundos: float) -> float:
+    # Maior atraso observado num timer de 5 ms: mede o quanto o render trava o event loop
+    pior = 0.0
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.005)
+        pior = max(pior, time.perf_counter() - inicio - 0.005)
+    return pior * 1000
+
+
+async def rodada(quantidade: int, concorrencia: int, template: str):
+    await medir(concorrencia, concorrencia, template)
+    tarefa = asyncio.ensure_future(medir(quantidade, concorrencia, template))
+    atraso = asyncio.ensure_future(latencia_loop(0.5))
+    return await tarefa, await atraso
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders por segundo no executor local versus no pool de processos")
+    parser.add_argument("--renders", type=int, default=400)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--processos", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--template", default="moderno")
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}  renders: {args.renders}  concorrência: {args.concorrencia}")
+    print(f"{'processos':>9} {'r/s':>8} {'atraso loop (ms)':>17}")
+    for processos in args.processos:
+        config.RENDER_PROCESSOS = processos
+        taxa, atraso = asyncio.run(rodada(args.renders, args.concorrencia, args.template))
+        render_pool.encerrar_pool_render()
+        rotulo = "thread" if processos == 0 else str(processos)
+        print(f"{rotulo:>9} {taxa:>8.1f} {atraso:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# IA local com o modelo de latência do .env (LLM_LATENCIA_*): base + entrada + saída por token
+os.environ["LLM_PROVEDOR"] = "local"
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from corpus import gerar_corpus
+from services import config
+from services.contexto import reduzir_contexto
+from services.estruturado import interpretar_resposta_ia
+from services.extraction import extrair_documentos_memoria
+from services.secoes_llm import agrupar_secoes
+
+SECOES = ("NOME", "CARGO", "RESUMO", "EXPERIENCIA", "COMPETENCIAS", "FORMACAO", "CONTATO")
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def medir_modo(entradas: List[Any], largura: int, repeticoes: int) -> Dict[str, Any]:
+    from routes.cvv_route import gerar_conteudo_llm_async
+
+    config.LLM_SECOES_PARALELAS = largura
+    tempos: List[float] = []
+    entrada_tokens = saida_tokens = 0
+    resultados = []
+    for docs, vaga in entradas:
+        for _ in range(repeticoes):
+            with get_usage_metadata_callback() as uso:
+                inicio = time.perf_counter()
+                texto = await gerar_conteudo_llm_async(docs, vaga)
+                tempos.append(time.perf_counter() - inicio)
+            for valores in uso.usage_metadata.values():
+                entrada_tokens += valores["input_tokens"]
+                saida_tokens += valores["output_tokens"]
+        resultados.append(interpretar_resposta_ia(texto))
+    chamadas = len(tempos)
+    return {
+        "largura": largura,
+        "p50_ms": statistics.median(tempos) * 1000,
+        "p95_ms": percentil(tempos, 95) * 1000,
+        "tokens_entrada": entrada_tokens / chamadas,
+        "tokens_saida": saida_tokens / chamadas,
+        "resultados": resultados,
+    }
+
+
+async def principal(args) -> None:
+    from routes.cvv_route import CADEIAS_LLM
+
+    corpus = gerar_corpus(args.cvs, args.semente)
+    entradas = [(reduzir_contexto(extrair_documentos_memoria(cv.pdf), cv.vaga), cv.vaga) for cv in corpus]
+    await CADEIAS_LLM.obter_async()
+
+    print(
+        f"IA local: {config.LLM_LATENCIA_BASE_MS:.0f} ms de base, {config.LLM_LATENCIA_MS_POR_TOKEN_ENTRADA} ms/token"
+        f" de entrada, {config.LLM_LATENCIA_MS_POR_TOKEN_SAIDA} ms/token de saída, jitter {config.LLM_LATENCIA_JITTER}"
+    )
+    print(f"corpus: {args.cvs} CVs x {args.repeticoes} repetição(ões)\n")
+    print(f"{'modo':<26} {'p50 (ms)':>9} {'p95 (ms)':>9} {'ganho p50':>10} {'entrada/CV':>11} {'saída/CV':>9}")
+    unica = await medir_modo(entradas, 0, args.repeticoes)
+    for medida in [unica] + [await medir_modo(entradas, largura, args.repeticoes) for largura in args.larguras]:
+        largura = medida["largura"]
+        nome = "chamada única" if largura <= 1 else f"{len(agrupar_secoes(largura))} seções em paralelo"
+        print(
+            f"{nome:<26} {medida['p50_ms']:>9.0f} {medida['p95_ms']:>9.0f} {unica['p50_ms'] / medida['p50_ms']:>9.2f}x"
+            f" {medida['tokens_entrada']:>11.0f} {medida['tokens_saida']:>9.0f}"
+        )
+        # A junção precisa devolver o mesmo formato da chamada única, com nome e cargo consistentes
+        for dados, referencia in zip(medida["resultados"], unica["resultados"]):
+            assert all(bool(dados[secao]) == bool(referencia[secao]) for secao in SECOES), f"seção perdida na largura {largura}"
+            assert (dados["NOME"], dados["CARGO"]) == (referencia["NOME"], referencia["CARGO"])
+            assert dados["METADADOS"]["AUTOR"] == dados["NOME"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a geração em chamada única com a geração por seções em paralelo")
+    parser.add_argument("--cvs", type=int, default=8)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--larguras", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+    # Só a latência da IA entra na medida: sem cotas nem limite global na frente do modelo
+    config.ADMISSAO_GLOBAL_POR_MINUTO = 0
+    asyncio.run(principal(args))
+
+
+if __name__ == "__main__":
+    main()
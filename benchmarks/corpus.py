@@ -0,0 +1,124 @@
+import os
+import random
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.layout import LayoutPdf
+
+# Fontes base-14 do PDF em variações de família e peso, para a extração ver codificações diferentes
+FONTES = ["helv", "tiro", "cour", "hebo", "tiit", "cobo"]
+
+IDIOMAS: Dict[str, Dict[str, List[str]]] = {
+    "pt": {
+        "secoes": ["RESUMO", "EXPERIÊNCIA", "PROJETOS", "FORMAÇÃO", "COMPETÊNCIAS", "CONTATO"],
+        "cargos": ["Desenvolvedor Backend", "Analista de Dados", "Engenheira de Software", "Gerente de Projetos"],
+        "frases": [
+            "Atuei com {t} em projetos de missão crítica, garantindo qualidade e prazos.",
+            "Conduzi a migração de sistemas legados para {t}, com ganho de desempenho.",
+            "Responsável pela integração de {t} com serviços internos e parceiros.",
+            "Participei de revisões de código e da definição de padrões de {t}.",
+        ],
+        "cursos": ["Bacharelado em Ciência da Computação", "Tecnólogo em Análise e Desenvolvimento de Sistemas"],
+        "vaga": "Buscamos {cargo} com experiência em {t1}, {t2} e {t3} para atuar em produtos digitais.",
+    },
+    "en": {
+        "secoes": ["SUMMARY", "WORK EXPERIENCE", "PROJECTS", "EDUCATION", "SKILLS", "CONTACT"],
+        "cargos": ["Backend Developer", "Data Analyst", "Software Engineer", "Project Manager"],
+        "frases": [
+            "Worked with {t} on mission-critical projects, ensuring quality and deadlines.",
+            "Led the migration of legacy systems to {t}, improving performance.",
+            "Owned the integration of {t} with internal services and partners.",
+            "Took part in code reviews and in defining {t} standards.",
+        ],
+        "cursos": ["BSc in Computer Science", "MSc in Software Engineering"],
+        "vaga": "We are hiring a {cargo} experienced with {t1}, {t2} and {t3} to build digital products.",
+    },
+    "es": {
+        "secoes": ["RESUMEN", "EXPERIENCIA", "PROYECTOS", "FORMACIÓN", "HABILIDADES", "CONTACTO"],
+        "cargos": ["Desarrollador Backend", "Analista de Datos", "Ingeniera de Software", "Jefe de Proyectos"],
+        "frases": [
+            "Trabajé con {t} en proyectos críticos, garantizando calidad y plazos.",
+            "Dirigí la migración de sistemas heredados a {t}, con mejora de rendimiento.",
+            "Responsable de la integración de {t} con servicios internos y socios.",
+            "Participé en revisiones de código y en la definición de estándares de {t}.",
+        ],
+        "cursos": ["Licenciatura en Informática", "Ingeniería de Sistemas"],
+        "vaga": "Buscamos {cargo} con experiencia en {t1}, {t2} y {t3} para productos digitales.",
+    },
+}
+
+TECNOLOGIAS = [
+    "Python", "Django", "FastAPI", "Java", "Spring Boot", "Go", "Node.js", "React", "TypeScript", "PostgreSQL",
+    "MongoDB", "Redis", "Kafka", "AWS", "GCP", "Docker", "Kubernetes", "Terraform", "Airflow", "Spark",
+]
+NOMES = ["Fulano de Tal", "Maria Souza", "John Smith", "Lucía Fernández", "João Pereira", "Ana Lima"]
+
+
+@dataclass
+class CvSintetico:
+    nome: str
+    idioma: str
+    fonte: str
+    paginas: int
+    pdf: bytes
+    vaga: str
+
+
+def gerar_cv(rng: random.Random, paginas: int) -> CvSintetico:
+    idioma = rng.choice(list(IDIOMAS))
+    textos = IDIOMAS[idioma]
+    fonte = rng.choice(FONTES)
+    nome = rng.choice(NOMES)
+    cargo = rng.choice(textos["cargos"])
+    tamanho = rng.choice([9, 10, 11])
+    tecnologias = rng.sample(TECNOLOGIAS, 8)
+    resumo, experiencia, projetos, formacao, competencias, contato = textos["secoes"]
+    preto = (0, 0, 0)
+
+    layout = LayoutPdf()
+    try:
+        layout.texto(nome, fonte, tamanho + 8, preto)
+        layout.texto(cargo, fonte, tamanho + 2, preto)
+        layout.texto(resumo, fonte, tamanho + 2, preto)
+        layout.texto(" ".join(rng.choice(textos["frases"]).format(t=t) for t in tecnologias[:3]), fonte, tamanho, preto)
+        layout.texto(experiencia, fonte, tamanho + 2, preto)
+        # Experiências e projetos até completar as páginas pedidas
+        indice = 0
+        while len(layout.doc) < paginas or indice < 2:
+            if indice and indice % 6 == 0:
+                layout.texto(projetos, fonte, tamanho + 2, preto)
+            inicio = 2024 - indice * 2
+            layout.texto(f"{cargo} | Empresa {indice + 1} | {inicio - 2}-{inicio}", fonte, tamanho + 1, preto)
+            for _ in range(rng.randint(3, 6)):
+                layout.texto(rng.choice(textos["frases"]).format(t=rng.choice(tecnologias)), fonte, tamanho, preto, prefixo="- ")
+            indice += 1
+        layout.texto(formacao, fonte, tamanho + 2, preto)
+        layout.texto(f"{rng.choice(textos['cursos'])} | Universidade {rng.randint(1, 9)} | 2012-2016", fonte, tamanho, preto)
+        layout.texto(competencias, fonte, tamanho + 2, preto)
+        layout.texto(", ".join(tecnologias), fonte, tamanho, preto)
+        layout.texto(contato, fonte, tamanho + 2, preto)
+        email = nome.lower().split()[0].encode("ascii", "ignore").decode()
+        layout.texto(f"{email}@example.com | (11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}", fonte, tamanho, preto)
+        layout.texto(f"linkedin.com/in/{email}", fonte, tamanho, preto)
+        pdf = layout.salvar().getvalue()
+        total_paginas = len(layout.doc)
+    finally:
+        layout.fechar()
+
+    vaga = textos["vaga"].format(cargo=cargo, t1=tecnologias[0], t2=tecnologias[1], t3=tecnologias[2])
+    return CvSintetico(nome, idioma, fonte, total_paginas, pdf, vaga)
+
+
+def gerar_corpus(quantidade: int, semente: int = 42, paginas_min: int = 1, paginas_max: int = 20) -> List[CvSintetico]:
+    # Determinístico pela semente; as páginas cobrem a faixa de ponta a ponta
+    rng = random.Random(semente)
+    paginas = [paginas_min + (paginas_max - paginas_min) * i // max(1, quantidade - 1) for i in range(quantidade)]
+    return [gerar_cv(rng, alvo) for alvo in paginas]
+
+
+if __name__ == "__main__":
+    for cv in gerar_corpus(8):
+        print(f"{cv.idioma} {cv.fonte:>5} {cv.paginas:>3} páginas {len(cv.pdf):>8} bytes  {cv.nome}")
@@ -0,0 +1,142 @@
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências pesadas que só podem carregar no aquecimento ou no primeiro pedido
+MODULOS_ADIADOS = [
+    "langchain.chains",
+    "langchain_google_genai",
+    "langchain_text_splitters",
+    "langsmith",
+    "faiss",
+    "numpy",
+    "services.provedores_llm",
+]
+
+_LINHA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _ambiente() -> Dict[str, str]:
+    # Provedor local por padrão: o aquecimento não depende de rede nem de GOOGLE_API_KEY
+    return {**os.environ, "LLM_PROVEDOR": os.environ.get("LLM_PROVEDOR", "local"), "LOG_NIVEL": "WARNING"}
+
+
+def perfil_importacao(modulo: str) -> List[Tuple[str, int, int, int]]:
+    # (módulo, profundidade, próprio µs, acumulado µs) na ordem em que o -X importtime reporta
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, env=_ambiente(), capture_output=True, text=True, check=True,
+    ).stderr
+    linhas = []
+    for linha in saida.splitlines():
+        achado = _LINHA.match(linha)
+        if achado:
+            proprio, acumulado, recuo, nome = achado.groups()
+            linhas.append((nome, len(recuo) // 2, int(proprio), int(acumulado)))
+    # Só a subárvore do módulo pedido: o que o interpretador carrega no start (site, encodings) fica de fora
+    fim = next(i for i, linha in enumerate(linhas) if linha[0] == modulo and linha[1] == 0)
+    inicio = max((i for i in range(fim) if linhas[i][1] == 0), default=-1) + 1
+    return linhas[inicio : fim + 1]
+
+
+def por_pacote(linhas: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    totais: Dict[str, int] = defaultdict(int)
+    for nome, _, proprio, _ in linhas:
+        totais[nome.split(".")[0]] += proprio
+    return dict(totais)
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir_inicializacao(prazo: float = 120) -> Tuple[Optional[float], Optional[float], Dict]:
+    # Do spawn do uvicorn até /livez e /readyz responderem 200
+    porta = _porta_livre()
+    url = f"http://127.0.0.1:{porta}"
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(porta)],
+        cwd=RAIZ, env=_ambiente(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    vivo = pronto = None
+    componentes: Dict = {}
+    try:
+        while time.perf_counter() - inicio < prazo and pronto is None:
+            if processo.poll() is not None:
+                raise RuntimeError("O servidor encerrou durante a inicialização")
+            try:
+                if vivo is None and httpx.get(f"{url}/livez", timeout=1).status_code == 200:
+                    vivo = time.perf_counter() - inicio
+                if vivo is not None:
+                    resposta = httpx.get(f"{url}/readyz", timeout=1)
+                    componentes = resposta.json().get("componentes", {})
+                    if resposta.status_code == 200:
+                        pronto = time.perf_counter() - inicio
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+    return vivo, pronto, componentes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Perfil de importação e tempo até vivo/pronto do serviço")
+    parser.add_argument("--modulo", default="app.main")
+    parser.add_argument("--top", type=int, default=15, help="quantos módulos e pacotes listar")
+    parser.add_argument("--limite", type=float, default=0, help="falha se o import passar de N segundos (0 desliga)")
+    parser.add_argument("--sem-servidor", action="store_true", help="não mede /livez e /readyz")
+    args = parser.parse_args()
+
+    linhas = perfil_importacao(args.modulo)
+    total = linhas[-1][3] / 1e6
+    print(f"Import de {args.modulo}: {total:.3f}s ({len(linhas)} módulos)")
+
+    print("\nMódulos mais caros (acumulado, primeiros níveis):")
+    rasos = [linha for linha in linhas[:-1] if linha[1] <= 2]
+    for nome, profundidade, _, acumulado in sorted(rasos, key=lambda l: l[3], reverse=True)[: args.top]:
+        print(f"  {acumulado / 1e3:>9.1f} ms  {'  ' * profundidade}{nome}")
+
+    print("\nPacotes mais caros (tempo próprio somado):")
+    for pacote, proprio in sorted(por_pacote(linhas).items(), key=lambda p: p[1], reverse=True)[: args.top]:
+        print(f"  {proprio / 1e3:>9.1f} ms  {pacote}")
+
+    carregados = {nome for nome, _, _, _ in linhas}
+    adiantados = [m for m in MODULOS_ADIADOS if m in carregados]
+    falhou = False
+    if adiantados:
+        print(f"\nAVISO: dependências que deveriam ser preguiçosas carregaram no import: {', '.join(adiantados)}")
+        falhou = True
+    if args.limite and total > args.limite:
+        print(f"\nAVISO: import levou {total:.3f}s, acima do limite de {args.limite:.3f}s")
+        falhou = True
+
+    if not args.sem_servidor:
+        vivo, pronto, componentes = medir_inicializacao()
+        print("\nInicialização do servidor (desde o spawn do uvicorn):")
+        print(f"  vivo   (/livez):  {f'{vivo:.2f}s' if vivo is not None else 'não respondeu'}")
+        print(f"  pronto (/readyz): {f'{pronto:.2f}s' if pronto is not None else 'não ficou pronto'}")
+        for nome, estado in componentes.items():
+            detalhe = f"{estado['segundos']:.2f}s" if "segundos" in estado else estado.get("erro", "pendente")
+            print(f"    {nome:<14} {detalhe}")
+        falhou = falhou or pronto is None
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,821 +1,722 @@
-import os
-import re
-from io import BytesIO
-import tempfile
-from typing import Dict, Any, Optional
-import fitz 
-
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+import asyncio
+import base64
+import contextlib
+import functools
+import hashlib
+import logging
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
+
+from langchain_core.documents import Document
+
+from services import config
+from services.admissao import CapacidadeEsgotada, admitir, http_capacidade_esgotada, verificar_cota
+from services.coalescencia import Coalescedor
+from services.componentes import registrar
+from services.cache import CACHE_RESULTADOS, ResultadoCache, chave_cache
+from services.executor import executar_cpu, limitar_requisicoes
+from services.contexto import reduzir_contexto
+from services.estruturado import CurriculoEnviado, CurriculoIA, gerar_estruturado_async, interpretar_resposta_ia
+from services.extraction import MARCA_SUBTITULO, MARCA_TITULO, extrair_documentos_memoria
+from services.jobs import (
+    CANCELADO,
+    ERRO,
+    FORMATO_JSON,
+    FORMATO_PDF,
+    FORMATOS,
+    aguardar_job,
+    cancelar_job,
+    enfileirar_job,
+    remover_job,
+)
+from services.parser import ParserIncremental, sem_marca_titulo
+from services.render_pool import renderizar_pdf
+from services.resposta import RespostaPdf
+from services.llm import ClienteDesconectado, executar_llm_async, transmitir_llm_async
+from services.observabilidade import etapa
+from services.secoes_llm import agrupar_secoes, gerar_por_secoes_async
+from services.streaming import evento_sse
+from services.templates import TEMPLATE_PADRAO, TEMPLATES, obter_template
+from services.upload import ler_upload_pdf
+from services.vaga import CACHE_VAGAS, indice_vaga
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import Runnable
 
 cvv_router = APIRouter(prefix="/cvv", tags=["cvv"])
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+MODELO_LLM = "gemini-2.5-flash"
+# O stream emite as seções conforme o texto chega: gera sempre no modo texto, sem seções em paralelo
+MODO_STREAM = "texto"
 
-LLM = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.5,
-    api_key=os.getenv("GOOGLE_API_KEY"),
+REGRAS_PROMPT = (
+    "Você é um redator de currículos de elite, especialista em marketing pessoal e otimização para ATS. Sua missão é transformar o currículo fornecido em um documento de marketing de alto impacto, totalmente otimizado para sistemas de rastreamento de candidatos (ATS) que utilizam NLP e análise vetorial semântica.\n\n"
+    "REGRAS DE TRANSFORMAÇÃO:\n"
+    "1.  **Reenquadramento para Impacto**: Não liste responsabilidades, transforme-as em conquistas. Cada item de experiência deve responder à pergunta: 'Que valor ou resultado positivo eu gerei para a empresa?'.\n"
+    "2.  **Quantificação Agressiva**: Sempre que possível, adicione métricas, percentuais, valores ou prazos. Caso não existam, inferir impactos com base na prática profissional.\n"
+    "3.  **Linguagem de Liderança e Inovação**: Use verbos fortes e proativos como Orquestrei, Pioneirei, Otimizei, Escalei, Implementei, em vez de termos passivos.\n"
+    "4.  **Alinhamento Estratégico com a Vaga**: Analise a vaga e identifique as dores e objetivos da empresa. Reescreva o currículo de modo que o candidato apareça como a solução direta para esses desafios.\n"
+    "5.  **Comunicação Clara e Profissional**:\n"
+    "    - Não use placeholders, colchetes ou textos pendentes.\n"
+    "    - Não mencione ausência de dados.\n"
+    "    - O tom deve ser profissional, assertivo e confiante.\n"
+    "6.  **Alinhamento com a Vaga e Prevenção de Corte ATS**:\n"
+    "    - Todas as exigências, palavras-chave, tecnologias, ferramentas e competências mencionadas na descrição da vaga **devem constar no currículo final**.\n"
+    "    - Nenhuma palavra presente na descrição da vaga pode estar ausente. Se necessário, encaixe-a naturalmente na seção mais coerente.\n"
+    "    - Isso previne cortes automáticos em sistemas ATS que fazem correspondência semântica.\n\n"
+    "REGRAS DE NLP E ESPAÇO VETORIAL:\n"
+    "- Os sistemas ATS modernos utilizam embeddings e análise vetorial semântica para medir a similaridade entre o texto do currículo e a descrição da vaga.\n"
+    "- Portanto, além de repetir as palavras exatas da vaga, **utilize sinônimos, termos relacionados e palavras próximas no mesmo espaço vetorial**.\n"
+    "- Exemplo: se a vaga pede 'desenvolvimento backend', inclua termos semanticamente próximos como 'API REST', 'integrações', 'arquitetura de servidor' e 'microsserviços'.\n"
+    "- Garanta que o texto contenha alta densidade de palavras semanticamente correlatas à vaga, mas de forma natural e fluente.\n"
+    "- Use variações morfológicas e léxicas das palavras-chave para aumentar o score semântico (ex: 'analisar', 'análise', 'analítico').\n\n"
+    "REGRAS DE DENSIDADE E REPETIÇÃO:\n"
+    "- Palavras-chave da vaga devem aparecer entre 2 e 3 vezes no texto total.\n"
+    "- O cargo principal deve aparecer 2 vezes.\n"
+    "- Cada tecnologia ou exigência técnica deve aparecer pelo menos 2 vezes, de forma contextual.\n"
+    "- No resumo profissional, as palavras-chave devem constar 2 a 3 vezes.\n"
+    "- Em competências e experiência, priorize repetições sutis e orgânicas.\n"
+    "- Evite repetição mecânica (keyword stuffing). Prefira paráfrases e variações sintáticas.\n\n"
 )
 
-PROMPT_IA = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "Você é um redator de currículos de elite, especialista em marketing pessoal e otimização para ATS. Sua missão é transformar o currículo fornecido em um documento de marketing de alto impacto, totalmente otimizado para sistemas de rastreamento de candidatos (ATS) que utilizam NLP e análise vetorial semântica.\n\n"
-            "REGRAS DE TRANSFORMAÇÃO:\n"
-            "1.  **Reenquadramento para Impacto**: Não liste responsabilidades, transforme-as em conquistas. Cada item de experiência deve responder à pergunta: 'Que valor ou resultado positivo eu gerei para a empresa?'.\n"
-            "2.  **Quantificação Agressiva**: Sempre que possível, adicione métricas, percentuais, valores ou prazos. Caso não existam, inferir impactos com base na prática profissional.\n"
-            "3.  **Linguagem de Liderança e Inovação**: Use verbos fortes e proativos como Orquestrei, Pioneirei, Otimizei, Escalei, Implementei, em vez de termos passivos.\n"
-            "4.  **Alinhamento Estratégico com a Vaga**: Analise a vaga e identifique as dores e objetivos da empresa. Reescreva o currículo de modo que o candidato apareça como a solução direta para esses desafios.\n"
-            "5.  **Comunicação Clara e Profissional**:\n"
-            "    - Não use placeholders, colchetes ou textos pendentes.\n"
-            "    - Não mencione ausência de dados.\n"
-            "    - O tom deve ser profissional, assertivo e confiante.\n"
-            "6.  **Alinhamento com a Vaga e Prevenção de Corte ATS**:\n"
-            "    - Todas as exigências, palavras-chave, tecnologias, ferramentas e competências mencionadas na descrição da vaga **devem constar no currículo final**.\n"
-            "    - Nenhuma palavra presente na descrição da vaga pode estar ausente. Se necessário, encaixe-a naturalmente na seção mais coerente.\n"
-            "    - Isso previne cortes automáticos em sistemas ATS que fazem correspondência semântica.\n\n"
-            "REGRAS DE NLP E ESPAÇO VETORIAL:\n"
-            "- Os sistemas ATS modernos utilizam embeddings e análise vetorial semântica para medir a similaridade entre o texto do currículo e a descrição da vaga.\n"
-            "- Portanto, além de repetir as palavras exatas da vaga, **utilize sinônimos, termos relacionados e palavras próximas no mesmo espaço vetorial**.\n"
-            "- Exemplo: se a vaga pede 'desenvolvimento backend', inclua termos semanticamente próximos como 'API REST', 'integrações', 'arquitetura de servidor' e 'microsserviços'.\n"
-            "- Garanta que o texto contenha alta densidade de palavras semanticamente correlatas à vaga, mas de forma natural e fluente.\n"
-            "- Use variações morfológicas e léxicas das palavras-chave para aumentar o score semântico (ex: 'analisar', 'análise', 'analítico').\n\n"
-            "REGRAS DE DENSIDADE E REPETIÇÃO:\n"
-            "- Palavras-chave da vaga devem aparecer entre 2 e 3 vezes no texto total.\n"
-            "- O cargo principal deve aparecer 2 vezes.\n"
-            "- Cada tecnologia ou exigência técnica deve aparecer pelo menos 2 vezes, de forma contextual.\n"
-            "- No resumo profissional, as palavras-chave devem constar 2 a 3 vezes.\n"
-            "- Em competências e experiência, priorize repetições sutis e orgânicas.\n"
-            "- Evite repetição mecânica (keyword stuffing). Prefira paráfrases e variações sintáticas.\n\n"
-            "**METADADOS OBRIGATÓRIOS (insira esta seção no início da resposta, antes de tudo):**\n"
-            "```\n"
-            "METADADOS:\n"
-            "TITULO: [Cargo Principal ou Desejado, extraído da descrição da vaga]\n"
-            "AUTOR: [Nome do Candidato]\n"
-            "PALAVRAS_CHAVE: [Extraia até 10 palavras-chave da DESCRIÇÃO DA VAGA, incluindo tecnologias, linguagens de programação, frameworks, ferramentas e bibliotecas específicas. Exemplo: Python, Django, PostgreSQL, Docker, AWS, React, Node.js, TensorFlow, Kubernetes, Git]\n"
-            "DESCRICAO: [Resumo conciso da vaga, destacando os principais requisitos e responsabilidades, incluindo tecnologias.]\n"
-            "CATEGORIA: currículo\n"
-            "```\n\n"
-            "**ESTRUTURA DE SAÍDA OBRIGATÓRIA (após os metadados, use EXATAMENTE este formato):**\n\n"
-            "NOME: [Nome Completo do Candidato]\n\n"
-            "CARGO: [Cargo Principal ou Desejado]\n\n"
-            "RESUMO: [Parágrafo único e conciso do resumo profissional, alinhado com a vaga e otimizando repetição semântica.]\n\n"
-            "EXPERIENCIA:\n"
-            "- [Cargo] | [Empresa] | [Período]\n"
-            "  - [Descrição da primeira conquista ou responsabilidade com termos da vaga e correlatos semânticos]\n"
-            "  - [Descrição da segunda conquista, integrando palavras próximas no espaço vetorial]\n\n"
-            "COMPETENCIAS:\n"
-            "- [Categoria 1]: [Tecnologia 1], [Tecnologia 2]\n"
-            "- [Categoria 2]: [Tecnologia 1], [Tecnologia 2]\n\n"
-            "FORMACAO:\n"
-            "- [Curso] | [Instituição] | [Período]\n\n"
-            "CONTATO:\n"
-            "- Telefone: [Seu Telefone]\n"
-            "- Email: [Seu Email]\n"
-            "- LinkedIn: [Seu LinkedIn]\n"
-            "- GitHub: [Seu GitHub]"
-        ),
-        ("user", "Extraia e reescreva o currículo a seguir, seguindo a estrutura definida. \n"
-         "Analise cuidadosamente a descrição da vaga para extrair os metadados solicitados e alinhe o currículo com as necessidades da vaga.\n\n"
-         "CURRÍCULO ORIGINAL:\n{context}\n\nVAGA DESCRITA:\n{input}"),
-    ]
+FORMATO_TEXTO = (
+    "**METADADOS OBRIGATÓRIOS (insira esta seção no início da resposta, antes de tudo):**\n"
+    "```\n"
+    "METADADOS:\n"
+    "TITULO: [Cargo Principal ou Desejado, extraído da descrição da vaga]\n"
+    "AUTOR: [Nome do Candidato]\n"
+    "PALAVRAS_CHAVE: [Até 10 palavras-chave da vaga. Parta das PALAVRAS-CHAVE DA VAGA já extraídas e informadas junto com a descrição, na mesma ordem, e só complete com tecnologias, frameworks ou ferramentas da DESCRIÇÃO DA VAGA que faltarem. Exemplo: Python, Django, PostgreSQL, Docker, AWS, React, Node.js, TensorFlow, Kubernetes, Git]\n"
+    "DESCRICAO: [Resumo conciso da vaga, destacando os principais requisitos e responsabilidades, incluindo tecnologias.]\n"
+    "CATEGORIA: currículo\n"
+    "```\n\n"
+    "**ESTRUTURA DE SAÍDA OBRIGATÓRIA (após os metadados, use EXATAMENTE este formato):**\n\n"
+    "NOME: [Nome Completo do Candidato]\n\n"
+    "CARGO: [Cargo Principal ou Desejado]\n\n"
+    "RESUMO: [Parágrafo único e conciso do resumo profissional, alinhado com a vaga e otimizando repetição semântica.]\n\n"
+    "EXPERIENCIA:\n"
+    "- [Cargo] | [Empresa] | [Período]\n"
+    "  - [Descrição da primeira conquista ou responsabilidade com termos da vaga e correlatos semânticos]\n"
+    "  - [Descrição da segunda conquista, integrando palavras próximas no espaço vetorial]\n\n"
+    "COMPETENCIAS:\n"
+    "- [Categoria 1]: [Tecnologia 1], [Tecnologia 2]\n"
+    "- [Categoria 2]: [Tecnologia 1], [Tecnologia 2]\n\n"
+    "FORMACAO:\n"
+    "- [Curso] | [Instituição] | [Período]\n\n"
+    "CONTATO:\n"
+    "- Telefone: [Seu Telefone]\n"
+    "- Email: [Seu Email]\n"
+    "- LinkedIn: [Seu LinkedIn]\n"
+    "- GitHub: [Seu GitHub]"
 )
 
+# O texto extraído do PDF marca títulos com "## " e subtítulos com "### " (services/extraction.py)
+NOTA_MARCAS = (
+    f"No CURRÍCULO ORIGINAL, linhas iniciadas por \"{MARCA_TITULO.strip()}\" são títulos de seção e linhas iniciadas por "
+    f"\"{MARCA_SUBTITULO.strip()}\" são subtítulos (ex.: cargo, empresa e período), marcados a partir do layout do PDF. "
+    "Use essas marcas só para entender a estrutura do currículo; não copie os símbolos \"#\" para a resposta.\n"
+)
 
+MENSAGEM_USUARIO = (
+    "Extraia e reescreva o currículo a seguir, seguindo a estrutura definida. \n"
+    "Analise cuidadosamente a descrição da vaga para extrair os metadados solicitados e alinhe o currículo com as necessidades da vaga.\n"
+    + NOTA_MARCAS
+    + "\nCURRÍCULO ORIGINAL:\n{context}\n\nVAGA DESCRITA:\n{input}\n\n"
+    "PALAVRAS-CHAVE DA VAGA (já extraídas, todas devem constar no currículo):\n{palavras_chave}"
+)
 
-DOCUMENT_CHAIN = create_stuff_documents_chain(LLM, PROMPT_IA)
+INSTRUCOES_ESTRUTURADO = {
+    "METADADOS": (
+        "- METADADOS.TITULO: cargo principal extraído da descrição da vaga; METADADOS.AUTOR: nome do candidato.\n"
+        "- METADADOS.PALAVRAS_CHAVE: até 10 itens. Parta das PALAVRAS-CHAVE DA VAGA já extraídas, na mesma ordem, e só complete com tecnologias da vaga que faltarem.\n"
+        "- METADADOS.DESCRICAO: resumo conciso da vaga com os principais requisitos e tecnologias."
+    ),
+    "RESUMO": "- RESUMO: parágrafo único, alinhado com a vaga.",
+    "EXPERIENCIA": "- EXPERIENCIA: um item por cargo, com titulo no formato 'Cargo | Empresa | Período' e as conquistas em detalhes.",
+    "COMPETENCIAS": "- COMPETENCIAS: itens no formato 'Categoria: Tecnologia 1, Tecnologia 2'.",
+    "FORMACAO": "- FORMACAO: itens no formato 'Curso | Instituição | Período'.",
+    "CONTATO": "- CONTATO: itens como 'Telefone: ...', 'Email: ...', 'LinkedIn: ...', 'GitHub: ...', apenas os que existirem no currículo.",
+}
 
-def gerar_conteudo_otimizado(file_content: bytes, description: str) -> str:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(file_content)
-        tmp_path = tmp.name
-    try:
-        loader = PyMuPDFLoader(tmp_path)
-        pdf_docs = loader.load()
-        if not pdf_docs or not any(doc.page_content.strip() for doc in pdf_docs):
-             raise ValueError("Nenhum conteúdo válido foi extraído do PDF.")
-        return DOCUMENT_CHAIN.invoke({"input": description, "context": pdf_docs})
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(pdf_content)
-        tmp_path = tmp.name
+FORMATO_ESTRUTURADO = (
+    "**FORMATO DE SAÍDA:** responda apenas com o objeto JSON do schema fornecido, sem texto fora dele.\n"
+    + "\n".join(INSTRUCOES_ESTRUTURADO.values())
+)
+
+# Geração por seções: cada chamada escreve só parte do currículo, sobre o mesmo contexto
+FORMATO_SECOES = (
+    "**FORMATO DE SAÍDA:** responda apenas com um objeto JSON com as chaves NOME, CARGO e as SEÇÕES PEDIDAS, sem texto fora dele. "
+    "As demais seções do currículo são escritas à parte; não as inclua.\n"
+    "- NOME: nome completo do candidato; CARGO: cargo principal ou desejado, alinhado com a vaga.\n"
+)
+
+MENSAGENS_IA = [("system", REGRAS_PROMPT + FORMATO_TEXTO), ("user", MENSAGEM_USUARIO)]
+
+MENSAGENS_ESTRUTURADO = [("system", REGRAS_PROMPT + FORMATO_ESTRUTURADO), ("user", MENSAGEM_USUARIO)]
+
+def mensagens_secoes(secoes: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    return [
+        ("system", REGRAS_PROMPT + FORMATO_SECOES + "\n".join(INSTRUCOES_ESTRUTURADO[secao] for secao in secoes)),
+        ("user", f"SEÇÕES PEDIDAS: {', '.join(secoes)}\n\n" + MENSAGEM_USUARIO),
+    ]
+
+MENSAGENS_REPARO = [
+    ("system", "Você corrige respostas JSON de currículos para que sigam exatamente o schema fornecido. "
+     "Preserve todo o conteúdo válido, corrija apenas a estrutura e preencha os campos obrigatórios a partir do próprio texto."),
+    ("user", "RESPOSTA ANTERIOR:\n{resposta}\n\nERROS DE VALIDAÇÃO:\n{erros}"),
+]
+
+VERSAO_PROMPT = hashlib.sha256(
+    "\n".join(
+        [MODELO_LLM, FORMATO_SECOES]
+        + [texto for mensagens in (MENSAGENS_IA, MENSAGENS_ESTRUTURADO, MENSAGENS_REPARO) for _, texto in mensagens]
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+
+@dataclass
+class CadeiasLLM:
+    documento: "Runnable"
+    estruturada: "Runnable"
+    reparo: "Runnable"
+    # Sem prompt: cada grupo de seções acrescenta o seu (_prompt_secoes)
+    parcial: "Runnable"
+
+
+def _criar_cadeias() -> CadeiasLLM:
+    # As cadeias do LangChain e o cliente do provedor só são importados no aquecimento ou no primeiro pedido
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from services.provedores_llm import criar_llm
+
+    llm = criar_llm(MODELO_LLM)
+    # Toda chamada ao modelo passa pelo controle de admissão (fila justa, limite global e retentativas)
+    estruturado = admitir(llm.with_structured_output(CurriculoIA, method="json_mode", include_raw=True))
+    return CadeiasLLM(
+        documento=create_stuff_documents_chain(admitir(llm), ChatPromptTemplate.from_messages(MENSAGENS_IA)),
+        estruturada=ChatPromptTemplate.from_messages(MENSAGENS_ESTRUTURADO) | estruturado,
+        reparo=ChatPromptTemplate.from_messages(MENSAGENS_REPARO) | estruturado,
+        parcial=admitir(llm.with_structured_output(CurriculoEnviado, method="json_mode", include_raw=True)),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt_secoes(secoes: Tuple[str, ...]) -> "ChatPromptTemplate":
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(mensagens_secoes(secoes))
+
+
+CADEIAS_LLM = registrar("cadeias_llm", _criar_cadeias)
+
+GERACOES = Coalescedor()
+
+def entrada_llm(pdf_docs: List[Document], description: str) -> Dict[str, Any]:
+    # As palavras-chave da vaga vêm do índice local (em cache por vaga), não da IA
+    return {"input": description, "context": pdf_docs, "palavras_chave": indice_vaga(description).para_prompt()}
+
+async def gerar_conteudo_llm_async(pdf_docs: List[Document], description: str) -> str:
+    entrada = entrada_llm(pdf_docs, description)
+    cadeias = await CADEIAS_LLM.obter_async()
+    # No modo estruturado o contexto vai como texto, juntado como o create_stuff_documents_chain faria
+    entrada_estruturada = {**entrada, "context": "\n\n".join(d.page_content for d in pdf_docs)}
+    if config.LLM_SECOES_PARALELAS > 1:
+        grupos = agrupar_secoes(config.LLM_SECOES_PARALELAS)
+        try:
+            return await gerar_por_secoes_async(
+                [(grupo, _prompt_secoes(grupo) | cadeias.parcial) for grupo in grupos], entrada_estruturada
+            )
+        except ValueError as e:
+            logger.warning("Usando a chamada única: %.300s", e)
+    if config.LLM_MODO != "estruturado":
+        return await cadeias.documento.ainvoke(entrada)
+    return await gerar_estruturado_async(
+        cadeias.estruturada, cadeias.reparo, entrada_estruturada, fallback=cadeias.documento, entrada_fallback=entrada
+    )
+
+def _nome_arquivo(dados_estruturados: Dict[str, Any]) -> str:
+    nome_candidato = sem_marca_titulo(dados_estruturados.get("NOME") or "") or "Curriculo"
     
-    try:
-        doc = fitz.open(tmp_path)
-        if not doc:
-            return "Curriculo"
-            
-        first_page = doc[0]
-        text = first_page.get_text("text")
-        
-        if text:
-            first_line = next((line.strip() for line in text.split('\n') if line.strip()), "")
-            clean_name = ' '.join(first_line.split())
-            if clean_name and len(clean_name) > 2:
-                return clean_name
+    nome_arquivo = f"{nome_candidato}-Curriculo.pdf"
+    nome_arquivo = "".join(c if c.isalnum() or c in ('-', '_', '.', ' ') else '_' for c in nome_arquivo)
+    nome_arquivo = nome_arquivo.replace(" ", "_")
+    if not nome_arquivo.lower().endswith('.pdf'):
+        nome_arquivo += '.pdf'
+    return nome_arquivo
+
+def resposta_pdf(
+    pdf_bytes: bytes, nome_arquivo: str, status_cache: str, request: Optional[Request] = None
+) -> RespostaPdf:
+    return RespostaPdf(pdf_bytes, nome_arquivo, status_cache, request)
+
+def resposta_resultado(
+    resultado: ResultadoCache, formato: str, status_cache: str, request: Optional[Request] = None
+):
+    if formato != FORMATO_JSON:
+        resposta = resposta_pdf(resultado.pdf, resultado.nome_arquivo, status_cache, request)
+        if resultado.chave:
+            # Endereço GET do mesmo PDF, onde ETag e Range valem
+            resposta.headers["Content-Location"] = f"{cvv_router.prefix}/resultados/{resultado.chave}"
+        return resposta
+    # O id permite renderizar o mesmo currículo em /cvv/render sem reenviá-lo, enquanto estiver no cache
+    return JSONResponse(
+        {
+            "id": resultado.chave or None,
+            "nome_arquivo": resultado.nome_arquivo,
+            "curriculo": interpretar_resposta_ia(resultado.texto_ia),
+        },
+        headers={"X-Cache": status_cache},
+    )
+
+def _interpretar_ia(conteudo_bruto_ia: str) -> Dict[str, Any]:
+    if not conteudo_bruto_ia or not str(conteudo_bruto_ia).strip():
+        logger.error("Não foi possível processar o conteúdo do currículo - retorno vazio da IA")
+        raise ValueError("Não foi possível processar o conteúdo do currículo")
+    
+    logger.debug("Conteúdo bruto da IA (primeiros 500 caracteres): %.500s", conteudo_bruto_ia)
         
-        return "Curriculo"
-    except Exception as e:
-        print(f"Erro ao extrair nome do PDF: {e}")
-        return "Curriculo"
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-
-def parse_resposta_ia(texto_ia: str) -> Dict[str, Any]:
-    data = {
-        "NOME": "",
-        "CARGO": "",
-        "RESUMO": "",
-        "EXPERIENCIA": [],
-        "FORMACAO": [],
-        "COMPETENCIAS": [],
-        "CONTATO": [],
-        "METADADOS": {
-            "TITULO": "",
-            "AUTOR": "",
-            "PALAVRAS_CHAVE": "",
-            "DESCRICAO": "",
-            "CATEGORIA": "currículo"
-        }
-    }
+    logger.debug("Iniciando análise da resposta da IA...")
+    with etapa("parse"):
+        dados_estruturados = interpretar_resposta_ia(conteudo_bruto_ia)
     
-    if not texto_ia or not isinstance(texto_ia, str) or not texto_ia.strip():
-        print("ERRO: Texto da IA vazio ou inválido")
-        return data
+    if not dados_estruturados or not isinstance(dados_estruturados, dict):
+        logger.error("Falha ao processar a estrutura do currículo - dados_estruturados inválido")
+        logger.debug("Tipo de dados_estruturados: %s", type(dados_estruturados))
+        logger.debug("Conteúdo: %s", dados_estruturados)
+        raise ValueError("Falha ao processar a estrutura do currículo")
+        
+    logger.debug("Dados estruturados processados com sucesso")
+    return dados_estruturados
+
+async def _renderizar(dados_estruturados: Dict[str, Any], description: str, template: str) -> bytes:
+    logger.debug("Criando PDF estilizado...")
+    logger.debug("Dados sendo passados para criar_pdf_estilizado_cv: %s", list(dados_estruturados.keys()))
+    logger.debug("Metadados disponíveis: %s", dados_estruturados.get('METADADOS', 'Nenhum metadado encontrado'))
     
-    current_section = None
+    with etapa("render"):
+        pdf_bytes = await renderizar_pdf(dados_estruturados, description, template)
     
-    try:
-        for line in texto_ia.strip().split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith("```") and "METADADOS" in line.upper():
-                print("\n=== INÍCIO DO BLOCO DE METADADOS ===")
-                current_section = "METADADOS"
-                continue
-                
-            if current_section == "METADADOS":
-                if line.startswith("```"):
-                    print("=== FIM DO BLOCO DE METADADOS ===\n")
-                    print("Metadados extraídos:", data["METADADOS"])
-                    current_section = None
-                    continue
-                    
-                if ":" in line:
-                    key_part = line.split(":", 1)[0].strip().upper()
-                    value = line.split(":", 1)[1].strip()
-                    print(f"Processando metadado: {key_part} = {value}")
-                    if key_part in data["METADADOS"]:
-                        data["METADADOS"][key_part] = value
-                        print(f"Metadado '{key_part}' definido como: {value}")
-                    else:
-                        print(f"AVISO: Chave de metadado desconhecida: {key_part}")
-                continue
-                        
-            if ":" in line and current_section != "METADADOS":
-                key_part = line.split(":", 1)[0].strip().upper()
-                if key_part in ["NOME", "CARGO", "RESUMO"]:
-                    key = key_part
-                    value = line.split(":", 1)[1].strip()
-                    if value:
-                        data[key] = value
-                    current_section = None
-                    continue
-            
-            if line.endswith(':'):
-                section_name = line[:-1].strip().upper()
-                section_map = {
-                    "EXPERIENCIA": "EXPERIENCIA",
-                    "EXPERIÊNCIA": "EXPERIENCIA",
-                    "EXPERIÊNCIAS": "EXPERIENCIA",
-                    "FORMAÇÃO": "FORMACAO",
-                    "FORMACAO": "FORMACAO",
-                    "FORMAÇÕES": "FORMACAO",
-                    "COMPETENCIA": "COMPETENCIAS",
-                    "COMPETÊNCIA": "COMPETENCIAS",
-                    "COMPETENCIAS": "COMPETENCIAS",
-                    "COMPETÊNCIAS": "COMPETENCIAS",
-                    "HABILIDADES": "COMPETENCIAS",
-                    "CONTATO": "CONTATO",
-                    "CONTATOS": "CONTATO"
-                }
-                current_section = section_map.get(section_name, None)
-                continue
-            
-            if current_section and current_section in data:
-                content = line.lstrip('-•* ').strip()
-                if not content:
-                    continue
-                
-                if current_section == "EXPERIENCIA":
-                    if "|" in content:
-                        data[current_section].append({
-                            "titulo": content.strip(),
-                            "detalhes": []
-                        })
-                    elif data[current_section] and isinstance(data[current_section][-1], dict):
-                        if "detalhes" in data[current_section][-1]:
-                            data[current_section][-1]["detalhes"].append(content)
-                else:
-                    if content not in data[current_section]:
-                        data[current_section].append(content)
-        
-        for exp in data["EXPERIENCIA"]:
-            if isinstance(exp, dict) and "detalhes" not in exp:
-                exp["detalhes"] = []
+    if not pdf_bytes:
+        logger.error("Falha ao gerar o PDF - buffer vazio ou inválido")
+        raise ValueError("Falha ao gerar o PDF")
         
-        for key in ["NOME", "CARGO", "RESUMO"]:
-            if key in data and not data[key]:
-                data[key] = ""
-                
-        for key in ["EXPERIENCIA", "FORMACAO", "COMPETENCIAS", "CONTATO"]:
-            if key in data and isinstance(data[key], list):
-                if key == "EXPERIENCIA":
-                    data[key] = [
-                        exp for exp in data[key] 
-                        if isinstance(exp, dict) and 
-                           (exp.get("titulo") or exp.get("detalhes"))
-                    ]
-                else:
-                    data[key] = [item for item in data[key] if item and str(item).strip()]
-        
-        return data
-        
-    except Exception as e:
-        print(f"ERRO CRÍTICO ao processar resposta da IA: {e}")
-        import traceback
-        traceback.print_exc()
-        print("Estado parcial dos dados:", data)
-        return data
+    logger.debug("PDF gerado com sucesso! Tamanho: %s bytes", len(pdf_bytes))
+    return pdf_bytes
+
+async def _guardar_cache(chave: str, resultado: ResultadoCache) -> None:
+    if config.CACHE_HABILITADO:
+        await asyncio.to_thread(CACHE_RESULTADOS.guardar, chave, resultado)
+
+def _chave_resultado(
+    file_content: bytes, description: str, modo: Optional[str] = None, secoes_paralelas: Optional[int] = None
+) -> str:
+    # O provedor e o orçamento de contexto mudam a resposta, então também separam as entradas do cache.
+    # O template não entra: a mesma resposta da IA serve a qualquer template. Modo e seções em paralelo
+    # são os usados na geração (o stream, por exemplo, sempre gera em texto numa chamada única)
+    modo = config.LLM_MODO if modo is None else modo
+    secoes_paralelas = config.LLM_SECOES_PARALELAS if secoes_paralelas is None else secoes_paralelas
+    contexto = (
+        f"{config.LLM_PROVEDOR}:{modo}:{secoes_paralelas}:"
+        f"{config.CONTEXTO_MAX_TOKENS}:{config.CONTEXTO_EMBEDDINGS}"
+    )
+    return chave_cache(file_content, description, f"{VERSAO_PROMPT}:{contexto}")
 
-def criar_pdf_estilizado_cv(dados_cv: Dict[str, Any], descricao_vaga: str = "") -> BytesIO:
+async def _obter_cache(chave: str, description: str, template: str, formato: str) -> Optional[ResultadoCache]:
+    if not config.CACHE_HABILITADO:
+        return None
+    with etapa("cache"):
+        em_cache = await asyncio.to_thread(CACHE_RESULTADOS.obter, chave)
+    if em_cache is None or formato == FORMATO_JSON or em_cache.template == template:
+        return em_cache
+    # Guardado em outro template (ou só como JSON): renderiza de novo sem chamar a IA
+    with etapa("parse"):
+        dados_estruturados = interpretar_resposta_ia(em_cache.texto_ia)
+    em_cache = replace(em_cache, pdf=await _renderizar(dados_estruturados, description, template), template=template)
+    await _guardar_cache(chave, em_cache)
+    return em_cache
+
+@cvv_router.get("/cache/stats")
+def cache_stats():
+    return {
+        "habilitado": config.CACHE_HABILITADO,
+        **CACHE_RESULTADOS.estatisticas(),
+        "vagas": CACHE_VAGAS.estatisticas(),
+        "geracoes_em_andamento": GERACOES.em_andamento(),
+    }
+
+@cvv_router.get("/templates")
+def listar_templates():
+    return {
+        "padrao": TEMPLATE_PADRAO,
+        "templates": [{"nome": t.nome, "descricao": t.descricao} for t in TEMPLATES.values()],
+    }
+
+FORMULARIO_CVV = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["pdf_file", "description"],
+                    "properties": {
+                        "pdf_file": {"type": "string", "format": "binary"},
+                        "description": {"type": "string"},
+                        "template": {"type": "string", "enum": list(TEMPLATES), "default": TEMPLATE_PADRAO},
+                        "formato": {"type": "string", "enum": list(FORMATOS), "default": FORMATO_PDF},
+                    },
+                }
+            }
+        },
+    }
+}
+
+def validar_template(nome: Optional[str]) -> str:
     try:
-        print("\n=== DADOS RECEBIDOS PARA GERAÇÃO DO PDF ===")
-        print(f"Tipo dos dados: {type(dados_cv)}")
-        print(f"Chaves disponíveis: {list(dados_cv.keys())}")
-        
-        doc = fitz.open()
-        
-        margem = 40
-        espacamento = 12
-        fonte_normal = "helv"
-        fonte_negrito = "hebo"
-        
-        largura = 595
-        altura = 842
-        
-        cor_titulo = (0.2, 0.4, 0.8)
-        cor_texto = (0.2, 0.2, 0.2)
-        cor_fundo = (0.98, 0.98, 1.0)
-        
-        page = doc.new_page(width=largura, height=altura)
-        
-        def adicionar_texto(x, y, texto, fonte, tamanho, cor, negrito=False):
-            nonlocal page
-            try:
-                if not texto or not str(texto).strip():
-                    return y
-                    
-                max_caracteres = 110
-                linhas = []
-                texto = str(texto).strip()
-                
-                while len(texto) > max_caracteres:
-                    quebra = texto[:max_caracteres].rfind(' ')
-                    if quebra == -1:
-                        quebra = max_caracteres
-                    linhas.append(texto[:quebra].strip())
-                    texto = texto[quebra:].strip()
-                if texto:
-                    linhas.append(texto)
-                
-                for linha in linhas:
-                    if y > altura - margem - tamanho:
-                        page = doc.new_page(width=largura, height=altura)
-                        y = margem
-                    
-                    fonte_atual = fonte_negrito if negrito else fonte
-                    
-                    page.insert_text(
-                        (x, y + tamanho * 0.8),
-                        linha,
-                        fontname=fonte_atual,
-                        fontsize=tamanho,
-                        color=cor
-                    )
-                    y += tamanho * 1.2
-                
-                return y
-                
-            except Exception as e:
-                print(f"Erro ao adicionar texto: {e}")
-                return y + tamanho * 1.2
-        
-        y_pos = margem
-        
-        if dados_cv.get("NOME"):
-            nome = str(dados_cv["NOME"]).upper()
-            print(f"\n--- ADICIONANDO NOME ---")
-            print(f"Conteúdo: {nome}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                nome,
-                fonte_negrito, 24, cor_titulo, True
-            )
-            
-            line_width = 1.5
-            line_length = 500
-            
-            page.draw_line(
-                (margem, y_pos - 5),
-                (margem + line_length, y_pos - 5),
-                color=cor_titulo,
-                width=line_width
-            )
-            y_pos += 15
-        
-        if dados_cv.get("CARGO"):
-            cargo = str(dados_cv["CARGO"])
-            print(f"\n--- ADICIONANDO CARGO ---")
-            print(f"Conteúdo: {cargo}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                cargo,
-                fonte_negrito, 14, (0.3, 0.3, 0.5), True
-            )
-            y_pos += espacamento
-        
-        if dados_cv.get("CONTATO"):
-            contato = dados_cv["CONTATO"]
-            print(f"\n--- ADICIONANDO CONTATO ---")
-            print(f"Tipo do contato: {type(contato)}")
-            
-            if isinstance(contato, list):
-                print(f"Lista de contatos: {contato}")
-                contato = " | ".join([str(c).strip() for c in contato if str(c).strip()])
-            
-            print(f"Texto do contato: {contato}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                str(contato),
-                fonte_normal, 10, cor_texto
-            )
-            y_pos += espacamento
-        
-        page.draw_line(
-            (margem, y_pos),
-            (largura - margem, y_pos),
-            color=(0.8, 0.8, 0.8),
-            width=0.5
+        return obter_template(nome).nome
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+def validar_formato(nome: Optional[str]) -> str:
+    formato = (nome or FORMATO_PDF).strip().lower()
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Formato desconhecido: {nome!r}. Disponíveis: {', '.join(FORMATOS)}"
         )
-        y_pos += espacamento
-        
-        if dados_cv.get("RESUMO"):
-            resumo = str(dados_cv["RESUMO"])
-            print(f"\n--- ADICIONANDO RESUMO PROFISSIONAL ---")
-            print(f"Tamanho do resumo: {len(resumo)} caracteres")
-            print(f"Amostra: {resumo[:100]}..." if len(resumo) > 100 else f"Conteúdo: {resumo}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                "RESUMO PROFISSIONAL",
-                fonte_negrito, 12, cor_titulo, True
-            )
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                resumo,
-                fonte_normal, 10, cor_texto
-            )
-            y_pos += espacamento
-        
-        if dados_cv.get("EXPERIENCIA"):
-            print(f"\n--- ADICIONANDO EXPERIÊNCIA PROFISSIONAL ---")
-            
-            experiencias = dados_cv["EXPERIENCIA"]
-            if not isinstance(experiencias, list):
-                experiencias = [experiencias]
-                
-            print(f"Número de experiências: {len(experiencias)}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                "EXPERIÊNCIA PROFISSIONAL",
-                fonte_negrito, 12, cor_titulo, True
-            )
-            
-            for idx, exp in enumerate(experiencias, 1):
-                if not exp:
-                    print(f"  Experiência {idx}: Dados vazios")
-                    continue
-                    
-                print(f"\n  Experiência {idx}:")
-                print(f"  Tipo: {type(exp)}")
-                print(f"  Conteúdo: {exp}")
-                
-                if isinstance(exp, str):
-                    exp = {"titulo": exp, "detalhes": []}
-                elif not isinstance(exp, dict):
-                    print(f"  Experiência {idx}: Formato não suportado")
-                    continue
-                
-                cabecalho = []
-                if exp.get("titulo"):
-                    cabecalho.append(str(exp["titulo"]).strip())
-                elif exp.get("cargo"):
-                    cabecalho.append(str(exp["cargo"]).strip())
-                    if exp.get("empresa"):
-                        cabecalho.append(str(exp["empresa"]).strip())
-                    if exp.get("periodo"):
-                        cabecalho.append(f"({str(exp['periodo']).strip()})")
-                
-                if cabecalho:
-                    y_pos = adicionar_texto(
-                        margem, y_pos,
-                        " • ".join(cabecalho),
-                        fonte_negrito, 10.5, cor_texto, True
-                    )
-                
-                if exp.get("detalhes") and isinstance(exp["detalhes"], list):
-                    print(f"  Número de detalhes: {len(exp['detalhes'])}")
-                    for detalhe in exp["detalhes"]:
-                        if not detalhe:
-                            continue
-                            
-                        print(f"  Processando detalhe: {detalhe[:100]}...")
-                        
-                        texto = str(detalhe).strip()
-                        linhas = []
-                        while len(texto) > 150:
-                            espaco = texto[:150].rfind(' ')
-                            if espaco == -1:
-                                espaco = 150
-                            linhas.append(texto[:espaco])
-                            texto = texto[espaco:].strip()
-                        if texto:
-                            linhas.append(texto)
-                        
-                        for i, linha in enumerate(linhas):
-                            prefixo = "• " if i == 0 else "  "
-                            y_pos = adicionar_texto(
-                                margem + 20, y_pos,
-                                f"{prefixo}{linha}",
-                                fonte_normal, 10, cor_texto
-                            )
-                            y_pos += 5  
-                        
-                        y_pos += 2  
-                
-                y_pos += 5  
-        
-        if dados_cv.get("FORMACAO"):
-            print(f"\n--- ADICIONANDO FORMAÇÃO ACADÊMICA ---")
-            
-            formacoes = dados_cv["FORMACAO"]
-            if not isinstance(formacoes, list):
-                formacoes = [formacoes]
-                
-            print(f"Número de formações: {len(formacoes)}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                "FORMAÇÃO ACADÊMICA",
-                fonte_negrito, 12, cor_titulo, True
-            )
-            
-            for idx, form in enumerate(formacoes, 1):
-                if not form:
-                    print(f"  Formação {idx}: Dados vazios")
-                    continue
-                    
-                print(f"\n  Formação {idx}:")
-                print(f"  Tipo: {type(form)}")
-                print(f"  Conteúdo: {form}")
-                
-                if isinstance(form, str):
-                    y_pos = adicionar_texto(
-                        margem, y_pos,
-                        f"• {form}",
-                        fonte_normal, 10, cor_texto
-                    )
-                    y_pos += 3
-                    continue
-                elif isinstance(form, dict):
-                    linha = []
-                    if form.get("curso"):
-                        linha.append(str(form["curso"]).strip())
-                    if form.get("instituicao"):
-                        linha.append(str(form["instituicao"]).strip())
-                    if form.get("periodo"):
-                        linha.append(f"({str(form['periodo']).strip()})")
-                    
-                    if linha:
-                        y_pos = adicionar_texto(
-                            margem, y_pos,
-                            f"• {' • '.join(linha)}",
-                            fonte_normal, 10, cor_texto
-                        )
-                        
-                        if form.get("descricao"):
-                            y_pos = adicionar_texto(
-                                margem + 10, y_pos,
-                                str(form["descricao"]).strip(),
-                                fonte_normal, 9, (0.4, 0.4, 0.4)
-                            )
-                        
-                        y_pos += 3
-                else:
-                    print(f"  Formação {idx}: Formato não suportado")
-                
-                linha = []
-                if form.get("curso"):
-                    linha.append(str(form["curso"]).strip())
-                if form.get("instituicao"):
-                    linha.append(str(form["instituicao"]).strip())
-                if form.get("periodo"):
-                    linha.append(f"({str(form['periodo']).strip()})")
-                
-                if linha:
-                    y_pos = adicionar_texto(
-                        margem, y_pos,
-                        " • ".join(linha),
-                        fonte_normal, 10, cor_texto
-                    )
-                
-                if form.get("descricao"):
-                    y_pos = adicionar_texto(
-                        margem + 10, y_pos,
-                        str(form["descricao"]).strip(),
-                        fonte_normal, 9, (0.4, 0.4, 0.4)
-                    )
-                
-                y_pos += 3
-        
-        if dados_cv.get("COMPETENCIAS"):
-            print(f"\n--- ADICIONANDO HABILIDADES ---")
-            
-            competencias = dados_cv["COMPETENCIAS"]
-            print(f"Tipo das competências: {type(competencias)}")
-            
-            if isinstance(competencias, str):
-                print(f"Competências como string: {competencias}")
-                competencias = [competencias]
-            elif isinstance(competencias, list):
-                print(f"Número de competências: {len(competencias)}")
-                print(f"Competências: {competencias}")
-            
-            y_pos = adicionar_texto(
-                margem, y_pos,
-                "HABILIDADES",
-                fonte_negrito, 12, cor_titulo, True
-            )
-            
-            linha_atual = []
-            linha_comprimento = 0
-            
-            for competencia in competencias:
-                competencia = str(competencia).strip()
-                if not competencia:
-                    continue
-                
-                competencia = f"• {competencia}"
-                
-                if linha_atual and linha_comprimento + len(competencia) > 60:
-                    y_pos = adicionar_texto(
-                        margem, y_pos,
-                        "  ".join(linha_atual),
-                        fonte_normal, 10, cor_texto
-                    )
-                    linha_atual = []
-                    linha_comprimento = 0
-                
-                linha_atual.append(competencia)
-                linha_comprimento += len(competencia) + 2  
-            
-            if linha_atual:
-                y_pos = adicionar_texto(
-                    margem, y_pos,
-                    "  ".join(linha_atual),
-                    fonte_normal, 10, cor_texto
-                )
-            
-            y_pos += espacamento
-        
-        print("\n=== GERANDO PDF FINAL ===")
-        metadata = doc.metadata
-        
-        if dados_cv.get("METADADOS"):
-            metadados = dados_cv["METADADOS"]
-            print(f"\n=== METADADOS EXTRAÍDOS ===")
-            print(f"Título: {metadados.get('TITULO')}")
-            print(f"Autor: {metadados.get('AUTOR')}")
-            print(f"Descrição: {metadados.get('DESCRICAO')}")
-            print(f"Palavras-chave: {metadados.get('PALAVRAS_CHAVE')}")
-            
-            if metadados.get("TITULO"):
-                metadata["title"] = str(metadados["TITULO"])
-                print(f"Definindo título do PDF: {metadata['title']}")
-            elif dados_cv.get("CARGO"):
-                metadata["title"] = str(dados_cv["CARGO"])
-                print(f"Usando cargo como título do PDF: {metadata['title']}")
-            
-            if metadados.get("AUTOR"):
-                metadata["author"] = str(metadados["AUTOR"])
-                print(f"Definindo autor do PDF: {metadata['author']}")
-            elif dados_cv.get("NOME"):
-                metadata["author"] = str(dados_cv["NOME"])
-                print(f"Usando nome como autor do PDF: {metadata['author']}")
-            
-            if metadados.get("DESCRICAO"):
-                descricao = str(metadados["DESCRICAO"])
-                frases = [f.strip() for f in descricao.split('.') if f.strip()]
-                
-                if len(frases) >= 2:
-                    linha1 = frases[0][:200]
-                    linha2 = frases[1][:200] if len(frases) > 1 else linha1
-                else:
-                    meio = len(descricao) // 2
-                    linha1 = descricao[:meio].strip()
-                    linha2 = descricao[meio:].strip()
-                
-                metadata["subject"] = f"{linha1}\n{linha2}"
-                print(f"Assunto formatado (2 linhas):\n{metadata['subject']}")
-                
-            elif dados_cv.get("RESUMO"):
-                resumo = str(dados_cv["RESUMO"])
-                meio = len(resumo) // 2
-                linha1 = resumo[:meio].strip()
-                linha2 = resumo[meio:].strip()
-                metadata["subject"] = f"{linha1}\n{linha2}"
-                print(f"Usando resumo como assunto (2 linhas):\n{metadata['subject']}")
-            
-            if metadados.get("PALAVRAS_CHAVE"):
-                palavras_chave = metadados['PALAVRAS_CHAVE']
-                if isinstance(palavras_chave, str):
-                    palavras = [p.strip() for p in palavras_chave.split(',') if p.strip()]
-                else:
-                    palavras = [str(p).strip() for p in palavras_chave]
-                
-                palavras = [p for p in palavras if len(p) > 3][:10]  # Limita a 10 palavras-chave
-                
-                if palavras:
-                    metadata["keywords"] = ", ".join(["currículo"] + palavras)
-                    print(f"Palavras-chave extraídas: {metadata['keywords']}")
-                
-            elif dados_cv.get("RESUMO"):
-                resumo = str(dados_cv["RESUMO"])
-                palavras = [p for p in re.findall(r'\b\w{4,}\b', resumo.lower()) 
-                          if p not in ['sobre', 'para', 'como', 'mais', 'muito', 'sobre', 'sobre', 'sobre']][:10]
-                if palavras:
-                    metadata["keywords"] = ", ".join(["currículo"] + palavras)
-                    print(f"Palavras-chave extraídas do resumo: {metadata['keywords']}")
-            
-            print("=== FIM DOS METADADOS EXTRAÍDOS ===\n")
-        
-        doc.set_metadata(metadata)
-        
-        pdf_buffer = BytesIO()
-        doc.save(pdf_buffer)
-        pdf_buffer.seek(0)
-        
-        print(f"Tamanho do PDF gerado: {len(pdf_buffer.getvalue())} bytes")
-        print(f"Metadados do PDF: {metadata}")
-        return pdf_buffer
-        
-    except Exception as e:
-        print(f"Erro ao gerar PDF: {e}")
-        raise ValueError(f"Erro ao processar o currículo: {str(e)}")
-        
-    finally:
-        try:
-            doc.close()
-        except:
-            pass
-
-@cvv_router.post("/create-cvv", status_code=status.HTTP_200_OK)
-async def create_cvv(
-    pdf_file: UploadFile = File(...),
-    description: str = Form(...)
-):
-    print("\n=== INÍCIO DO PROCESSAMENTO DO CV ===")
-    print(f"Arquivo recebido: {pdf_file.filename}")
-    print(f"Descrição da vaga: {description}")
-    if not pdf_file or not pdf_file.filename:
+    return formato
+
+async def ler_formulario_cvv(request: Request) -> Tuple[bytes, str, str, str]:
+    with etapa("upload"):
+        upload = await ler_upload_pdf(request)
+    description = upload.campos.get("description", "")
+    logger.debug("Arquivo recebido: %s", upload.nome_arquivo)
+    logger.debug("Descrição da vaga: %s", description)
+    if not description.strip():
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Nenhum arquivo foi enviado"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="O campo 'description' é obrigatório"
         )
-        
-    if not pdf_file.filename.lower().endswith(".pdf"):
+    template = validar_template(upload.campos.get("template"))
+    formato = validar_formato(upload.campos.get("formato"))
+    return upload.conteudo, description, template, formato
+
+async def _gerar_resposta_ia(file_content: bytes, description: str, semaforo: Optional[asyncio.Semaphore]) -> str:
+    logger.debug("Extraindo conteúdo do PDF...")
+    with etapa("extracao"):
+        pdf_docs = await executar_cpu(extrair_documentos_memoria, file_content)
+    with etapa("contexto"):
+        pdf_docs = await executar_cpu(reduzir_contexto, pdf_docs, description)
+
+    # Em lotes, o semáforo limita só a IA e a renderização; a extração roda em paralelo
+    async with semaforo or contextlib.nullcontext():
+        logger.debug("Chamando a IA...")
+        try:
+            with etapa("llm"):
+                return str(await executar_llm_async(gerar_conteudo_llm_async(pdf_docs, description)))
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="A IA demorou demais para responder. Tente novamente."
+            )
+        except CapacidadeEsgotada as e:
+            raise http_capacidade_esgotada(e)
+
+async def gerar_curriculo(
+    file_content: bytes,
+    description: str,
+    semaforo: Optional[asyncio.Semaphore] = None,
+    template: str = TEMPLATE_PADRAO,
+    formato: str = FORMATO_PDF,
+) -> Tuple[ResultadoCache, bool]:
+    chave = _chave_resultado(file_content, description)
+    try:
+        em_cache = await _obter_cache(chave, description, template, formato)
+        if em_cache is not None:
+            logger.info("Resultado encontrado no cache")
+            return em_cache, True
+
+        # Envios duplicados (duplo clique, retentativa do frontend) ainda não estão no cache:
+        # aguardam a geração em andamento em vez de chamar a IA de novo
+        gerar = functools.partial(_gerar_resposta_ia, file_content, description, semaforo)
+        if config.COALESCENCIA_HABILITADA:
+            conteudo_bruto_ia, _ = await GERACOES.executar(chave, gerar)
+        else:
+            conteudo_bruto_ia = await gerar()
+        dados_estruturados = _interpretar_ia(conteudo_bruto_ia)
+        # No formato JSON a renderização fica para /cvv/render, sob demanda; cada pedido coalescido
+        # renderiza no próprio template
+        pdf_bytes = b""
+        if formato == FORMATO_PDF:
+            async with semaforo or contextlib.nullcontext():
+                pdf_bytes = await _renderizar(dados_estruturados, description, template)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning("Erro ao processar o currículo: %s", e)
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="O arquivo deve ser um PDF"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Erro ao processar o currículo: {str(e)}"
         )
-    
+
+    resultado = ResultadoCache(
+        texto_ia=conteudo_bruto_ia,
+        pdf=pdf_bytes,
+        nome_arquivo=_nome_arquivo(dados_estruturados),
+        template=template if pdf_bytes else "",
+        descricao=description,
+        chave=chave if config.CACHE_HABILITADO else "",
+    )
+    await _guardar_cache(chave, resultado)
+    return resultado, False
+
+@cvv_router.post("/create-cvv", status_code=status.HTTP_200_OK, openapi_extra=FORMULARIO_CVV)
+async def create_cvv(request: Request):
+    logger.debug("=== INÍCIO DO PROCESSAMENTO DO CV ===")
+    verificar_cota(request)
+    async with limitar_requisicoes():
+        file_content, description, template, formato = await ler_formulario_cvv(request)
+        return await _processar_cvv(request, file_content, description, template, formato)
+
+async def _processar_cvv(
+    request: Request, file_content: bytes, description: str, template: str, formato: str = FORMATO_PDF
+):
     try:
+        job = await enfileirar_job(file_content, description, template=template, formato=formato)
         try:
-            print("\nLendo conteúdo do arquivo PDF...")
-            file_content = await pdf_file.read()
-            if not file_content:
-                print("ERRO: O arquivo PDF está vazio")
-                raise ValueError("O arquivo PDF está vazio")
-        except Exception as e:
-            raise ValueError(f"Erro ao ler o arquivo: {str(e)}")
-        
-        if len(file_content) > 10 * 1024 * 1024:  
-            raise ValueError("O arquivo é muito grande. O tamanho máximo permitido é 10MB.")
-        
-        try:
-            print("\nChamando gerar_conteudo_otimizado...")
-            conteudo_bruto_ia = gerar_conteudo_otimizado(file_content, description)
-            if not conteudo_bruto_ia or not str(conteudo_bruto_ia).strip():
-                print("ERRO: Não foi possível processar o conteúdo do currículo - retorno vazio da IA")
-                raise ValueError("Não foi possível processar o conteúdo do currículo")
-            
-            print("\nConteúdo bruto da IA (primeiros 500 caracteres):")
-            print(str(conteudo_bruto_ia)[:500] + ("..." if len(str(conteudo_bruto_ia)) > 500 else ""))
-                
-            print("\nIniciando análise da resposta da IA...")
-            dados_estruturados = parse_resposta_ia(conteudo_bruto_ia)
-            
-            if not dados_estruturados or not isinstance(dados_estruturados, dict):
-                print("ERRO: Falha ao processar a estrutura do currículo - dados_estruturados inválido")
-                print(f"Tipo de dados_estruturados: {type(dados_estruturados)}")
-                print(f"Conteúdo: {dados_estruturados}")
-                raise ValueError("Falha ao processar a estrutura do currículo")
-                
-            print("\nDados estruturados processados com sucesso")
-                
-            print("\nCriando PDF estilizado...")
-            print(f"Dados sendo passados para criar_pdf_estilizado_cv: {list(dados_estruturados.keys())}")
-            print(f"Metadados disponíveis: {dados_estruturados.get('METADADOS', 'Nenhum metadado encontrado')}")
-            
-            pdf_buffer = criar_pdf_estilizado_cv(dados_estruturados, description)
-            
-            if not pdf_buffer or pdf_buffer.getbuffer().nbytes == 0:
-                print("ERRO: Falha ao gerar o PDF - buffer vazio ou inválido")
-                raise ValueError("Falha ao gerar o PDF")
-                
-            print(f"PDF gerado com sucesso! Tamanho: {pdf_buffer.getbuffer().nbytes} bytes")
-                
-        except Exception as e:
-            print(f"Erro ao processar o currículo: {e}")
+            job = await aguardar_job(job.id, request)
+        except ClienteDesconectado as e:
+            logger.info("Processamento cancelado: %s", e)
+            await cancelar_job(job.id)
+            raise HTTPException(status_code=499, detail=str(e))
+        except asyncio.TimeoutError:
+            await cancelar_job(job.id)
             raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Erro ao processar o currículo: {str(e)}"
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="O processamento demorou demais. Tente novamente."
             )
 
-        nome_candidato = dados_estruturados.get("NOME", "Curriculo").strip()
-        
-        nome_arquivo = f"{nome_candidato}-Curriculo.pdf"
-        nome_arquivo = "".join(c if c.isalnum() or c in ('-', '_', '.', ' ') else '_' for c in nome_arquivo)
-        nome_arquivo = nome_arquivo.replace(" ", "_")
-        if not nome_arquivo.lower().endswith('.pdf'):
-            nome_arquivo += '.pdf'
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=\"{nome_arquivo}\"",
-                "Content-Length": str(pdf_buffer.getbuffer().nbytes)
-            }
-        )
+        if job is None or job.status == CANCELADO:
+            raise HTTPException(status_code=499, detail="O processamento foi cancelado")
+        await remover_job(job.id)
+        if job.status == ERRO:
+            # O job não guarda cabeçalhos; 503 (capacidade da IA esgotada) volta com o Retry-After padrão
+            cabecalhos = {"Retry-After": str(config.RETRY_AFTER_SEGUNDOS)} if job.erro_status == 503 else None
+            raise HTTPException(status_code=job.erro_status, detail=job.erro, headers=cabecalhos)
+
+        return resposta_resultado(job.resultado, formato, "HIT" if job.cache_hit else "MISS", request)
 
     except HTTPException:
         raise
         
     except ValueError as ve:
-        print(f"Erro de validação em /create-cvv: {ve}")
+        logger.warning("Erro de validação em /create-cvv: %s", ve)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(ve)
         )
         
     except Exception as e:
-        print(f"Erro inesperado em /create-cvv: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro inesperado em /create-cvv: %s", e)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ocorreu um erro inesperado ao processar sua solicitação. Por favor, tente novamente mais tarde."
         )
 
+
+class PedidoRender(BaseModel):
+    # "id" vem da resposta do formato JSON e vale enquanto o resultado estiver no cache;
+    # "curriculo" é o próprio JSON, possivelmente editado
+    id: Optional[str] = None
+    curriculo: Optional[Dict[str, Any]] = None
+    template: Optional[str] = None
+    description: Optional[str] = None
+
+
+@cvv_router.post("/render", status_code=status.HTTP_200_OK)
+async def render_cvv(request: Request, pedido: PedidoRender):
+    verificar_cota(request)
+    template = validar_template(pedido.template)
+    status_cache = "BYPASS"
+    if pedido.curriculo is not None:
+        try:
+            dados_estruturados = CurriculoEnviado.model_validate(pedido.curriculo).para_dados()
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors(include_url=False, include_context=False))
+        description = pedido.description or ""
+    elif pedido.id:
+        em_cache = None
+        if config.CACHE_HABILITADO:
+            em_cache = await asyncio.to_thread(CACHE_RESULTADOS.obter, pedido.id)
+        if em_cache is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Currículo não encontrado ou expirado. Envie o campo 'curriculo'."
+            )
+        description = em_cache.descricao if pedido.description is None else pedido.description
+        status_cache = "HIT"
+        if em_cache.template == template and description == em_cache.descricao:
+            return resposta_pdf(em_cache.pdf, em_cache.nome_arquivo, status_cache, request)
+        dados_estruturados = interpretar_resposta_ia(em_cache.texto_ia)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Informe 'id' ou 'curriculo'"
+        )
+
+    async with limitar_requisicoes():
+        try:
+            pdf_bytes = await _renderizar(dados_estruturados, description, template)
+        except Exception as e:
+            logger.warning("Erro ao renderizar o currículo: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Erro ao renderizar o currículo: {str(e)}"
+            )
+    return resposta_pdf(pdf_bytes, _nome_arquivo(dados_estruturados), status_cache, request)
+
+
+# ETag, Range e If-None-Match só valem em GET/HEAD: o PDF já gerado é baixado de novo pelo "id"
+# da resposta JSON (ou pelo Content-Location da resposta em PDF), sem reenviar o currículo
+@cvv_router.api_route("/resultados/{resultado_id}", methods=["GET", "HEAD"])
+async def baixar_resultado(request: Request, resultado_id: str, template: Optional[str] = None):
+    em_cache = None
+    if config.CACHE_HABILITADO:
+        em_cache = await asyncio.to_thread(CACHE_RESULTADOS.obter, resultado_id)
+    if em_cache is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resultado não encontrado ou expirado"
+        )
+    template = validar_template(template or em_cache.template or None)
+    if not em_cache.pdf or em_cache.template != template:
+        async with limitar_requisicoes():
+            em_cache = await _obter_cache(resultado_id, em_cache.descricao, template, FORMATO_PDF)
+        if em_cache is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Resultado não encontrado ou expirado"
+            )
+    return resposta_pdf(em_cache.pdf, em_cache.nome_arquivo, "HIT", request)
+
+
+@cvv_router.post("/create-cvv/stream", status_code=status.HTTP_200_OK, openapi_extra=FORMULARIO_CVV)
+async def create_cvv_stream(request: Request):
+    verificar_cota(request)
+    async with limitar_requisicoes():
+        file_content, description, template, formato = await ler_formulario_cvv(request)
+    return StreamingResponse(
+        _transmitir_cvv(file_content, description, template, formato),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _eventos_pdf(pdf_bytes: bytes, nome_arquivo: str) -> List[str]:
+    if not pdf_bytes:
+        # Formato JSON: as seções já foram enviadas, não há PDF
+        return [evento_sse("fim", {})]
+    return [
+        evento_sse("pdf", {
+            "nome_arquivo": nome_arquivo,
+            "tamanho": len(pdf_bytes),
+            "pdf_base64": base64.b64encode(pdf_bytes).decode("ascii"),
+        }),
+        evento_sse("fim", {}),
+    ]
+
+def _eventos_parser(eventos) -> List[str]:
+    return [
+        evento_sse("secao", {"secao": nome, "conteudo": conteudo}) if tipo == "secao"
+        else evento_sse("experiencia", conteudo)
+        for tipo, nome, conteudo in eventos
+    ]
+
+async def _transmitir_cvv(
+    file_content: bytes, description: str, template: str = TEMPLATE_PADRAO, formato: str = FORMATO_PDF
+):
+    yield evento_sse("inicio", {})
+    try:
+        async with limitar_requisicoes():
+            # Serve o resultado das configurações atuais ou um stream anterior; a geração abaixo
+            # é sempre em texto e numa chamada só, e fica guardada sob a chave dessas configurações
+            chave = _chave_resultado(file_content, description, MODO_STREAM, 0)
+            chave_configurada = _chave_resultado(file_content, description)
+            em_cache = await _obter_cache(chave_configurada, description, template, formato)
+            if em_cache is None and chave != chave_configurada:
+                em_cache = await _obter_cache(chave, description, template, formato)
+            if em_cache is not None:
+                dados = interpretar_resposta_ia(em_cache.texto_ia)
+                for secao in ("METADADOS", "NOME", "CARGO", "RESUMO", "EXPERIENCIA", "COMPETENCIAS", "FORMACAO", "CONTATO"):
+                    if dados.get(secao):
+                        yield evento_sse("secao", {"secao": secao, "conteudo": dados[secao]})
+                pdf_cache = em_cache.pdf if formato == FORMATO_PDF else b""
+                for evento in _eventos_pdf(pdf_cache, em_cache.nome_arquivo):
+                    yield evento
+                return
+
+            with etapa("extracao"):
+                pdf_docs = await executar_cpu(extrair_documentos_memoria, file_content)
+            with etapa("contexto"):
+                pdf_docs = await executar_cpu(reduzir_contexto, pdf_docs, description)
+
+            parser = ParserIncremental()
+            trechos = []
+            cadeias = await CADEIAS_LLM.obter_async()
+            fluxo = cadeias.documento.astream(entrada_llm(pdf_docs, description))
+            with etapa("llm"):
+                async for trecho in transmitir_llm_async(fluxo):
+                    trechos.append(trecho)
+                    for evento in _eventos_parser(parser.alimentar(trecho)):
+                        yield evento
+            for evento in _eventos_parser(parser.finalizar()):
+                yield evento
+
+            conteudo_bruto_ia = "".join(trechos)
+            dados_estruturados = _interpretar_ia(conteudo_bruto_ia)
+            pdf_bytes = b""
+            if formato == FORMATO_PDF:
+                pdf_bytes = await _renderizar(dados_estruturados, description, template)
+            nome_arquivo = _nome_arquivo(dados_estruturados)
+            await _guardar_cache(
+                chave,
+                ResultadoCache(
+                    texto_ia=conteudo_bruto_ia,
+                    pdf=pdf_bytes,
+                    nome_arquivo=nome_arquivo,
+                    template=template if pdf_bytes else "",
+                    descricao=description,
+                    chave=chave if config.CACHE_HABILITADO else "",
+                ),
+            )
+            for evento in _eventos_pdf(pdf_bytes, nome_arquivo):
+                yield evento
+
+    except asyncio.TimeoutError:
+        yield evento_sse("erro", {
+            "status": status.HTTP_504_GATEWAY_TIMEOUT,
+            "detail": "A IA demorou demais para responder. Tente novamente."
+        })
+    except CapacidadeEsgotada as e:
+        yield evento_sse("erro", {
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "detail": str(e),
+            "retry_after": http_capacidade_esgotada(e).headers["Retry-After"],
+        })
+    except HTTPException as e:
+        yield evento_sse("erro", {"status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.warning("Erro ao processar o currículo em /create-cvv/stream: %s", e)
+        yield evento_sse("erro", {
+            "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "detail": f"Erro ao processar o currículo: {str(e)}"
+        })
@@ -0,0 +1,68 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+
+from routes.cvv_route import FORMULARIO_CVV, ler_formulario_cvv, resposta_resultado
+from services.admissao import verificar_cota
+from services.executor import limitar_requisicoes
+from services.jobs import CONCLUIDO, ERRO, STATUS_FINAIS, Job, cancelar_job, enfileirar_job, obter_job
+
+jobs_router = APIRouter(prefix="/cvv/jobs", tags=["jobs"])
+
+
+def _com_links(job: Job):
+    return {
+        **job.resumo(),
+        "links": {
+            "status": f"{jobs_router.prefix}/{job.id}",
+            "resultado": f"{jobs_router.prefix}/{job.id}/resultado",
+        },
+    }
+
+
+async def _obter_ou_404(job_id: str, com_resultado: bool = False) -> Job:
+    job = await obter_job(job_id, com_resultado)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado ou expirado"
+        )
+    return job
+
+
+@jobs_router.post("", status_code=status.HTTP_202_ACCEPTED, openapi_extra=FORMULARIO_CVV)
+async def criar_job(request: Request, idempotency_key: Optional[str] = Header(None)):
+    verificar_cota(request)
+    async with limitar_requisicoes():
+        file_content, description, template, formato = await ler_formulario_cvv(request)
+    job = await enfileirar_job(file_content, description, idempotency_key, template, formato=formato)
+    return _com_links(job)
+
+
+@jobs_router.get("/{job_id}")
+async def status_job(job_id: str):
+    return _com_links(await _obter_ou_404(job_id))
+
+
+@jobs_router.get("/{job_id}/resultado")
+async def resultado_job(request: Request, job_id: str):
+    job = await _obter_ou_404(job_id, com_resultado=True)
+    if job.status == ERRO:
+        raise HTTPException(status_code=job.erro_status, detail=job.erro)
+    if job.status != CONCLUIDO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"O job ainda não foi concluído (status: {job.status})"
+        )
+    return resposta_resultado(job.resultado, job.formato, "HIT" if job.cache_hit else "MISS", request)
+
+
+@jobs_router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancelar(job_id: str):
+    job = await _obter_ou_404(job_id)
+    if job.status in STATUS_FINAIS or not await cancelar_job(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"O job não pode ser cancelado (status: {job.status})"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import zipfile
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from routes.cvv_route import gerar_curriculo, validar_template
+from services import config
+from services.admissao import verificar_cota
+from services.executor import limitar_requisicoes
+from services.observabilidade import etapa
+from services.templates import TEMPLATE_PADRAO, TEMPLATES
+from services.upload import ItemLote, ler_upload_lote
+
+lote_router = APIRouter(prefix="/cvv", tags=["cvv"])
+logger = logging.getLogger(__name__)
+
+FORMULARIO_LOTE = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["description"],
+                    "properties": {
+                        "pdf_files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        },
+                        "arquivo_zip": {"type": "string", "format": "binary"},
+                        "description": {"type": "string"},
+                        "template": {"type": "string", "enum": list(TEMPLATES), "default": TEMPLATE_PADRAO},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+class _SaidaZip:
+    # Destino sem seek: o zipfile passa a gravar os tamanhos em data descriptors
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def write(self, dados: bytes) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+async def _processar_item(
+    indice: int, item: ItemLote, description: str, template: str, semaforo: asyncio.Semaphore
+):
+    registro: Dict[str, Any] = {"indice": indice, "arquivo": item.nome_arquivo}
+    if item.erro:
+        return registro, None, {"status": status.HTTP_400_BAD_REQUEST, "detail": item.erro}
+    try:
+        resultado, cache_hit = await gerar_curriculo(item.conteudo, description, semaforo, template)
+    except HTTPException as e:
+        return registro, None, {"status": e.status_code, "detail": e.detail}
+    except Exception as e:
+        logger.exception("Erro ao processar o item %s do lote: %s", indice, e)
+        return registro, None, {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "detail": f"Erro ao processar o currículo: {str(e)}",
+        }
+    registro["cache"] = "HIT" if cache_hit else "MISS"
+    return registro, resultado, None
+
+
+async def _transmitir_lote(itens: List[ItemLote], description: str, template: str):
+    async with limitar_requisicoes():
+        semaforo = asyncio.Semaphore(config.LOTE_MAX_CONCORRENCIA)
+        tarefas = [
+            asyncio.create_task(_processar_item(indice, item, description, template, semaforo))
+            for indice, item in enumerate(itens, 1)
+        ]
+        saida = _SaidaZip()
+        relatorio = []
+        try:
+            with zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_STORED) as pacote:
+                # Cada PDF entra no zip assim que fica pronto, na ordem de conclusão
+                for concluida in asyncio.as_completed(tarefas):
+                    registro, resultado, erro = await concluida
+                    if resultado is not None:
+                        registro["status"] = "ok"
+                        registro["pdf"] = f"{registro['indice']:03d}-{resultado.nome_arquivo}"
+                        pacote.writestr(registro["pdf"], resultado.pdf)
+                        yield saida.drenar()
+                    else:
+                        registro["status"] = "erro"
+                        registro["erro"] = erro
+                    relatorio.append(registro)
+
+                relatorio.sort(key=lambda registro: registro["indice"])
+                pacote.writestr("relatorio.json", json.dumps({
+                    "total": len(itens),
+                    "sucesso": sum(1 for registro in relatorio if registro["status"] == "ok"),
+                    "erros": sum(1 for registro in relatorio if registro["status"] == "erro"),
+                    "itens": relatorio,
+                }, ensure_ascii=False, indent=2))
+            yield saida.drenar()
+        finally:
+            # Cliente desconectado: os itens restantes só liberam o executor e a fila quando o
+            # cancelamento termina de fato, antes de devolver a vaga de limitar_requisicoes
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+@lote_router.post("/create-cvv/lote", status_code=status.HTTP_200_OK, openapi_extra=FORMULARIO_LOTE)
+async def create_cvv_lote(request: Request):
+    # Uma unidade da cota é cobrada antes de ler o corpo (até LOTE_MAX_BYTES); o restante, por item, depois
+    verificar_cota(request)
+    async with limitar_requisicoes():
+        with etapa("upload"):
+            upload = await ler_upload_lote(request)
+    description = upload.campos.get("description", "").strip()
+    if not description:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="O campo 'description' é obrigatório"
+        )
+    template = validar_template(upload.campos.get("template"))
+    # Cada currículo do lote conta como uma solicitação na cota do cliente
+    if len(upload.itens) > 1:
+        verificar_cota(request, len(upload.itens) - 1)
+    logger.info("Lote recebido: %s arquivo(s)", len(upload.itens))
+
+    return StreamingResponse(
+        _transmitir_lote(upload.itens, description, template),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=\"curriculos.zip\""},
+    )
@@ -0,0 +1,301 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+
+from services import config
+from services.observabilidade import ESPERA_FILA_LLM, FILA_LLM, REJEICOES_ADMISSAO
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+# Cliente dono da requisição; os jobs restauram o valor gravado ao enfileirar
+CLIENTE: contextvars.ContextVar[str] = contextvars.ContextVar("cliente", default="-")
+_CLIENTE_VALIDO = re.compile(r"^[A-Za-z0-9._:@-]{1,64}$")
+_MAX_CLIENTES = 10000
+
+# Erros do provedor que indicam limite de uso ou indisponibilidade momentânea
+_STATUS_LIMITE = (429, 503)
+_ERROS_LIMITE = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "RateLimitError", "LimiteProvedor"}
+
+
+class CapacidadeEsgotada(Exception):
+    def __init__(self, mensagem: str, retry_after: float):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+def http_capacidade_esgotada(e: CapacidadeEsgotada) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+class BaldeTokens:
+    def __init__(self, por_segundo: float, capacidade: float):
+        self.por_segundo = por_segundo
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+
+    def _repor(self, agora: float) -> None:
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.por_segundo)
+        self.atualizado = agora
+
+    def consumir(self, custo: float = 1.0) -> float:
+        # 0 quando consumiu; senão, os segundos até haver tokens suficientes (nada é consumido)
+        self._repor(time.monotonic())
+        if self.tokens >= custo:
+            self.tokens -= custo
+            return 0.0
+        if custo > self.capacidade:
+            return math.inf
+        return (custo - self.tokens) / self.por_segundo
+
+    def cheio(self) -> bool:
+        self._repor(time.monotonic())
+        return self.tokens >= self.capacidade
+
+
+def _balde_por_minuto(por_minuto: float, rajada: int) -> Optional[BaldeTokens]:
+    if por_minuto <= 0:
+        return None
+    return BaldeTokens(por_minuto / 60, max(1, rajada))
+
+
+@lru_cache(maxsize=8)
+def _ler_pesos(texto: str) -> Dict[str, float]:
+    pesos = {}
+    for item in texto.split(","):
+        if "=" not in item:
+            continue
+        cliente, valor = item.split("=", 1)
+        try:
+            peso = float(valor)
+        except ValueError:
+            raise ValueError(f"Peso inválido em ADMISSAO_PESOS: {item.strip()!r}")
+        if peso > 0:
+            pesos[cliente.strip()] = peso
+    return pesos
+
+
+def peso_cliente(cliente: str) -> float:
+    return _ler_pesos(config.ADMISSAO_PESOS).get(cliente, 1.0)
+
+
+class CotasClientes:
+    # Um balde por cliente, com a taxa multiplicada pelo peso; baldes cheios são descartados
+    # quando o mapa cresce, já que um balde novo começa cheio do mesmo jeito
+    def __init__(self):
+        self._baldes: Dict[str, BaldeTokens] = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, cliente: str, custo: float) -> float:
+        if config.ADMISSAO_CLIENTE_POR_MINUTO <= 0:
+            return 0.0
+        with self._lock:
+            balde = self._baldes.get(cliente)
+            if balde is None:
+                if len(self._baldes) >= _MAX_CLIENTES:
+                    self._baldes = {c: b for c, b in self._baldes.items() if not b.cheio()}
+                peso = peso_cliente(cliente)
+                balde = self._baldes[cliente] = BaldeTokens(
+                    config.ADMISSAO_CLIENTE_POR_MINUTO * peso / 60, max(1, config.ADMISSAO_CLIENTE_RAJADA * peso)
+                )
+            return balde.consumir(custo)
+
+
+COTAS = CotasClientes()
+
+
+def identificar_cliente(request: Request) -> str:
+    cliente = ""
+    if config.ADMISSAO_CONFIAR_CABECALHO:
+        cliente = request.headers.get(config.ADMISSAO_CABECALHO_CLIENTE, "").strip()
+    if not _CLIENTE_VALIDO.match(cliente):
+        cliente = request.client.host if request.client else "anonimo"
+    CLIENTE.set(cliente)
+    return cliente
+
+
+def verificar_cota(request: Request, custo: int = 1) -> str:
+    cliente = identificar_cliente(request)
+    espera = COTAS.consumir(cliente, custo)
+    if espera > 0:
+        REJEICOES_ADMISSAO.labels("cota_cliente").inc()
+        logger.info("Cota do cliente %s esgotada (custo %s)", cliente, custo)
+        detalhe = "Limite de solicitações atingido para este cliente. Tente novamente em instantes."
+        if math.isinf(espera):
+            detalhe = f"O pedido ({custo} currículos) excede a cota deste cliente."
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detalhe,
+            headers={"Retry-After": str(max(1, math.ceil(min(espera, 3600))))},
+        )
+    return cliente
+
+
+@dataclass(order=True)
+class _Pedido:
+    etiqueta: float
+    ordem: int
+    inicio: float = field(compare=False)
+    futuro: asyncio.Future = field(compare=False)
+
+
+class FilaJusta:
+    # Fila justa ponderada na frente da IA (start-time fair queueing): cada chamada recebe a
+    # etiqueta max(tempo virtual, fim da última do cliente) + 1/peso e sai a de menor etiqueta.
+    # Um cliente com muitas chamadas pendentes não atrasa quem tem poucas.
+    # Só sai da fila quem tem vaga de concorrência e token no balde global
+    def __init__(self, capacidade: int, balde_global: Optional[BaldeTokens]):
+        self.capacidade = capacidade
+        self.balde_global = balde_global
+        self._heap: List[_Pedido] = []
+        self._ordem = itertools.count()
+        self._tempo_virtual = 0.0
+        self._ultimo_fim: Dict[str, float] = {}
+        self._ativos = 0
+        self._esperando = 0
+        self._despertador: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _reiniciar(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Futures e timers são do event loop; um loop novo (testes, asyncio.run repetido) começa do zero
+        FILA_LLM.dec(self._esperando)
+        self._heap = []
+        self._ativos = 0
+        self._esperando = 0
+        self._despertador = None
+        self._loop = loop
+
+    def _enfileirar(self, cliente: str) -> _Pedido:
+        if len(self._ultimo_fim) >= _MAX_CLIENTES:
+            # Etiquetas já ultrapassadas pelo tempo virtual não dão vantagem a ninguém
+            self._ultimo_fim = {c: fim for c, fim in self._ultimo_fim.items() if fim > self._tempo_virtual}
+        inicio = max(self._tempo_virtual, self._ultimo_fim.get(cliente, 0.0))
+        etiqueta = inicio + 1.0 / peso_cliente(cliente)
+        self._ultimo_fim[cliente] = etiqueta
+        pedido = _Pedido(etiqueta, next(self._ordem), inicio, self._loop.create_future())
+        heapq.heappush(self._heap, pedido)
+        self._esperando += 1
+        FILA_LLM.inc()
+        return pedido
+
+    def _despachar(self) -> None:
+        self._despertador = None
+        while self._heap and self._ativos < self.capacidade:
+            pedido = self._heap[0]
+            if pedido.futuro.done():
+                heapq.heappop(self._heap)
+                continue
+            if self.balde_global is not None:
+                espera = self.balde_global.consumir()
+                if espera > 0:
+                    self._despertador = self._loop.call_later(espera, self._despachar)
+                    return
+            heapq.heappop(self._heap)
+            self._tempo_virtual = max(self._tempo_virtual, pedido.inicio)
+            self._ativos += 1
+            self._esperando -= 1
+            FILA_LLM.dec()
+            pedido.futuro.set_result(None)
+
+    def _liberar(self) -> None:
+        self._ativos -= 1
+        if self._despertador is None:
+            self._despachar()
+
+    @asynccontextmanager
+    async def vez(self, cliente: str) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._reiniciar(loop)
+        if self._esperando >= config.ADMISSAO_FILA_MAX:
+            REJEICOES_ADMISSAO.labels("fila_cheia").inc()
+            raise CapacidadeEsgotada(
+                "A fila de chamadas à IA está cheia. Tente novamente em instantes.", config.RETRY_AFTER_SEGUNDOS
+            )
+        pedido = self._enfileirar(cliente)
+        chegada = time.monotonic()
+        if self._despertador is None:
+            self._despachar()
+        concedido = False
+        try:
+            await asyncio.wait_for(pedido.futuro, config.ADMISSAO_ESPERA_MAX_SEGUNDOS)
+            concedido = True
+        except asyncio.TimeoutError:
+            REJEICOES_ADMISSAO.labels("espera_excedida").inc()
+            raise CapacidadeEsgotada(
+                "A IA está sobrecarregada no momento. Tente novamente em instantes.", config.RETRY_AFTER_SEGUNDOS
+            )
+        finally:
+            ESPERA_FILA_LLM.observe(time.monotonic() - chegada)
+            if not concedido:
+                if pedido.futuro.done() and not pedido.futuro.cancelled():
+                    # Liberado no mesmo instante em que a espera foi cancelada
+                    self._liberar()
+                else:
+                    pedido.futuro.cancel()
+                    self._esperando -= 1
+                    FILA_LLM.dec()
+        try:
+            yield
+        finally:
+            self._liberar()
+
+
+_fila_llm: Optional[FilaJusta] = None
+
+
+def fila_llm() -> FilaJusta:
+    global _fila_llm
+    if _fila_llm is None:
+        _fila_llm = FilaJusta(
+            config.LLM_MAX_CONCORRENCIA,
+            _balde_por_minuto(config.ADMISSAO_GLOBAL_POR_MINUTO, config.ADMISSAO_GLOBAL_RAJADA),
+        )
+    return _fila_llm
+
+
+def eh_limite_provedor(erro: BaseException) -> bool:
+    codigo = getattr(erro, "code", None) or getattr(erro, "status_code", None)
+    try:
+        if int(codigo) in _STATUS_LIMITE:
+            return True
+    except (TypeError, ValueError):
+        pass
+    return type(erro).__name__ in _ERROS_LIMITE
+
+
+def espera_retentativa(tentativa: int, erro: Optional[BaseException] = None) -> float:
+    # Backoff exponencial com jitter total: clientes limitados ao mesmo tempo não voltam juntos
+    teto = min(config.LLM_RETENTATIVA_MAX_SEGUNDOS, config.LLM_RETENTATIVA_BASE_SEGUNDOS * 2 ** tentativa)
+    espera = random.uniform(0, teto)
+    sugerida = getattr(erro, "retry_after", None)
+    if isinstance(sugerida, (int, float)) and 0 < sugerida <= config.LLM_RETENTATIVA_MAX_SEGUNDOS:
+        espera = max(espera, float(sugerida))
+    return espera
+
+
+def admitir(llm: "Runnable") -> "Runnable":
+    # O wrapper herda de Runnable, que arrasta o langsmith no import: só carrega quando as cadeias são criadas
+    from services.llm_admitido import LLMAdmitido
+
+    return LLMAdmitido(llm)
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from services import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoCache:
+    texto_ia: str
+    pdf: bytes
+    nome_arquivo: str
+    # Template do PDF guardado; vazio quando só a resposta da IA foi gerada (modo JSON)
+    template: str = ""
+    descricao: str = ""
+    chave: str = ""
+
+    @property
+    def tamanho(self) -> int:
+        return len(self.pdf) + len(self.texto_ia.encode("utf-8"))
+
+
+def chave_cache(file_content: bytes, description: str, versao: str) -> str:
+    h = hashlib.sha256()
+    for parte in (hashlib.sha256(file_content).digest(), description.strip().encode("utf-8"), versao.encode("utf-8")):
+        h.update(len(parte).to_bytes(8, "big"))
+        h.update(parte)
+    return h.hexdigest()
+
+
+class CacheResultados:
+    def __init__(
+        self,
+        max_itens: int,
+        max_bytes: int,
+        ttl_segundos: float,
+        diretorio: Optional[str] = None,
+        max_bytes_disco: int = 0,
+    ):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.diretorio = diretorio or None
+        self.max_bytes_disco = max_bytes_disco
+        self._itens: "OrderedDict[str, Tuple[float, ResultadoCache]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.contadores: Dict[str, int] = {
+            "hits_memoria": 0,
+            "hits_disco": 0,
+            "misses": 0,
+            "gravacoes": 0,
+            "remocoes": 0,
+        }
+        if self.diretorio:
+            os.makedirs(self.diretorio, exist_ok=True)
+
+    def obter(self, chave: str) -> Optional[ResultadoCache]:
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                criado_em, resultado = item
+                if agora - criado_em <= self.ttl_segundos:
+                    self._itens.move_to_end(chave)
+                    self.contadores["hits_memoria"] += 1
+                    return resultado
+                self._remover(chave)
+
+        resultado = self._ler_disco(chave)
+        with self._lock:
+            if resultado is None:
+                self.contadores["misses"] += 1
+                return None
+            self.contadores["hits_disco"] += 1
+            self._inserir(chave, resultado, agora)
+        return resultado
+
+    def guardar(self, chave: str, resultado: ResultadoCache) -> None:
+        with self._lock:
+            self._inserir(chave, resultado, time.monotonic())
+            self.contadores["gravacoes"] += 1
+        self._gravar_disco(chave, resultado)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self.contadores,
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+            }
+
+    def _inserir(self, chave: str, resultado: ResultadoCache, criado_em: float) -> None:
+        if resultado.tamanho > self.max_bytes:
+            return
+        anterior = self._itens.pop(chave, None)
+        if anterior is not None:
+            self._bytes -= anterior[1].tamanho
+        self._itens[chave] = (criado_em, resultado)
+        self._bytes += resultado.tamanho
+        while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+            self._remover(next(iter(self._itens)))
+
+    def _remover(self, chave: str) -> None:
+        _, resultado = self._itens.pop(chave)
+        self._bytes -= resultado.tamanho
+        self.contadores["remocoes"] += 1
+
+    def _caminhos(self, chave: str) -> Tuple[str, str]:
+        base = os.path.join(self.diretorio, chave)
+        return f"{base}.json", f"{base}.pdf"
+
+    def _ler_disco(self, chave: str) -> Optional[ResultadoCache]:
+        if not self.diretorio:
+            return None
+        caminho_meta, caminho_pdf = self._caminhos(chave)
+        try:
+            if time.time() - os.path.getmtime(caminho_meta) > self.ttl_segundos:
+                self._apagar_disco(chave)
+                return None
+            with open(caminho_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(caminho_pdf, "rb") as f:
+                pdf = f.read()
+        except (OSError, ValueError):
+            return None
+        return ResultadoCache(
+            texto_ia=meta["texto_ia"],
+            pdf=pdf,
+            nome_arquivo=meta["nome_arquivo"],
+            template=meta.get("template", ""),
+            descricao=meta.get("descricao", ""),
+            chave=chave,
+        )
+
+    def _gravar_disco(self, chave: str, resultado: ResultadoCache) -> None:
+        if not self.diretorio:
+            return
+        caminho_meta, caminho_pdf = self._caminhos(chave)
+        try:
+            with open(caminho_pdf + ".tmp", "wb") as f:
+                f.write(resultado.pdf)
+            os.replace(caminho_pdf + ".tmp", caminho_pdf)
+            with open(caminho_meta + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "texto_ia": resultado.texto_ia,
+                        "nome_arquivo": resultado.nome_arquivo,
+                        "template": resultado.template,
+                        "descricao": resultado.descricao,
+                    },
+                    f,
+                )
+            os.replace(caminho_meta + ".tmp", caminho_meta)
+            self._podar_disco()
+        except OSError as e:
+            logger.warning("Erro ao gravar cache em disco: %s", e)
+
+    def _apagar_disco(self, chave: str) -> None:
+        for caminho in self._caminhos(chave):
+            try:
+                os.unlink(caminho)
+            except OSError:
+                pass
+
+    def _podar_disco(self) -> None:
+        if self.max_bytes_disco <= 0:
+            return
+        entradas = []
+        total = 0
+        with os.scandir(self.diretorio) as it:
+            for entrada in it:
+                if not entrada.name.endswith(".json"):
+                    continue
+                chave = entrada.name[:-5]
+                tamanho = 0
+                for caminho in self._caminhos(chave):
+                    try:
+                        tamanho += os.path.getsize(caminho)
+                    except OSError:
+                        pass
+                entradas.append((entrada.stat().st_mtime, chave, tamanho))
+                total += tamanho
+        entradas.sort()
+        for _, chave, tamanho in entradas:
+            if total <= self.max_bytes_disco:
+                break
+            self._apagar_disco(chave)
+            total -= tamanho
+
+
+CACHE_RESULTADOS = CacheResultados(
+    max_itens=config.CACHE_MAX_ITENS,
+    max_bytes=config.CACHE_MAX_BYTES,
+    ttl_segundos=config.CACHE_TTL_SEGUNDOS,
+    diretorio=config.CACHE_DIR,
+    max_bytes_disco=config.CACHE_DISCO_MAX_BYTES,
+)
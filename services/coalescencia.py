@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from services.observabilidade import GERACOES_COMPARTILHADAS, PEDIDOS_COALESCIDOS
+
+logger = logging.getLogger(__name__)
+
+
+class _Geracao:
+    def __init__(self, tarefa: asyncio.Task):
+        self.tarefa = tarefa
+        self.aguardando = 0
+
+
+class Coalescedor:
+    # Single-flight: o primeiro pedido de uma chave inicia a geração numa tarefa própria e os pedidos
+    # idênticos que chegam enquanto ela roda só aguardam o mesmo resultado (ou a mesma exceção).
+    # A tarefa segue enquanto houver alguém aguardando; sai o último, ela é cancelada
+    def __init__(self):
+        self._geracoes: Dict[str, _Geracao] = {}
+
+    def em_andamento(self) -> int:
+        return len(self._geracoes)
+
+    async def executar(self, chave: str, gerar: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        geracao = self._geracoes.get(chave)
+        coalescido = geracao is not None
+        if geracao is None:
+            geracao = _Geracao(asyncio.ensure_future(gerar()))
+            self._geracoes[chave] = geracao
+            GERACOES_COMPARTILHADAS.inc()
+            geracao.tarefa.add_done_callback(lambda _: self._encerrar(chave, geracao))
+        else:
+            PEDIDOS_COALESCIDOS.inc()
+            logger.info("Pedido idêntico em andamento: aguardando a mesma geração (%s na espera)", geracao.aguardando)
+
+        geracao.aguardando += 1
+        try:
+            # O shield impede que o cancelamento de quem aguarda cancele a geração dos demais
+            return await asyncio.shield(geracao.tarefa), coalescido
+        finally:
+            geracao.aguardando -= 1
+            if geracao.aguardando == 0 and not geracao.tarefa.done():
+                logger.info("Geração cancelada: nenhum pedido aguardando")
+                # Sai do mapa já: um pedido novo não pode se juntar a uma tarefa sendo cancelada
+                self._encerrar(chave, geracao)
+                geracao.tarefa.cancel()
+
+    def _encerrar(self, chave: str, geracao: _Geracao) -> None:
+        if self._geracoes.get(chave) is geracao:
+            del self._geracoes[chave]
+            GERACOES_COMPARTILHADAS.dec()
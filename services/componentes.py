@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services import config
+from services.observabilidade import INICIALIZACAO_COMPONENTE
+
+logger = logging.getLogger(__name__)
+
+
+class Componente:
+    # Recurso pesado (imports, clientes, pools) construído no primeiro uso ou pelo aquecimento
+    def __init__(self, nome: str, fabrica: Callable[[], Any]):
+        self.nome = nome
+        self.fabrica = fabrica
+        self.erro: Optional[str] = None
+        self.duracao: Optional[float] = None
+        self._valor: Any = None
+        self._pronto = False
+        self._lock = threading.Lock()
+
+    @property
+    def pronto(self) -> bool:
+        return self._pronto
+
+    def obter(self) -> Any:
+        if self._pronto:
+            return self._valor
+        with self._lock:
+            if not self._pronto:
+                inicio = time.perf_counter()
+                try:
+                    self._valor = self.fabrica()
+                except Exception as e:
+                    self.erro = f"{type(e).__name__}: {e}"
+                    logger.exception("Falha ao inicializar o componente %s", self.nome)
+                    raise
+                self.duracao = time.perf_counter() - inicio
+                self.erro = None
+                self._pronto = True
+                INICIALIZACAO_COMPONENTE.labels(self.nome).set(self.duracao)
+                logger.info("Componente %s inicializado em %.2fs", self.nome, self.duracao)
+        return self._valor
+
+    async def obter_async(self) -> Any:
+        # Fora do event loop: a construção pode levar segundos ou esperar o aquecimento em curso
+        if self._pronto:
+            return self._valor
+        return await asyncio.to_thread(self.obter)
+
+    def estado(self) -> Dict[str, Any]:
+        estado: Dict[str, Any] = {"pronto": self._pronto}
+        if self.duracao is not None:
+            estado["segundos"] = round(self.duracao, 3)
+        if self.erro:
+            estado["erro"] = self.erro
+        return estado
+
+
+COMPONENTES: Dict[str, Componente] = {}
+
+_aquecimento: Optional[threading.Thread] = None
+_aquecimento_lock = threading.Lock()
+
+
+def registrar(nome: str, fabrica: Callable[[], Any]) -> Componente:
+    componente = Componente(nome, fabrica)
+    COMPONENTES[nome] = componente
+    return componente
+
+
+def aquecer() -> None:
+    inicio = time.perf_counter()
+    for componente in list(COMPONENTES.values()):
+        try:
+            componente.obter()
+        except Exception:
+            # Já registrado no log; a prontidão mostra o erro e a próxima verificação tenta de novo
+            pass
+    logger.info("Aquecimento concluído em %.2fs: %s", time.perf_counter() - inicio, estado())
+
+
+def iniciar_aquecimento() -> None:
+    global _aquecimento
+    with _aquecimento_lock:
+        if _aquecimento is not None and _aquecimento.is_alive():
+            return
+        _aquecimento = threading.Thread(target=aquecer, name="aquecimento", daemon=True)
+        _aquecimento.start()
+
+
+def pronto() -> bool:
+    if not config.AQUECIMENTO_HABILITADO:
+        # Modo preguiçoso: cada componente nasce no primeiro uso, só um erro conhecido tira a prontidão
+        return not any(c.erro for c in COMPONENTES.values())
+    return all(c.pronto for c in COMPONENTES.values())
+
+
+def estado() -> Dict[str, Dict[str, Any]]:
+    return {nome: componente.estado() for nome, componente in COMPONENTES.items()}
@@ -0,0 +1,133 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _int_env(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    if valor is None or not valor.strip():
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"Variável de ambiente {nome} deve ser um número inteiro, recebido: {valor!r}")
+
+
+# Execução do pipeline
+CPU_POOL_TIPO = os.getenv("CPU_POOL_TIPO", "thread").strip().lower()
+CPU_WORKERS = _int_env("CPU_WORKERS", os.cpu_count() or 2)
+MAX_REQUISICOES_PENDENTES = _int_env("MAX_REQUISICOES_PENDENTES", 64)
+RETRY_AFTER_SEGUNDOS = _int_env("RETRY_AFTER_SEGUNDOS", 5)
+
+# Inicialização: com aquecimento os componentes pesados sobem em segundo plano logo após o start
+# e /readyz só responde 200 quando terminam; sem ele cada um nasce no primeiro uso
+AQUECIMENTO_HABILITADO = os.getenv("AQUECIMENTO_HABILITADO", "1").strip().lower() not in ("0", "false", "nao", "não")
+
+# Renderização de PDF em processos dedicados (0 desativa e renderiza no executor local)
+RENDER_PROCESSOS = _int_env("RENDER_PROCESSOS", min(4, os.cpu_count() or 1))
+RENDER_MAX_JOBS_POR_PROCESSO = _int_env("RENDER_MAX_JOBS_POR_PROCESSO", 500)
+RENDER_TIMEOUT_SEGUNDOS = float(os.getenv("RENDER_TIMEOUT_SEGUNDOS", "60"))
+
+# Extração de PDF: intervalos de páginas em processos dedicados (0 ou 1 extrai em série no próprio processo)
+EXTRACAO_PROCESSOS = _int_env("EXTRACAO_PROCESSOS", min(4, os.cpu_count() or 1))
+EXTRACAO_MIN_PAGINAS_PARALELO = _int_env("EXTRACAO_MIN_PAGINAS_PARALELO", 8)
+EXTRACAO_MAX_CARACTERES = _int_env("EXTRACAO_MAX_CARACTERES", 120000)
+EXTRACAO_TIMEOUT_SEGUNDOS = float(os.getenv("EXTRACAO_TIMEOUT_SEGUNDOS", "30"))
+
+# Chamadas à IA
+LLM_MAX_CONCORRENCIA = _int_env("LLM_MAX_CONCORRENCIA", 256)
+LLM_TIMEOUT_SEGUNDOS = float(os.getenv("LLM_TIMEOUT_SEGUNDOS", "120"))
+# estruturado: JSON validado por schema, com reparos e o modo texto como fallback; texto: formato livre
+LLM_MODO = os.getenv("LLM_MODO", "estruturado").strip().lower()
+LLM_REPAROS_ESTRUTURADO = _int_env("LLM_REPAROS_ESTRUTURADO", 1)
+# Geração por seções: até LLM_SECOES_PARALELAS chamadas concorrentes, cada uma com parte das seções
+# do currículo, juntadas depois (0 ou 1: uma chamada só). Se alguma parte vier inválida, usa a chamada única
+LLM_SECOES_PARALELAS = _int_env("LLM_SECOES_PARALELAS", 0)
+# Provedor da IA: google (Gemini), local (respostas sintéticas determinísticas, sem rede) ou
+# replay (respostas gravadas em LLM_GRAVACOES). local e replay simulam a latência do modelo abaixo
+LLM_PROVEDOR = os.getenv("LLM_PROVEDOR", "google").strip().lower()
+LLM_GRAVACOES = os.getenv("LLM_GRAVACOES", "gravacoes_llm.jsonl")
+LLM_GRAVAR = os.getenv("LLM_GRAVAR", "0").strip().lower() in ("1", "true", "sim")
+LLM_SEMENTE = _int_env("LLM_SEMENTE", 42)
+LLM_LATENCIA_BASE_MS = float(os.getenv("LLM_LATENCIA_BASE_MS", "800"))
+LLM_LATENCIA_MS_POR_TOKEN_ENTRADA = float(os.getenv("LLM_LATENCIA_MS_POR_TOKEN_ENTRADA", "0.05"))
+LLM_LATENCIA_MS_POR_TOKEN_SAIDA = float(os.getenv("LLM_LATENCIA_MS_POR_TOKEN_SAIDA", "8"))
+LLM_LATENCIA_JITTER = float(os.getenv("LLM_LATENCIA_JITTER", "0.2"))
+# Fração das chamadas simuladas (local e replay) que falham com limite do provedor (429)
+LLM_SIMULAR_TAXA_LIMITE = float(os.getenv("LLM_SIMULAR_TAXA_LIMITE", "0"))
+# Retentativas após limite ou indisponibilidade do provedor, com backoff exponencial e jitter
+LLM_RETENTATIVAS = _int_env("LLM_RETENTATIVAS", 3)
+LLM_RETENTATIVA_BASE_SEGUNDOS = float(os.getenv("LLM_RETENTATIVA_BASE_SEGUNDOS", "1"))
+LLM_RETENTATIVA_MAX_SEGUNDOS = float(os.getenv("LLM_RETENTATIVA_MAX_SEGUNDOS", "20"))
+
+# Controle de admissão: cota por cliente (IP de origem), limite global de chamadas à IA e fila
+# justa ponderada na frente do modelo (taxas em 0 desativam). O cabeçalho ADMISSAO_CABECALHO_CLIENTE
+# só identifica o cliente com ADMISSAO_CONFIAR_CABECALHO ligado, atrás de um gateway autenticado
+# que o preenche: vindo direto do cliente, ele escolheria a própria cota e o próprio peso
+ADMISSAO_CABECALHO_CLIENTE = os.getenv("ADMISSAO_CABECALHO_CLIENTE", "X-Client-Id")
+ADMISSAO_CONFIAR_CABECALHO = os.getenv("ADMISSAO_CONFIAR_CABECALHO", "0").strip().lower() in ("1", "true", "sim")
+ADMISSAO_CLIENTE_POR_MINUTO = float(os.getenv("ADMISSAO_CLIENTE_POR_MINUTO", "30"))
+ADMISSAO_CLIENTE_RAJADA = _int_env("ADMISSAO_CLIENTE_RAJADA", 10)
+ADMISSAO_GLOBAL_POR_MINUTO = float(os.getenv("ADMISSAO_GLOBAL_POR_MINUTO", "600"))
+ADMISSAO_GLOBAL_RAJADA = _int_env("ADMISSAO_GLOBAL_RAJADA", 20)
+# Pesos na fila justa, que também multiplicam a cota do cliente: "cliente_a=3,cliente_b=0.5"
+ADMISSAO_PESOS = os.getenv("ADMISSAO_PESOS", "")
+ADMISSAO_FILA_MAX = _int_env("ADMISSAO_FILA_MAX", 1000)
+ADMISSAO_ESPERA_MAX_SEGUNDOS = float(os.getenv("ADMISSAO_ESPERA_MAX_SEGUNDOS", "60"))
+
+# Redução de contexto: currículos acima de CONTEXTO_MAX_TOKENS (estimados) são divididos
+# em seções e só os trechos mais relevantes para a vaga vão para a IA (0 desativa)
+CONTEXTO_MAX_TOKENS = _int_env("CONTEXTO_MAX_TOKENS", 3000)
+CONTEXTO_TAMANHO_TRECHO = _int_env("CONTEXTO_TAMANHO_TRECHO", 1200)
+CONTEXTO_SOBREPOSICAO_TRECHO = _int_env("CONTEXTO_SOBREPOSICAO_TRECHO", 100)
+CONTEXTO_EMBEDDINGS = os.getenv("CONTEXTO_EMBEDDINGS", "hash").strip().lower()
+CONTEXTO_MODELO_EMBEDDINGS = os.getenv("CONTEXTO_MODELO_EMBEDDINGS", "models/text-embedding-004")
+
+# Índice de palavras-chave das vagas (extraído localmente e reaproveitado entre pedidos)
+VAGA_CACHE_MAX_ITENS = _int_env("VAGA_CACHE_MAX_ITENS", 1024)
+
+# Cache de resultados
+CACHE_HABILITADO = os.getenv("CACHE_HABILITADO", "1").strip().lower() not in ("0", "false", "nao", "não")
+CACHE_MAX_ITENS = _int_env("CACHE_MAX_ITENS", 256)
+CACHE_MAX_BYTES = _int_env("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+CACHE_TTL_SEGUNDOS = float(os.getenv("CACHE_TTL_SEGUNDOS", "86400"))
+CACHE_DIR = os.getenv("CACHE_DIR", "").strip()
+CACHE_DISCO_MAX_BYTES = _int_env("CACHE_DISCO_MAX_BYTES", 512 * 1024 * 1024)
+
+# Coalescência: pedidos idênticos (mesmo PDF e vaga) em andamento no mesmo processo compartilham
+# uma única chamada à IA
+COALESCENCIA_HABILITADA = os.getenv("COALESCENCIA_HABILITADA", "1").strip().lower() not in ("0", "false", "nao", "não")
+
+# Upload
+MAX_UPLOAD_BYTES = _int_env("MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+MAX_PAGINAS_PDF = _int_env("MAX_PAGINAS_PDF", 50)
+MAX_CAMPO_FORMULARIO_BYTES = _int_env("MAX_CAMPO_FORMULARIO_BYTES", 64 * 1024)
+
+# Fila de jobs
+JOBS_BACKEND = os.getenv("JOBS_BACKEND", "memoria").strip().lower()
+JOBS_SQLITE_PATH = os.getenv("JOBS_SQLITE_PATH", "jobs.sqlite3")
+JOBS_WORKERS = _int_env("JOBS_WORKERS", 16)
+JOBS_PROCESSOS = _int_env("JOBS_PROCESSOS", 0)
+JOBS_MAX_PENDENTES = _int_env("JOBS_MAX_PENDENTES", 256)
+JOBS_TTL_SEGUNDOS = float(os.getenv("JOBS_TTL_SEGUNDOS", "3600"))
+# Backend em memória: máximo de jobs concluídos guardando o PDF (os mais antigos expiram antes do TTL)
+JOBS_MAX_RESULTADOS = _int_env("JOBS_MAX_RESULTADOS", 128)
+# Também é o intervalo com que os workers da fila sqlite conferem se o job em execução foi cancelado
+# (DELETE ou cliente desconectado em outro processo)
+JOBS_INTERVALO_POLL = float(os.getenv("JOBS_INTERVALO_POLL", "0.2"))
+JOBS_TIMEOUT_ESPERA = float(os.getenv("JOBS_TIMEOUT_ESPERA", "300"))
+JOBS_TIMEOUT_PROCESSAMENTO = float(os.getenv("JOBS_TIMEOUT_PROCESSAMENTO", "600"))
+
+# Lotes
+LOTE_MAX_ITENS = _int_env("LOTE_MAX_ITENS", 50)
+LOTE_MAX_BYTES = _int_env("LOTE_MAX_BYTES", 100 * 1024 * 1024)
+# Entradas de ZIP que descompactam mais que N vezes o tamanho compactado são recusadas (zip bomb).
+# LOTE_MAX_BYTES vale também para o total descompactado do lote
+LOTE_MAX_TAXA_COMPRESSAO = _int_env("LOTE_MAX_TAXA_COMPRESSAO", 100)
+LOTE_MAX_CONCORRENCIA = _int_env("LOTE_MAX_CONCORRENCIA", 4)
+
+# Logs (LOG_FORMATO: texto ou json; DEBUG inclui os dumps de depuração do pipeline)
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto").lower()
@@ -0,0 +1,229 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from services import config
+from services.componentes import registrar
+from services.extraction import MARCA_SUBTITULO, MARCA_TITULO
+from services.observabilidade import CONTEXTO_OBRIGATORIO_CORTADO, TOKENS_CONTEXTO
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Estimativa do tokenizer do Gemini para texto em português: ~4 caracteres por token
+CARACTERES_POR_TOKEN = 4
+
+SECOES_CONHECIDAS = {
+    "resumo", "perfil", "sobre", "sobre mim", "objetivo", "objetivos", "resumo profissional",
+    "experiencia", "experiencias", "experiencia profissional", "historico profissional",
+    "formacao", "formacao academica", "educacao", "escolaridade",
+    "competencias", "habilidades", "conhecimentos", "competencias tecnicas", "tecnologias",
+    "projetos", "portfolio", "certificacoes", "certificados", "cursos", "idiomas",
+    "contato", "contatos", "informacoes pessoais", "dados pessoais", "publicacoes", "premios",
+    "experience", "work experience", "education", "skills", "projects", "summary",
+    "certifications", "languages", "contact",
+}
+# Seções que identificam o candidato entram sempre no contexto, qualquer que seja a vaga,
+# junto com o primeiro trecho do currículo (nome e cargo)
+SECOES_OBRIGATORIAS = {
+    "contato", "contatos", "informacoes pessoais", "dados pessoais", "contact",
+}
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def estimar_tokens(texto: str) -> int:
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+def normalizar(texto: str) -> str:
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_PALAVRA.findall(sem_acento.lower()))
+
+
+def _titulo_secao(linha: str) -> Optional[str]:
+    linha = linha.strip().rstrip(":").strip()
+    if not linha or len(linha) > 40:
+        return None
+    normalizado = normalizar(linha)
+    if normalizado in SECOES_CONHECIDAS:
+        return normalizado
+    letras = [c for c in linha if c.isalpha()]
+    # Títulos em caixa alta curtos (ex.: "PROJETOS PESSOAIS") também abrem seção
+    if len(letras) >= 4 and all(c.isupper() for c in letras) and len(linha.split()) <= 4:
+        return normalizado
+    return None
+
+
+_EMBEDDINGS: Optional["Embeddings"] = None
+_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def obter_embeddings() -> "Embeddings":
+    global _EMBEDDINGS
+    if _EMBEDDINGS is None:
+        with _EMBEDDINGS_LOCK:
+            if _EMBEDDINGS is None:
+                if config.CONTEXTO_EMBEDDINGS == "google":
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+                    _EMBEDDINGS = GoogleGenerativeAIEmbeddings(model=config.CONTEXTO_MODELO_EMBEDDINGS)
+                elif config.CONTEXTO_EMBEDDINGS == "hash":
+                    from services.embeddings_hash import EmbeddingsHash
+
+                    _EMBEDDINGS = EmbeddingsHash()
+                else:
+                    raise ValueError(
+                        f"CONTEXTO_EMBEDDINGS inválido: '{config.CONTEXTO_EMBEDDINGS}'. Use 'hash' ou 'google'."
+                    )
+    return _EMBEDDINGS
+
+
+def _carregar_recuperacao() -> "Embeddings":
+    # faiss, numpy e o divisor de texto custam quase um segundo de import; ficam fora do start
+    import faiss
+    import numpy
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return obter_embeddings()
+
+
+registrar("recuperacao", _carregar_recuperacao)
+
+
+@dataclass
+class Trecho:
+    posicao: int
+    secao: str
+    pagina: int
+    texto: str
+
+    @property
+    def tokens(self) -> int:
+        return estimar_tokens(self.texto)
+
+
+def dividir_secoes(pdf_docs: List[Document]) -> List[Trecho]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    divisor = RecursiveCharacterTextSplitter(
+        chunk_size=config.CONTEXTO_TAMANHO_TRECHO,
+        chunk_overlap=config.CONTEXTO_SOBREPOSICAO_TRECHO,
+    )
+    secoes: List[Trecho] = []
+    secao, pagina, linhas = "cabecalho", 0, []
+
+    def fechar():
+        texto = "\n".join(linhas).strip()
+        if texto:
+            secoes.append(Trecho(len(secoes), secao, pagina, texto))
+
+    tem_corpo = False
+    for doc in pdf_docs:
+        for linha in doc.page_content.splitlines():
+            titulo = _titulo_secao(linha)
+            marcado = linha.startswith(MARCA_TITULO)
+            # Títulos marcados pelo layout só abrem seção depois de algum corpo: nome e cargo
+            # empilhados no topo continuam no cabeçalho
+            if titulo is None and marcado and tem_corpo:
+                titulo = normalizar(linha)
+            if titulo is not None:
+                fechar()
+                secao, pagina, linhas, tem_corpo = titulo, doc.metadata.get("page", 0), [], False
+            linhas.append(linha)
+            tem_corpo = tem_corpo or not (marcado or linha.startswith(MARCA_SUBTITULO))
+
+    fechar()
+
+    # Seções longas (ex.: experiência com vários empregos) viram trechos menores recuperáveis separadamente
+    trechos: List[Trecho] = []
+    for item in secoes:
+        for pedaco in divisor.split_text(item.texto):
+            trechos.append(Trecho(len(trechos), item.secao, item.pagina, pedaco))
+    return trechos
+
+
+def _obrigatorios_no_orcamento(obrigatorios: List[Trecho], orcamento: int) -> List[Trecho]:
+    # Cabeçalho e contato entram sempre, mas também cabem no orçamento: na ordem do currículo,
+    # o trecho que estoura é cortado no fim de uma linha e os seguintes ficam de fora
+    escolhidos: List[Trecho] = []
+    usados = 0
+    for trecho in obrigatorios:
+        if usados + trecho.tokens <= orcamento:
+            escolhidos.append(trecho)
+            usados += trecho.tokens
+            continue
+        total = sum(t.tokens for t in obrigatorios)
+        logger.warning(
+            "Trechos obrigatórios somam %s tokens estimados, acima do orçamento de %s: cortados", total, orcamento
+        )
+        CONTEXTO_OBRIGATORIO_CORTADO.inc()
+        texto = trecho.texto[:(orcamento - usados) * CARACTERES_POR_TOKEN]
+        if "\n" in texto:
+            texto = texto.rsplit("\n", 1)[0]
+        if texto.strip():
+            escolhidos.append(Trecho(trecho.posicao, trecho.secao, trecho.pagina, texto.rstrip()))
+        break
+    return escolhidos
+
+
+def reduzir_contexto(pdf_docs: List[Document], description: str) -> List[Document]:
+    orcamento = config.CONTEXTO_MAX_TOKENS
+    total = sum(estimar_tokens(d.page_content) for d in pdf_docs)
+    TOKENS_CONTEXTO.labels("original").observe(total)
+    if orcamento <= 0 or total <= orcamento:
+        # CVs curtos vão inteiros: não há o que economizar e a recuperação só arriscaria perder contexto
+        TOKENS_CONTEXTO.labels("enviado").observe(total)
+        return pdf_docs
+
+    trechos = dividir_secoes(pdf_docs)
+    obrigatorios = [t for t in trechos if t.posicao == 0 or t.secao in SECOES_OBRIGATORIAS]
+    candidatos = [t for t in trechos if not (t.posicao == 0 or t.secao in SECOES_OBRIGATORIAS)]
+
+    escolhidos = _obrigatorios_no_orcamento(obrigatorios, orcamento)
+    usados = sum(t.tokens for t in escolhidos)
+    if candidatos:
+        import faiss
+        import numpy as np
+
+        embeddings = obter_embeddings()
+        vetores = np.asarray(
+            embeddings.embed_documents([f"{t.secao}\n{t.texto}" for t in candidatos]), dtype=np.float32
+        )
+        consulta = np.asarray([embeddings.embed_query(description)], dtype=np.float32)
+        faiss.normalize_L2(vetores)
+        faiss.normalize_L2(consulta)
+        indice = faiss.IndexFlatIP(vetores.shape[1])
+        indice.add(vetores)
+        _, ordem = indice.search(consulta, len(candidatos))
+        ranking = [candidatos[posicao] for posicao in ordem[0]]
+        # Primeiro o trecho mais relevante de cada seção, para o currículo reescrito não perder
+        # seções inteiras (ex.: formação); depois o orçamento restante vai por relevância
+        melhores_por_secao: Dict[str, Trecho] = {}
+        for trecho in ranking:
+            melhores_por_secao.setdefault(trecho.secao, trecho)
+        for trecho in list(melhores_por_secao.values()) + ranking:
+            if trecho not in escolhidos and usados + trecho.tokens <= orcamento:
+                escolhidos.append(trecho)
+                usados += trecho.tokens
+
+    # O LLM recebe os trechos na ordem original do currículo, agrupados por seção
+    escolhidos.sort(key=lambda t: t.posicao)
+    TOKENS_CONTEXTO.labels("enviado").observe(usados)
+    logger.info(
+        "Contexto reduzido de %s para %s tokens estimados (%s de %s trechos)",
+        total, usados, len(escolhidos), len(trechos),
+    )
+    metadados = {k: v for k, v in pdf_docs[0].metadata.items() if k != "page"}
+    return [
+        Document(page_content=t.texto, metadata={**metadados, "page": t.pagina, "secao": t.secao})
+        for t in escolhidos
+    ]
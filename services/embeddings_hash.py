@@ -0,0 +1,39 @@
+import hashlib
+import math
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.contexto import normalizar
+
+
+class EmbeddingsHash(Embeddings):
+    # Embedding local e determinístico: hashing de radicais e bigramas, sem modelo nem rede.
+    # Serve como padrão e como substituto reprodutível do embedding remoto em testes
+    def __init__(self, dimensao: int = 512):
+        self.dimensao = dimensao
+
+    def _termos(self, texto: str) -> List[str]:
+        # Truncar as palavras aproxima variações morfológicas ("análise", "analisar")
+        radicais = [p[:6] for p in normalizar(texto).split() if len(p) > 1]
+        return radicais + [f"{a} {b}" for a, b in zip(radicais, radicais[1:])]
+
+    def _vetor(self, texto: str) -> List[float]:
+        contagens: Dict[str, int] = {}
+        for termo in self._termos(texto):
+            contagens[termo] = contagens.get(termo, 0) + 1
+        vetor = np.zeros(self.dimensao, dtype=np.float32)
+        for termo, quantidade in contagens.items():
+            digest = hashlib.blake2b(termo.encode("utf-8"), digest_size=8).digest()
+            indice = int.from_bytes(digest[:4], "little") % self.dimensao
+            sinal = 1.0 if digest[4] & 1 else -1.0
+            vetor[indice] += sinal * (1.0 + math.log(quantidade))
+        norma = float(np.linalg.norm(vetor))
+        return (vetor / norma if norma else vetor).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vetor(texto) for texto in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vetor(text)
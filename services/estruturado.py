@@ -0,0 +1,158 @@
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from services import config
+from services.observabilidade import RESPOSTAS_ESTRUTURADAS
+from services.parser import dados_vazios, parse_resposta_ia, sem_marca_titulo
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+
+def _limpar_lista(valores: Any) -> List[str]:
+    if isinstance(valores, str):
+        valores = [valores]
+    return [str(v).strip() for v in valores or [] if str(v).strip()]
+
+
+class ExperienciaIA(BaseModel):
+    titulo: str = Field(description="Cargo | Empresa | Período")
+    detalhes: List[str] = Field(default_factory=list, description="Conquistas e resultados, um por item")
+
+    @field_validator("titulo")
+    @classmethod
+    def _titulo_preenchido(cls, valor: str) -> str:
+        if not valor.strip():
+            raise ValueError("o título da experiência não pode ser vazio")
+        return valor.strip()
+
+    @field_validator("detalhes", mode="before")
+    @classmethod
+    def _detalhes(cls, valor: Any) -> List[str]:
+        return _limpar_lista(valor)
+
+
+class MetadadosIA(BaseModel):
+    TITULO: str = Field("", description="Cargo principal da vaga")
+    AUTOR: str = Field("", description="Nome do candidato")
+    PALAVRAS_CHAVE: List[str] = Field(default_factory=list, description="Até 10 palavras-chave da vaga")
+    DESCRICAO: str = Field("", description="Resumo conciso da vaga")
+    CATEGORIA: str = "currículo"
+
+    @field_validator("PALAVRAS_CHAVE", mode="before")
+    @classmethod
+    def _palavras(cls, valor: Any) -> List[str]:
+        if isinstance(valor, str):
+            valor = valor.split(",")
+        return _limpar_lista(valor)[:10]
+
+
+class CurriculoIA(BaseModel):
+    METADADOS: MetadadosIA = Field(default_factory=MetadadosIA)
+    NOME: str = Field(description="Nome completo do candidato")
+    CARGO: str = Field(description="Cargo principal ou desejado")
+    RESUMO: str = Field(description="Parágrafo único de resumo profissional")
+    EXPERIENCIA: List[ExperienciaIA] = Field(default_factory=list)
+    COMPETENCIAS: List[str] = Field(default_factory=list, description="Categoria: Tecnologia 1, Tecnologia 2")
+    FORMACAO: List[str] = Field(default_factory=list, description="Curso | Instituição | Período")
+    CONTATO: List[str] = Field(default_factory=list, description="Telefone, Email, LinkedIn, GitHub")
+
+    @field_validator("NOME", "CARGO", "RESUMO")
+    @classmethod
+    def _preenchido(cls, valor: str) -> str:
+        valor = sem_marca_titulo(valor)
+        if not valor:
+            raise ValueError("campo obrigatório vazio")
+        return valor
+
+    @field_validator("COMPETENCIAS", "FORMACAO", "CONTATO", mode="before")
+    @classmethod
+    def _lista(cls, valor: Any) -> List[str]:
+        return _limpar_lista(valor)
+
+    def para_dados(self) -> Dict[str, Any]:
+        # Mesmo formato devolvido por parse_resposta_ia, para o render não distinguir os modos
+        dados = self.model_dump()
+        dados["METADADOS"]["PALAVRAS_CHAVE"] = ", ".join(self.METADADOS.PALAVRAS_CHAVE)
+        return dados
+
+
+class CurriculoEnviado(CurriculoIA):
+    # Currículo enviado para renderização (ex.: devolvido pelo formato JSON e editado pelo cliente).
+    # O modo texto pode deixar campos vazios, que o render já trata
+    NOME: str = ""
+    CARGO: str = ""
+    RESUMO: str = ""
+
+    @field_validator("NOME", "CARGO", "RESUMO")
+    @classmethod
+    def _preenchido(cls, valor: str) -> str:
+        return sem_marca_titulo(valor)
+
+
+def serializar_dados(dados: Dict[str, Any]) -> str:
+    return json.dumps(dados, ensure_ascii=False)
+
+
+def interpretar_resposta_ia(conteudo: str) -> Dict[str, Any]:
+    # Respostas do modo estruturado ficam guardadas (cache e jobs) como JSON; as do modo texto, como texto
+    if isinstance(conteudo, str) and conteudo.lstrip().startswith("{"):
+        try:
+            dados = json.loads(conteudo)
+        except ValueError:
+            dados = None
+        if isinstance(dados, dict):
+            return {**dados_vazios(), **dados}
+    return parse_resposta_ia(conteudo)
+
+
+def _texto_bruto(resposta: Dict[str, Any]) -> str:
+    bruto = resposta.get("raw")
+    conteudo = getattr(bruto, "content", bruto)
+    if isinstance(conteudo, list):
+        conteudo = "".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in conteudo)
+    return str(conteudo or "")
+
+
+def validar_resposta(resposta: Dict[str, Any], schema: Type[CurriculoIA] = CurriculoIA) -> CurriculoIA:
+    parsed = resposta.get("parsed")
+    if isinstance(parsed, schema):
+        return parsed
+    erro = resposta.get("parsing_error")
+    if parsed is None and erro is not None:
+        raise erro
+    return schema.model_validate(parsed if parsed is not None else json.loads(_texto_bruto(resposta)))
+
+
+async def gerar_estruturado_async(
+    cadeia: "Runnable",
+    cadeia_reparo: "Runnable",
+    entrada: Dict[str, Any],
+    fallback: Optional["Runnable"] = None,
+    entrada_fallback: Optional[Dict[str, Any]] = None,
+) -> str:
+    resposta = await cadeia.ainvoke(entrada)
+    for tentativa in range(config.LLM_REPAROS_ESTRUTURADO + 1):
+        try:
+            curriculo = validar_resposta(resposta)
+        except (ValidationError, ValueError) as e:
+            erro = str(e)
+            logger.warning("Resposta estruturada inválida (tentativa %s): %.300s", tentativa + 1, " ".join(erro.split()))
+        else:
+            RESPOSTAS_ESTRUTURADAS.labels("valida" if tentativa == 0 else "reparada").inc()
+            return serializar_dados(curriculo.para_dados())
+        if tentativa == config.LLM_REPAROS_ESTRUTURADO:
+            break
+        # O reparo só reenvia a resposta inválida e os erros, não o currículo inteiro
+        resposta = await cadeia_reparo.ainvoke({"resposta": _texto_bruto(resposta), "erros": erro})
+
+    RESPOSTAS_ESTRUTURADAS.labels("fallback").inc()
+    if fallback is None:
+        raise ValueError("A IA não devolveu um currículo válido")
+    logger.warning("Usando o modo texto depois de %s reparo(s) sem sucesso", config.LLM_REPAROS_ESTRUTURADO)
+    return await fallback.ainvoke(entrada_fallback or entrada)
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from services import config
+from services.extraction import extrair_em_serie
+
+_cpu_executor: Optional[Executor] = None
+_requisicoes_ativas = 0
+
+
+def cpu_executor() -> Executor:
+    global _cpu_executor
+    if _cpu_executor is None:
+        if config.CPU_POOL_TIPO == "process":
+            _cpu_executor = ProcessPoolExecutor(max_workers=config.CPU_WORKERS, initializer=extrair_em_serie)
+        elif config.CPU_POOL_TIPO == "thread":
+            _cpu_executor = ThreadPoolExecutor(
+                max_workers=config.CPU_WORKERS, thread_name_prefix="cvv-cpu"
+            )
+        else:
+            raise ValueError(f"CPU_POOL_TIPO inválido: {config.CPU_POOL_TIPO!r} (use 'thread' ou 'process')")
+    return _cpu_executor
+
+
+async def executar_cpu(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor(), partial(func, *args, **kwargs))
+
+
+def requisicoes_ativas() -> int:
+    return _requisicoes_ativas
+
+
+@asynccontextmanager
+async def limitar_requisicoes():
+    global _requisicoes_ativas
+    if _requisicoes_ativas >= config.MAX_REQUISICOES_PENDENTES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="O servidor está processando muitas solicitações. Tente novamente em instantes.",
+            headers={"Retry-After": str(config.RETRY_AFTER_SEGUNDOS)},
+        )
+    _requisicoes_ativas += 1
+    try:
+        yield
+    finally:
+        _requisicoes_ativas -= 1
+
+
+def encerrar_executores() -> None:
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+    _cpu_executor = None
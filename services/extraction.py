@@ -0,0 +1,251 @@
+import logging
+import math
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from multiprocessing.pool import Pool
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import fitz
+
+from langchain_core.documents import Document
+
+from services import config
+from services.componentes import registrar
+
+logger = logging.getLogger(__name__)
+
+# Marcas de layout no texto extraído: "## " abre seção (fonte maior que o corpo ou negrito em caixa alta),
+# "### " é subtítulo (negrito no tamanho do corpo, ex.: "Cargo | Empresa | Período")
+MARCA_TITULO = "## "
+MARCA_SUBTITULO = "### "
+RAZAO_TITULO = 1.15
+MAX_CARACTERES_TITULO = 80
+
+# Sem imagens: o "dict" do PyMuPDF decodificaria cada uma só para descartarmos
+_FLAGS_TEXTO = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+_FLAG_NEGRITO = 1 << 4
+_ESPACOS = re.compile(r"\s+")
+_DIGITOS = re.compile(r"\d+")
+
+_pool: Optional[Pool] = None
+_pool_lock = threading.Lock()
+# Ligado nos processos auxiliares (jobs, pools de render/extração/CPU): eles extraem em série.
+# Os processos do uvicorn (--reload, --workers) também são filhos, mas usam o pool normalmente
+_extracao_em_serie = False
+
+
+@dataclass
+class LinhaPdf:
+    texto: str
+    tamanho: float
+    negrito: bool
+
+
+def _linhas_pagina(page: fitz.Page) -> List[LinhaPdf]:
+    # Linha a linha, não bloco a bloco: o MuPDF costuma juntar título e corpo no mesmo bloco
+    linhas: List[LinhaPdf] = []
+    for bloco in page.get_text("dict", flags=_FLAGS_TEXTO)["blocks"]:
+        for linha in bloco.get("lines", []):
+            texto = _ESPACOS.sub(" ", "".join(span["text"] for span in linha["spans"])).strip()
+            if not texto:
+                continue
+            caracteres = peso = negrito = 0.0
+            for span in linha["spans"]:
+                quantidade = len(span["text"].strip())
+                caracteres += quantidade
+                peso += span["size"] * quantidade
+                if span["flags"] & _FLAG_NEGRITO or "bold" in span["font"].lower():
+                    negrito += quantidade
+            linhas.append(LinhaPdf(texto, round(peso / caracteres, 1), negrito * 2 > caracteres))
+    return linhas
+
+
+def _extrair_intervalo(segmento: str, tamanho: int, inicio: int, fim: int) -> List[List[LinhaPdf]]:
+    # Roda no worker: o PDF chega por memória compartilhada, não pelo pipe do pool
+    memoria = shared_memory.SharedMemory(name=segmento)
+    try:
+        conteudo = bytes(memoria.buf[:tamanho])
+    finally:
+        memoria.close()
+    with fitz.open(stream=conteudo, filetype="pdf") as doc:
+        return [_linhas_pagina(doc[numero]) for numero in range(inicio, fim)]
+
+
+def extrair_em_serie() -> None:
+    global _extracao_em_serie
+    _extracao_em_serie = True
+
+
+def _iniciar_worker() -> None:
+    # Referenciar este módulo no initializer já importa o PyMuPDF no spawn, antes do primeiro PDF
+    from services.observabilidade import configurar_logs
+
+    extrair_em_serie()
+    configurar_logs()
+
+
+def pool_extracao() -> Optional[Pool]:
+    global _pool
+    if config.EXTRACAO_PROCESSOS <= 1 or _extracao_em_serie:
+        # Com um processo não há o que paralelizar
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = multiprocessing.get_context("spawn").Pool(
+                    processes=config.EXTRACAO_PROCESSOS, initializer=_iniciar_worker
+                )
+                logger.info("Pool de extração iniciado com %s processo(s)", config.EXTRACAO_PROCESSOS)
+    return _pool
+
+
+def _aquecer_pool() -> Optional[Pool]:
+    pool = pool_extracao()
+    if pool is not None:
+        pool.apply_async(os.getpid).get(timeout=config.EXTRACAO_TIMEOUT_SEGUNDOS)
+    return pool
+
+
+registrar("pool_extracao", _aquecer_pool)
+
+
+def _intervalos(paginas: int, partes: int) -> List[Tuple[int, int]]:
+    tamanho = math.ceil(paginas / max(1, partes))
+    return [(inicio, min(paginas, inicio + tamanho)) for inicio in range(0, paginas, tamanho)]
+
+
+def _extrair_em_paralelo(pool: Pool, file_content: bytes, total_paginas: int) -> List[List[LinhaPdf]]:
+    # Dois intervalos contíguos por processo equilibram páginas de custo desigual (imagens, tabelas)
+    intervalos = _intervalos(total_paginas, config.EXTRACAO_PROCESSOS * 2)
+    segmento = shared_memory.SharedMemory(create=True, size=len(file_content))
+    try:
+        segmento.buf[: len(file_content)] = file_content
+        resultado = pool.starmap_async(
+            _extrair_intervalo, [(segmento.name, len(file_content), inicio, fim) for inicio, fim in intervalos]
+        )
+        try:
+            partes = resultado.get(timeout=config.EXTRACAO_TIMEOUT_SEGUNDOS)
+        except multiprocessing.TimeoutError:
+            raise ValueError("A extração do PDF excedeu o tempo limite.")
+    finally:
+        segmento.close()
+        segmento.unlink()
+    return [pagina for parte in partes for pagina in parte]
+
+
+def _estilo_corpo(paginas: List[List[LinhaPdf]]) -> Tuple[float, bool]:
+    # O estilo (tamanho, negrito) com mais caracteres é o corpo do texto; títulos se medem contra ele.
+    # Num currículo todo em negrito, negrito deixa de ser pista de título
+    contagem: Counter = Counter()
+    for linhas in paginas:
+        for linha in linhas:
+            contagem[(linha.tamanho, linha.negrito)] += len(linha.texto)
+    return contagem.most_common(1)[0][0] if contagem else (0.0, False)
+
+
+def _chave_repeticao(linha: LinhaPdf) -> str:
+    texto = linha.texto.lower()
+    # Números só são ignorados em linhas curtas, como "Página 3 de 10"; em "Cargo | Empresa 2 | 2020"
+    # eles distinguem uma experiência da outra
+    return _DIGITOS.sub("#", texto) if len(texto.split()) <= 4 else texto
+
+
+def _cabecalhos_corridos(paginas: List[List[LinhaPdf]]) -> Set[str]:
+    # Cabeçalhos e rodapés repetidos no topo ou no pé de mais da metade das páginas ("Página 3 de 10");
+    # são removidos só nessas posições e quando não estão em fonte maior que o corpo
+    if len(paginas) < 3:
+        return set()
+    contagem: Counter = Counter()
+    for linhas in paginas:
+        contagem.update({_chave_repeticao(linha) for linha in linhas[:1] + linhas[-1:] if len(linha.texto) <= 80})
+    return {chave for chave, vezes in contagem.items() if vezes * 2 > len(paginas)}
+
+
+def _formatar(linha: LinhaPdf, corpo: Tuple[float, bool]) -> str:
+    if len(linha.texto) > MAX_CARACTERES_TITULO:
+        return linha.texto
+    tamanho_corpo, corpo_negrito = corpo
+    destaque = linha.negrito and not corpo_negrito
+    letras = [c for c in linha.texto if c.isalpha()]
+    caixa_alta = bool(letras) and all(c.isupper() for c in letras)
+    if linha.tamanho >= tamanho_corpo * RAZAO_TITULO or (destaque and caixa_alta):
+        return MARCA_TITULO + linha.texto
+    if destaque:
+        return MARCA_SUBTITULO + linha.texto
+    return linha.texto
+
+
+def montar_documentos(paginas: List[List[LinhaPdf]], metadados: Dict[str, Any]) -> List[Document]:
+    corpo = _estilo_corpo(paginas)
+    corridos = _cabecalhos_corridos(paginas)
+    vistos: Set[str] = set()
+    restante = config.EXTRACAO_MAX_CARACTERES if config.EXTRACAO_MAX_CARACTERES > 0 else math.inf
+    pdf_docs: List[Document] = []
+    for numero, linhas in enumerate(paginas):
+        if restante <= 0:
+            break
+        textos = []
+        for posicao, linha in enumerate(linhas):
+            chave = _chave_repeticao(linha)
+            # Títulos (fonte maior que o corpo) no topo de cada página são conteúdo, não cabeçalho corrido
+            if chave in corridos and posicao in (0, len(linhas) - 1) and linha.tamanho <= corpo[0]:
+                # A primeira ocorrência fica: no topo da primeira página costuma ser o nome do candidato
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+            textos.append(_formatar(linha, corpo))
+        texto = "\n".join(textos)
+        metadados_pagina = {**metadados, "page": numero}
+        if len(texto) > restante:
+            texto = texto[: int(restante)]
+            metadados_pagina["truncado"] = True
+            logger.warning(
+                "Extração truncada em %s caracteres na página %s de %s",
+                config.EXTRACAO_MAX_CARACTERES, numero + 1, len(paginas),
+            )
+        restante -= len(texto)
+        pdf_docs.append(Document(page_content=texto, metadata=metadados_pagina))
+    return pdf_docs
+
+
+def extrair_documentos_memoria(file_content: bytes, source: str = "upload.pdf") -> List[Document]:
+    try:
+        doc = fitz.open(stream=file_content, filetype="pdf")
+    except Exception as e:
+        raise ValueError(f"Não foi possível abrir o PDF: {e}")
+
+    paginas: Optional[List[List[LinhaPdf]]] = None
+    try:
+        if doc.page_count > config.MAX_PAGINAS_PDF:
+            raise ValueError(f"O PDF tem páginas demais. O máximo permitido é {config.MAX_PAGINAS_PDF}.")
+        metadados_pdf = {
+            k: v for k, v in (doc.metadata or {}).items() if isinstance(v, (str, int))
+        }
+        total_paginas = doc.page_count
+        pool = pool_extracao()
+        if pool is None or total_paginas < config.EXTRACAO_MIN_PAGINAS_PARALELO:
+            # Poucas páginas não pagam o envio ao pool
+            paginas = [_linhas_pagina(page) for page in doc]
+    finally:
+        doc.close()
+
+    if paginas is None:
+        paginas = _extrair_em_paralelo(pool, file_content, total_paginas)
+    pdf_docs = montar_documentos(paginas, {**metadados_pdf, "source": source, "total_pages": total_paginas})
+
+    if not pdf_docs or not any(d.page_content.strip() for d in pdf_docs):
+        raise ValueError("Nenhum conteúdo válido foi extraído do PDF.")
+    return pdf_docs
+
+
+def encerrar_pool_extracao() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+    _pool = None
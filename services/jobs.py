@@ -0,0 +1,734 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from services import config
+from services.admissao import CLIENTE
+from services.cache import ResultadoCache
+from services.extraction import extrair_em_serie
+from services.llm import ClienteDesconectado
+from services.observabilidade import REQUEST_ID, configurar_logs, observar_etapa
+from services.templates import TEMPLATE_PADRAO
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+CANCELADO = "cancelado"
+STATUS_FINAIS = (CONCLUIDO, ERRO, CANCELADO)
+
+# "json" devolve só o currículo estruturado, sem renderizar o PDF
+FORMATO_PDF = "pdf"
+FORMATO_JSON = "json"
+FORMATOS = (FORMATO_PDF, FORMATO_JSON)
+
+Processador = Callable[..., Awaitable[Tuple[ResultadoCache, bool]]]
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    criado_em: float
+    atualizado_em: float
+    description: str = ""
+    template: str = TEMPLATE_PADRAO
+    formato: str = FORMATO_PDF
+    conteudo: Optional[bytes] = None
+    chave_idempotencia: Optional[str] = None
+    hash_pedido: Optional[str] = None
+    cliente: str = "-"
+    resultado: Optional[ResultadoCache] = None
+    cache_hit: bool = False
+    erro_status: Optional[int] = None
+    erro: Optional[str] = None
+
+    def resumo(self) -> Dict[str, Any]:
+        resumo = {
+            "id": self.id,
+            "status": self.status,
+            "criado_em": self.criado_em,
+            "atualizado_em": self.atualizado_em,
+        }
+        if self.status == ERRO:
+            resumo["erro"] = {"status": self.erro_status, "detail": self.erro}
+        return resumo
+
+
+class FilaJobs(ABC):
+    # Backends bloqueantes (I/O em disco) são chamados fora do event loop
+    bloqueante = False
+    # Filas compartilhadas entre processos: o cancelamento pode ser pedido por outro processo
+    # e só chega ao worker pelo status do job
+    compartilhada = False
+
+    @abstractmethod
+    def enfileirar(
+        self,
+        conteudo: bytes,
+        description: str,
+        chave_idempotencia: Optional[str] = None,
+        template: str = TEMPLATE_PADRAO,
+        cliente: str = "-",
+        formato: str = FORMATO_PDF,
+        hash_pedido: Optional[str] = None,
+    ) -> Job: ...
+
+    @abstractmethod
+    def reservar(self) -> Optional[Job]: ...
+
+    @abstractmethod
+    def concluir(self, job_id: str, resultado: ResultadoCache, cache_hit: bool) -> None: ...
+
+    @abstractmethod
+    def falhar(self, job_id: str, status_code: int, detalhe: str) -> None: ...
+
+    @abstractmethod
+    def cancelar(self, job_id: str) -> bool: ...
+
+    @abstractmethod
+    def obter(self, job_id: str, com_resultado: bool = False) -> Optional[Job]: ...
+
+    @abstractmethod
+    def remover(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    def pendentes(self) -> int: ...
+
+    @abstractmethod
+    def remover_expirados(self) -> int: ...
+
+    def sinalizar(self) -> None:
+        pass
+
+    async def esperar_novidade(self, timeout: float) -> None:
+        await asyncio.sleep(timeout)
+
+
+class FilaMemoria(FilaJobs):
+    def __init__(self, ttl_segundos: float, max_resultados: int = 0):
+        self.ttl_segundos = ttl_segundos
+        self.max_resultados = max_resultados
+        self._jobs: Dict[str, Job] = {}
+        # Jobs concluídos em ordem de conclusão: os mais antigos saem antes do TTL quando passam do limite
+        self._concluidos: Dict[str, None] = {}
+        self._fila: "deque[str]" = deque()
+        # A chave de idempotência vale por cliente: (cliente, chave) -> id do job
+        self._idempotencia: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._novidade: Optional[asyncio.Event] = None
+        self._loop_novidade: Optional[asyncio.AbstractEventLoop] = None
+
+    def enfileirar(
+        self,
+        conteudo: bytes,
+        description: str,
+        chave_idempotencia: Optional[str] = None,
+        template: str = TEMPLATE_PADRAO,
+        cliente: str = "-",
+        formato: str = FORMATO_PDF,
+        hash_pedido: Optional[str] = None,
+    ) -> Job:
+        with self._lock:
+            if chave_idempotencia and (cliente, chave_idempotencia) in self._idempotencia:
+                existente = self._jobs.get(self._idempotencia[(cliente, chave_idempotencia)])
+                if existente is not None:
+                    return existente
+            agora = time.time()
+            job = Job(
+                id=uuid.uuid4().hex,
+                status=PENDENTE,
+                criado_em=agora,
+                atualizado_em=agora,
+                description=description,
+                template=template,
+                formato=formato,
+                conteudo=conteudo,
+                chave_idempotencia=chave_idempotencia,
+                hash_pedido=hash_pedido,
+                cliente=cliente,
+            )
+            self._jobs[job.id] = job
+            self._fila.append(job.id)
+            if chave_idempotencia:
+                self._idempotencia[(cliente, chave_idempotencia)] = job.id
+        self.sinalizar()
+        return job
+
+    def reservar(self) -> Optional[Job]:
+        with self._lock:
+            while self._fila:
+                job = self._jobs.get(self._fila.popleft())
+                if job is not None and job.status == PENDENTE:
+                    job.status = PROCESSANDO
+                    job.atualizado_em = time.time()
+                    return job
+        return None
+
+    def concluir(self, job_id: str, resultado: ResultadoCache, cache_hit: bool) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PROCESSANDO:
+                return
+            job.status = CONCLUIDO
+            job.resultado = resultado
+            job.cache_hit = cache_hit
+            job.conteudo = None
+            job.atualizado_em = time.time()
+            self._concluidos[job_id] = None
+            while self.max_resultados > 0 and len(self._concluidos) > self.max_resultados:
+                self._descartar(next(iter(self._concluidos)))
+        self.sinalizar()
+
+    def falhar(self, job_id: str, status_code: int, detalhe: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PROCESSANDO:
+                return
+            job.status = ERRO
+            job.erro_status = status_code
+            job.erro = detalhe
+            job.conteudo = None
+            job.atualizado_em = time.time()
+        self.sinalizar()
+
+    def cancelar(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in STATUS_FINAIS:
+                return False
+            job.status = CANCELADO
+            job.conteudo = None
+            job.atualizado_em = time.time()
+        self.sinalizar()
+        return True
+
+    def obter(self, job_id: str, com_resultado: bool = False) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            # Cópia sem o upload: quem consulta não segura nem altera o job da fila
+            return replace(job, conteudo=None, resultado=job.resultado if com_resultado else None)
+
+    def _descartar(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id, None)
+        self._concluidos.pop(job_id, None)
+        if job is not None and job.chave_idempotencia:
+            self._idempotencia.pop((job.cliente, job.chave_idempotencia), None)
+
+    def remover(self, job_id: str) -> None:
+        with self._lock:
+            self._descartar(job_id)
+
+    def pendentes(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status in (PENDENTE, PROCESSANDO))
+
+    def remover_expirados(self) -> int:
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            expirados = [
+                job.id for job in self._jobs.values()
+                if job.status in STATUS_FINAIS and job.atualizado_em < limite
+            ]
+        for job_id in expirados:
+            self.remover(job_id)
+        return len(expirados)
+
+    def sinalizar(self) -> None:
+        # Só é chamado a partir do event loop: o backend em memória não é bloqueante
+        if self._novidade is not None:
+            self._novidade.set()
+            self._novidade = None
+
+    async def esperar_novidade(self, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        # A fila sobrevive ao loop (ex.: lifespan reiniciado); um Event do loop anterior derrubaria o worker
+        if self._novidade is None or self._loop_novidade is not loop:
+            self._novidade = asyncio.Event()
+            self._loop_novidade = loop
+        try:
+            await asyncio.wait_for(self._novidade.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+_ESQUEMA_JOBS = """
+CREATE TABLE IF NOT EXISTS {tabela} (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL,
+    description TEXT NOT NULL,
+    template TEXT,
+    formato TEXT,
+    conteudo BLOB,
+    chave_idempotencia TEXT,
+    hash_pedido TEXT,
+    cliente TEXT,
+    texto_ia TEXT,
+    pdf BLOB,
+    nome_arquivo TEXT,
+    chave_cache TEXT,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    erro_status INTEGER,
+    erro TEXT
+)
+"""
+
+
+_COLUNAS_STATUS = (
+    "id, status, criado_em, atualizado_em, description, template, formato, chave_idempotencia, hash_pedido,"
+    " cliente, cache_hit, erro_status, erro"
+)
+_COLUNAS_RESULTADO = ", texto_ia, pdf, nome_arquivo, chave_cache"
+
+
+class FilaSqlite(FilaJobs):
+    bloqueante = True
+    compartilhada = True
+
+    def __init__(self, caminho: str, ttl_segundos: float, timeout_processamento: float):
+        self.caminho = caminho
+        self.ttl_segundos = ttl_segundos
+        self.timeout_processamento = timeout_processamento
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(_ESQUEMA_JOBS.format(tabela="jobs"))
+            conexao.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, criado_em)")
+            colunas = {linha["name"] for linha in conexao.execute("PRAGMA table_info(jobs)")}
+            if "template" not in colunas:
+                # Bancos criados antes da seleção de templates
+                conexao.execute("ALTER TABLE jobs ADD COLUMN template TEXT")
+            if "cliente" not in colunas:
+                # Bancos criados antes do controle de admissão
+                conexao.execute("ALTER TABLE jobs ADD COLUMN cliente TEXT")
+            if "formato" not in colunas:
+                # Bancos criados antes do modo JSON
+                conexao.execute("ALTER TABLE jobs ADD COLUMN formato TEXT")
+            if "chave_cache" not in colunas:
+                conexao.execute("ALTER TABLE jobs ADD COLUMN chave_cache TEXT")
+            if "hash_pedido" not in colunas:
+                # Bancos em que a chave de idempotência era global (UNIQUE na coluna)
+                self._migrar_idempotencia_por_cliente(conexao)
+            conexao.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_idempotencia ON jobs (cliente, chave_idempotencia)"
+            )
+
+    def _migrar_idempotencia_por_cliente(self, conexao: sqlite3.Connection) -> None:
+        # O SQLite não remove restrições com ALTER TABLE: a tabela é recriada sem o UNIQUE antigo
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            colunas = [linha["name"] for linha in conexao.execute("PRAGMA table_info(jobs)")]
+            if "hash_pedido" in colunas:
+                # Outro processo de workers migrou enquanto este esperava o lock
+                conexao.execute("COMMIT")
+                return
+            selecao = ", ".join("COALESCE(cliente, '-')" if coluna == "cliente" else coluna for coluna in colunas)
+            conexao.execute(_ESQUEMA_JOBS.format(tabela="jobs_migracao"))
+            conexao.execute(f"INSERT INTO jobs_migracao ({', '.join(colunas)}) SELECT {selecao} FROM jobs")
+            conexao.execute("DROP TABLE jobs")
+            conexao.execute("ALTER TABLE jobs_migracao RENAME TO jobs")
+            conexao.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, criado_em)")
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    def _job(self, linha: sqlite3.Row, com_resultado: bool = False) -> Job:
+        job = Job(
+            id=linha["id"],
+            status=linha["status"],
+            criado_em=linha["criado_em"],
+            atualizado_em=linha["atualizado_em"],
+            description=linha["description"],
+            template=linha["template"] or TEMPLATE_PADRAO,
+            formato=linha["formato"] or FORMATO_PDF,
+            chave_idempotencia=linha["chave_idempotencia"],
+            hash_pedido=linha["hash_pedido"],
+            cliente=linha["cliente"] or "-",
+            cache_hit=bool(linha["cache_hit"]),
+            erro_status=linha["erro_status"],
+            erro=linha["erro"],
+        )
+        if com_resultado and job.status == CONCLUIDO:
+            job.resultado = ResultadoCache(
+                texto_ia=linha["texto_ia"],
+                pdf=linha["pdf"],
+                nome_arquivo=linha["nome_arquivo"],
+                chave=linha["chave_cache"] or "",
+            )
+        return job
+
+    def enfileirar(
+        self,
+        conteudo: bytes,
+        description: str,
+        chave_idempotencia: Optional[str] = None,
+        template: str = TEMPLATE_PADRAO,
+        cliente: str = "-",
+        formato: str = FORMATO_PDF,
+        hash_pedido: Optional[str] = None,
+    ) -> Job:
+        agora = time.time()
+        job_id = uuid.uuid4().hex
+        with self._conectar() as conexao:
+            try:
+                conexao.execute(
+                    "INSERT INTO jobs"
+                    " (id, status, criado_em, atualizado_em, description, template, formato, conteudo,"
+                    " chave_idempotencia, hash_pedido, cliente) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, PENDENTE, agora, agora, description, template, formato, conteudo,
+                     chave_idempotencia, hash_pedido, cliente),
+                )
+            except sqlite3.IntegrityError:
+                linha = conexao.execute(
+                    f"SELECT {_COLUNAS_STATUS} FROM jobs WHERE cliente = ? AND chave_idempotencia = ?",
+                    (cliente, chave_idempotencia),
+                ).fetchone()
+                return self._job(linha)
+        return Job(
+            id=job_id,
+            status=PENDENTE,
+            criado_em=agora,
+            atualizado_em=agora,
+            description=description,
+            template=template,
+            formato=formato,
+            chave_idempotencia=chave_idempotencia,
+            hash_pedido=hash_pedido,
+            cliente=cliente,
+        )
+
+    def reservar(self) -> Optional[Job]:
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs presos em "processando" (worker encerrado no meio) voltam para a fila
+                linha = conexao.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND atualizado_em < ?)"
+                    " ORDER BY criado_em LIMIT 1",
+                    (PENDENTE, PROCESSANDO, agora - self.timeout_processamento),
+                ).fetchone()
+                if linha is None:
+                    conexao.execute("COMMIT")
+                    return None
+                conexao.execute(
+                    "UPDATE jobs SET status = ?, atualizado_em = ? WHERE id = ?",
+                    (PROCESSANDO, agora, linha["id"]),
+                )
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+        job = self._job(linha)
+        job.status = PROCESSANDO
+        job.atualizado_em = agora
+        job.conteudo = linha["conteudo"]
+        return job
+
+    def concluir(self, job_id: str, resultado: ResultadoCache, cache_hit: bool) -> None:
+        with self._conectar() as conexao:
+            conexao.execute(
+                "UPDATE jobs SET status = ?, atualizado_em = ?, conteudo = NULL, texto_ia = ?, pdf = ?,"
+                " nome_arquivo = ?, chave_cache = ?, cache_hit = ? WHERE id = ? AND status = ?",
+                (CONCLUIDO, time.time(), resultado.texto_ia, resultado.pdf, resultado.nome_arquivo,
+                 resultado.chave, int(cache_hit), job_id, PROCESSANDO),
+            )
+
+    def falhar(self, job_id: str, status_code: int, detalhe: str) -> None:
+        with self._conectar() as conexao:
+            conexao.execute(
+                "UPDATE jobs SET status = ?, atualizado_em = ?, conteudo = NULL, erro_status = ?, erro = ?"
+                " WHERE id = ? AND status = ?",
+                (ERRO, time.time(), status_code, detalhe, job_id, PROCESSANDO),
+            )
+
+    def cancelar(self, job_id: str) -> bool:
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "UPDATE jobs SET status = ?, atualizado_em = ?, conteudo = NULL WHERE id = ? AND status IN (?, ?)",
+                (CANCELADO, time.time(), job_id, PENDENTE, PROCESSANDO),
+            )
+            return cursor.rowcount > 0
+
+    def obter(self, job_id: str, com_resultado: bool = False) -> Optional[Job]:
+        # O upload (conteudo) nunca é lido aqui; o PDF só quando o resultado é pedido
+        colunas = _COLUNAS_STATUS + (_COLUNAS_RESULTADO if com_resultado else "")
+        with self._conectar() as conexao:
+            linha = conexao.execute(f"SELECT {colunas} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(linha, com_resultado) if linha is not None else None
+
+    def remover(self, job_id: str) -> None:
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def pendentes(self) -> int:
+        with self._conectar() as conexao:
+            return conexao.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDENTE, PROCESSANDO)
+            ).fetchone()[0]
+
+    def remover_expirados(self) -> int:
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND atualizado_em < ?",
+                (*STATUS_FINAIS, time.time() - self.ttl_segundos),
+            )
+            return cursor.rowcount
+
+
+def criar_fila() -> FilaJobs:
+    if config.JOBS_BACKEND == "memoria":
+        return FilaMemoria(config.JOBS_TTL_SEGUNDOS, config.JOBS_MAX_RESULTADOS)
+    if config.JOBS_BACKEND == "sqlite":
+        return FilaSqlite(config.JOBS_SQLITE_PATH, config.JOBS_TTL_SEGUNDOS, config.JOBS_TIMEOUT_PROCESSAMENTO)
+    raise ValueError(f"JOBS_BACKEND inválido: {config.JOBS_BACKEND!r} (use 'memoria' ou 'sqlite')")
+
+
+_fila: Optional[FilaJobs] = None
+_workers: List[asyncio.Task] = []
+_processos: List[multiprocessing.Process] = []
+_em_execucao: Dict[str, asyncio.Task] = {}
+_cancelados: Set[str] = set()
+
+
+def fila_jobs() -> FilaJobs:
+    global _fila
+    if _fila is None:
+        _fila = criar_fila()
+    return _fila
+
+
+async def _chamar(fila: FilaJobs, metodo: Callable[..., Any], *args: Any) -> Any:
+    if fila.bloqueante:
+        return await asyncio.to_thread(metodo, *args)
+    return metodo(*args)
+
+
+async def _vigiar_cancelamento(fila: FilaJobs, job_id: str) -> None:
+    # Termina quando o job é cancelado (ou removido) por fora do processo
+    while True:
+        await fila.esperar_novidade(config.JOBS_INTERVALO_POLL)
+        try:
+            atual = await _chamar(fila, fila.obter, job_id)
+        except sqlite3.Error as e:
+            logger.warning("Erro ao consultar o status do job %s: %s", job_id, e)
+            continue
+        if atual is None or atual.status == CANCELADO:
+            return
+
+
+async def _processar_job(fila: FilaJobs, processar: Processador, job: Job) -> Tuple[ResultadoCache, bool]:
+    execucao = asyncio.ensure_future(
+        processar(job.conteudo, job.description, template=job.template, formato=job.formato)
+    )
+    if not fila.compartilhada:
+        return await execucao
+    vigia = asyncio.ensure_future(_vigiar_cancelamento(fila, job.id))
+    try:
+        await asyncio.wait({execucao, vigia}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        vigia.cancel()
+        if not execucao.done():
+            execucao.cancel()
+            await asyncio.gather(execucao, return_exceptions=True)
+    if execucao.cancelled():
+        # Cancelado por DELETE ou por desconexão do cliente em outro processo: para as chamadas à IA
+        logger.info("Job %s cancelado durante o processamento", job.id)
+        _cancelados.add(job.id)
+        raise asyncio.CancelledError()
+    return execucao.result()
+
+
+async def _executar_job(fila: FilaJobs, processar: Processador, job: Job) -> None:
+    _em_execucao[job.id] = asyncio.current_task()
+    # Os logs do worker levam o id do job, registrado pela rota que o enfileirou
+    REQUEST_ID.set(f"job-{job.id}")
+    # As chamadas à IA do job entram na fila justa em nome de quem o enfileirou
+    CLIENTE.set(job.cliente)
+    observar_etapa("fila", max(0.0, time.time() - job.criado_em))
+    try:
+        resultado, cache_hit = await _processar_job(fila, processar, job)
+    except asyncio.CancelledError:
+        # Cancelamento pedido pelo cliente; no encerramento do worker o job
+        # fica em "processando" e é devolvido à fila após o timeout
+        if job.id in _cancelados:
+            _cancelados.discard(job.id)
+            return
+        raise
+    except HTTPException as e:
+        await _chamar(fila, fila.falhar, job.id, e.status_code, str(e.detail))
+    except ValueError as e:
+        await _chamar(fila, fila.falhar, job.id, status.HTTP_400_BAD_REQUEST, str(e))
+    except Exception as e:
+        logger.exception("Erro inesperado no job %s: %s", job.id, e)
+        await _chamar(
+            fila, fila.falhar, job.id, status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "Ocorreu um erro inesperado ao processar sua solicitação. Por favor, tente novamente mais tarde.",
+        )
+    else:
+        await _chamar(fila, fila.concluir, job.id, resultado, cache_hit)
+    finally:
+        _em_execucao.pop(job.id, None)
+
+
+async def _loop_worker(fila: FilaJobs, processar: Processador) -> None:
+    ultima_limpeza = 0.0
+    while True:
+        try:
+            if time.monotonic() - ultima_limpeza > 60:
+                await _chamar(fila, fila.remover_expirados)
+                ultima_limpeza = time.monotonic()
+            job = await _chamar(fila, fila.reservar)
+        except sqlite3.Error as e:
+            logger.error("Erro ao acessar a fila de jobs: %s", e)
+            job = None
+        if job is None:
+            await fila.esperar_novidade(config.JOBS_INTERVALO_POLL)
+            continue
+        await _executar_job(fila, processar, job)
+
+
+async def _main_processo(processar: Processador) -> None:
+    fila = fila_jobs()
+    await asyncio.gather(*(_loop_worker(fila, processar) for _ in range(config.JOBS_WORKERS)))
+
+
+def _executar_processo(processar: Processador) -> None:
+    extrair_em_serie()
+    configurar_logs()
+    try:
+        asyncio.run(_main_processo(processar))
+    except KeyboardInterrupt:
+        pass
+
+
+def iniciar_workers(processar: Processador) -> None:
+    fila = fila_jobs()
+    if config.JOBS_BACKEND == "sqlite" and config.JOBS_PROCESSOS > 0:
+        contexto = multiprocessing.get_context("spawn")
+        for numero in range(config.JOBS_PROCESSOS):
+            processo = contexto.Process(
+                target=_executar_processo, args=(processar,), name=f"cvv-jobs-{numero}", daemon=True
+            )
+            processo.start()
+            _processos.append(processo)
+        return
+    for _ in range(config.JOBS_WORKERS):
+        _workers.append(asyncio.create_task(_loop_worker(fila, processar)))
+
+
+async def encerrar_workers() -> None:
+    for tarefa in _workers:
+        tarefa.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    for processo in _processos:
+        processo.terminate()
+    for processo in _processos:
+        processo.join(timeout=5)
+    _processos.clear()
+
+
+def _hash_pedido(conteudo: bytes, description: str, template: str, formato: str) -> str:
+    resumo = hashlib.sha256(conteudo)
+    for campo in (description, template, formato):
+        resumo.update(b"\0" + campo.encode("utf-8"))
+    return resumo.hexdigest()
+
+
+async def enfileirar_job(
+    conteudo: bytes,
+    description: str,
+    chave_idempotencia: Optional[str] = None,
+    template: str = TEMPLATE_PADRAO,
+    cliente: Optional[str] = None,
+    formato: str = FORMATO_PDF,
+) -> Job:
+    fila = fila_jobs()
+    if await _chamar(fila, fila.pendentes) >= config.JOBS_MAX_PENDENTES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="A fila de processamento está cheia. Tente novamente em instantes.",
+            headers={"Retry-After": str(config.RETRY_AFTER_SEGUNDOS)},
+        )
+    if cliente is None:
+        cliente = CLIENTE.get()
+    hash_pedido = _hash_pedido(conteudo, description, template, formato)
+    job = await _chamar(
+        fila, fila.enfileirar, conteudo, description, chave_idempotencia, template, cliente, formato, hash_pedido
+    )
+    if job.hash_pedido != hash_pedido:
+        # Mesma chave com outro arquivo ou outra vaga: não devolve o job original
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="A chave de idempotência já foi usada com outro pedido",
+        )
+    logger.info("Job %s enfileirado", job.id)
+    return job
+
+
+async def obter_job(job_id: str, com_resultado: bool = False) -> Optional[Job]:
+    fila = fila_jobs()
+    return await _chamar(fila, fila.obter, job_id, com_resultado)
+
+
+async def remover_job(job_id: str) -> None:
+    fila = fila_jobs()
+    await _chamar(fila, fila.remover, job_id)
+
+
+async def cancelar_job(job_id: str) -> bool:
+    fila = fila_jobs()
+    cancelado = await _chamar(fila, fila.cancelar, job_id)
+    tarefa = _em_execucao.get(job_id)
+    if cancelado and tarefa is not None:
+        _cancelados.add(job_id)
+        tarefa.cancel()
+    return cancelado
+
+
+async def aguardar_job(job_id: str, request: Optional[Request] = None, timeout: Optional[float] = None) -> Job:
+    fila = fila_jobs()
+    if timeout is None:
+        timeout = config.JOBS_TIMEOUT_ESPERA
+    prazo = time.monotonic() + timeout
+    while True:
+        # Cada volta lê só o status; o resultado (PDF) é lido uma vez, no fim
+        job = await _chamar(fila, fila.obter, job_id)
+        if job is None or job.status in STATUS_FINAIS:
+            if job is not None and job.status == CONCLUIDO:
+                return await _chamar(fila, fila.obter, job_id, True)
+            return job
+        if request is not None and await request.is_disconnected():
+            raise ClienteDesconectado("O cliente encerrou a conexão antes do fim do processamento")
+        restante = prazo - time.monotonic()
+        if restante <= 0:
+            raise asyncio.TimeoutError()
+        await fila.esperar_novidade(min(config.JOBS_INTERVALO_POLL, restante))
@@ -0,0 +1,241 @@
+import inspect
+import threading
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import fitz
+
+# Mesma geometria do layout antigo: linha base a 0.8 do corpo e entrelinha de 1.2
+ASCENDENTE = 0.8
+ENTRELINHA = 1.2
+
+Cor = Tuple[float, float, float]
+
+
+class TabelaLarguras:
+    # Larguras em unidades de em (corpo 1), medidas com a mesma codificação usada pelo insert_text
+    def __init__(self, fonte: str):
+        self.fonte = fonte
+        self._larguras: Dict[str, float] = {
+            chr(codigo): fitz.get_text_length(chr(codigo), fontname=fonte, fontsize=1)
+            for codigo in range(32, 256)
+        }
+
+    def largura(self, texto: str, tamanho: float) -> float:
+        larguras = self._larguras
+        total = 0.0
+        for caractere in texto:
+            largura = larguras.get(caractere)
+            if largura is None:
+                largura = larguras[caractere] = fitz.get_text_length(caractere, fontname=self.fonte, fontsize=1)
+            total += largura
+        return total * tamanho
+
+
+_TABELAS: Dict[str, TabelaLarguras] = {}
+_TABELAS_LOCK = threading.Lock()
+
+
+def tabela_larguras(fonte: str) -> TabelaLarguras:
+    tabela = _TABELAS.get(fonte)
+    if tabela is None:
+        with _TABELAS_LOCK:
+            tabela = _TABELAS.get(fonte)
+            if tabela is None:
+                tabela = _TABELAS[fonte] = TabelaLarguras(fonte)
+    return tabela
+
+
+def _quebrar_palavra(palavra: str, tabela: TabelaLarguras, tamanho: float, largura_max: float) -> List[str]:
+    pedacos = []
+    inicio = 0
+    largura_atual = 0.0
+    for indice, caractere in enumerate(palavra):
+        largura = tabela.largura(caractere, tamanho)
+        if indice > inicio and largura_atual + largura > largura_max:
+            pedacos.append(palavra[inicio:indice])
+            inicio = indice
+            largura_atual = 0.0
+        largura_atual += largura
+    pedacos.append(palavra[inicio:])
+    return pedacos
+
+
+def quebrar_linhas(
+    tokens: Sequence[str], fonte: str, tamanho: float, largura_max: float, separador: str = " "
+) -> List[str]:
+    # Passada única: cada token é medido uma vez e as linhas são montadas por join no final
+    tabela = tabela_larguras(fonte)
+    largura_separador = tabela.largura(separador, tamanho)
+    linhas: List[str] = []
+    atual: List[str] = []
+    largura_atual = 0.0
+
+    for token in tokens:
+        if not token:
+            continue
+        largura = tabela.largura(token, tamanho)
+        if largura > largura_max:
+            if atual:
+                linhas.append(separador.join(atual))
+            pedacos = _quebrar_palavra(token, tabela, tamanho, largura_max)
+            linhas.extend(pedacos[:-1])
+            atual = [pedacos[-1]]
+            largura_atual = tabela.largura(pedacos[-1], tamanho)
+        elif atual and largura_atual + largura_separador + largura > largura_max:
+            linhas.append(separador.join(atual))
+            atual = [token]
+            largura_atual = largura
+        else:
+            largura_atual += (largura_separador if atual else 0.0) + largura
+            atual.append(token)
+
+    if atual:
+        linhas.append(separador.join(atual))
+    return linhas
+
+
+def _glifos_compartilhaveis() -> bool:
+    # _get_char_widths é privado: a troca só vale nas versões em que foi conferida (mesma assinatura
+    # e PDFs idênticos em tests/test_layout.py); fora delas o PyMuPDF calcula as tabelas como sempre
+    try:
+        versao = tuple(int(parte) for parte in fitz.VersionBind.split(".")[:2])
+        parametros = list(inspect.signature(fitz.Document._get_char_widths).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return (1, 23) <= versao <= (1, 28) and parametros == ["self", "xref", "bfname", "ext", "ordering", "limit", "idx"]
+
+
+# Com as tabelas compartilhadas, o bench_render passa de ~31 para ~114 renders/s (template clássico)
+GLIFOS_COMPARTILHADOS = _glifos_compartilhaveis()
+_FONTES_BASE14 = frozenset(fitz.Base14_fontdict.values())
+
+
+class _LarguraGlifosCache:
+    # O PyMuPDF recalcula a tabela de glifos de cada fonte em todo documento novo
+    # (até 8k glifos quando o texto tem caracteres fora do Latin-1); como ela só
+    # depende da fonte, é calculada uma vez por processo. Fontes lidas do próprio
+    # documento (xref) não entram: a tabela delas depende do arquivo
+    _tabelas: Dict[tuple, list] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, doc: fitz.Document):
+        self._original = doc._get_char_widths
+
+    def __call__(self, xref: int, nome: str, ext: str, ordering: int, limite: int, idx: int = 0) -> list:
+        if ordering < 0 and nome not in _FONTES_BASE14:
+            return self._original(xref, nome, ext, ordering, limite, idx)
+        chave = (nome, ext, ordering, limite, idx)
+        glifos = self._tabelas.get(chave)
+        if glifos is None:
+            glifos = self._original(xref, nome, ext, ordering, limite, idx)
+            with self._lock:
+                self._tabelas[chave] = glifos
+        return glifos
+
+
+class LayoutPdf:
+    def __init__(
+        self,
+        largura: float = 595,
+        altura: float = 842,
+        margem: float = 40,
+        moldura: Optional[fitz.Document] = None,
+        margem_esquerda: Optional[float] = None,
+    ):
+        self.largura = largura
+        self.altura = altura
+        self.margem = margem
+        self.margem_esquerda = margem if margem_esquerda is None else margem_esquerda
+        self.moldura = moldura
+        self.doc = fitz.open()
+        if GLIFOS_COMPARTILHADOS:
+            self.doc._get_char_widths = _LarguraGlifosCache(self.doc)
+        self.page = None
+        self.shape = None
+        self.y = margem
+        self.nova_pagina()
+
+    def nova_pagina(self) -> None:
+        self._gravar_pagina()
+        self.page = self.doc.new_page(width=self.largura, height=self.altura)
+        if self.moldura is not None:
+            # Elementos fixos do template entram como um XObject compartilhado pelas páginas
+            self.page.show_pdf_page(self.page.rect, self.moldura, 0)
+        # Todo o conteúdo variável da página vai num único content stream
+        self.shape = self.page.new_shape()
+        self.y = self.margem
+
+    def _gravar_pagina(self) -> None:
+        if self.shape is not None:
+            self.shape.commit()
+            self.shape = None
+
+    def _limite(self, tamanho: float) -> float:
+        return self.altura - self.margem - tamanho
+
+    def texto(
+        self,
+        texto: str,
+        fonte: str,
+        tamanho: float,
+        cor: Cor,
+        x: Optional[float] = None,
+        prefixo: str = "",
+    ) -> None:
+        if not texto or not str(texto).strip():
+            return
+        self.bloco(str(texto).split(), fonte, tamanho, cor, x=x, prefixo=prefixo)
+
+    def bloco(
+        self,
+        tokens: Sequence[str],
+        fonte: str,
+        tamanho: float,
+        cor: Cor,
+        x: Optional[float] = None,
+        prefixo: str = "",
+        separador: str = " ",
+    ) -> None:
+        x = self.margem_esquerda if x is None else x
+        # O prefixo (marcador) fica à esquerda e as linhas seguintes alinham com o texto
+        recuo = tabela_larguras(fonte).largura(prefixo, tamanho) if prefixo else 0.0
+        linhas = quebrar_linhas(tokens, fonte, tamanho, self.largura - self.margem - x - recuo, separador)
+        if not linhas:
+            return
+
+        altura_linha = tamanho * ENTRELINHA
+        inicio = 0
+        while inicio < len(linhas):
+            if self.y > self._limite(tamanho):
+                self.nova_pagina()
+            cabem = int((self._limite(tamanho) - self.y) // altura_linha) + 1
+            trecho = linhas[inicio:inicio + cabem]
+            linha_base = self.y + tamanho * ASCENDENTE
+            if prefixo and inicio == 0:
+                self.shape.insert_text((x, linha_base), prefixo, fontname=fonte, fontsize=tamanho, color=cor)
+            # Um único bloco de texto por trecho de página
+            self.shape.insert_text(
+                (x + recuo, linha_base),
+                "\n".join(trecho),
+                fontname=fonte,
+                fontsize=tamanho,
+                color=cor,
+                lineheight=ENTRELINHA,
+            )
+            self.y += altura_linha * len(trecho)
+            inicio += len(trecho)
+
+    def linha(self, x0: float, x1: float, y: float, cor: Cor, espessura: float) -> None:
+        self.shape.draw_line((x0, y), (x1, y))
+        self.shape.finish(color=cor, width=espessura)
+
+    def salvar(self) -> BytesIO:
+        self._gravar_pagina()
+        buffer = BytesIO()
+        self.doc.save(buffer, garbage=1, deflate=True)
+        buffer.seek(0)
+        return buffer
+
+    def fechar(self) -> None:
+        self.doc.close()
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Optional
+
+from services import config
+
+
+class ClienteDesconectado(Exception):
+    pass
+
+
+async def executar_llm_async(chamada: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    # A concorrência e a ordem das chamadas ficam com a fila justa de services.admissao. A desconexão
+    # do cliente é vigiada por aguardar_job (services.jobs): o job é cancelado e a chamada junto com ele
+    if timeout is None:
+        timeout = config.LLM_TIMEOUT_SEGUNDOS
+    return await asyncio.wait_for(chamada, timeout)
+
+
+async def transmitir_llm_async(
+    fluxo: AsyncIterator[str],
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    if timeout is None:
+        timeout = config.LLM_TIMEOUT_SEGUNDOS
+    loop = asyncio.get_running_loop()
+    prazo = loop.time() + timeout
+    iterador = fluxo.__aiter__()
+    try:
+        while True:
+            restante = prazo - loop.time()
+            if restante <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                trecho = await asyncio.wait_for(iterador.__anext__(), restante)
+            except StopAsyncIteration:
+                return
+            yield trecho
+    finally:
+        fechar = getattr(iterador, "aclose", None)
+        if fechar is not None:
+            await fechar()
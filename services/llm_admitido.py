@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.runnables import Runnable
+
+from services import config
+from services.admissao import CLIENTE, CapacidadeEsgotada, eh_limite_provedor, espera_retentativa, fila_llm
+from services.observabilidade import REJEICOES_ADMISSAO, RETENTATIVAS_LLM
+
+logger = logging.getLogger(__name__)
+
+
+def _esgotado(erro: BaseException) -> CapacidadeEsgotada:
+    REJEICOES_ADMISSAO.labels("limite_provedor").inc()
+    logger.warning("Limite do provedor de IA persistiu após %s retentativa(s): %s", config.LLM_RETENTATIVAS, erro)
+    return CapacidadeEsgotada(
+        "O provedor de IA está no limite de uso. Tente novamente em instantes.", config.LLM_RETENTATIVA_MAX_SEGUNDOS
+    )
+
+
+def _max_retentativas() -> int:
+    return max(0, config.LLM_RETENTATIVAS)
+
+
+class LLMAdmitido(Runnable):
+    # Envolve o modelo (ou o modelo com saída estruturada): cada chamada passa pela fila justa
+    # e é repetida com backoff quando o provedor responde com limite ou indisponibilidade
+    def __init__(self, llm: Runnable):
+        self.llm = llm
+
+    @property
+    def InputType(self) -> Any:
+        return self.llm.InputType
+
+    @property
+    def OutputType(self) -> Any:
+        return self.llm.OutputType
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        # Caminho síncrono (fora do event loop): só as retentativas, sem a fila
+        for tentativa in range(_max_retentativas() + 1):
+            try:
+                return self.llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                if not eh_limite_provedor(e):
+                    raise
+                if tentativa == _max_retentativas():
+                    raise _esgotado(e) from e
+                RETENTATIVAS_LLM.inc()
+                time.sleep(espera_retentativa(tentativa, e))
+
+    async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        for tentativa in range(_max_retentativas() + 1):
+            async with fila_llm().vez(CLIENTE.get()):
+                try:
+                    return await self.llm.ainvoke(input, config, **kwargs)
+                except Exception as e:
+                    if not eh_limite_provedor(e):
+                        raise
+                    if tentativa == _max_retentativas():
+                        raise _esgotado(e) from e
+                    erro = e
+            RETENTATIVAS_LLM.inc()
+            # A espera acontece fora da fila, liberando a vaga para outros clientes
+            await asyncio.sleep(espera_retentativa(tentativa, erro))
+
+    async def astream(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        for tentativa in range(_max_retentativas() + 1):
+            recebeu = False
+            async with fila_llm().vez(CLIENTE.get()):
+                try:
+                    async for trecho in self.llm.astream(input, config, **kwargs):
+                        recebeu = True
+                        yield trecho
+                    return
+                except Exception as e:
+                    # Depois do primeiro trecho o cliente já recebeu parte da resposta: não há como repetir
+                    if recebeu or not eh_limite_provedor(e):
+                        raise
+                    if tentativa == _max_retentativas():
+                        raise _esgotado(e) from e
+                    erro = e
+            RETENTATIVAS_LLM.inc()
+            await asyncio.sleep(espera_retentativa(tentativa, erro))
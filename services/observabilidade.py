@@ -0,0 +1,227 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from services import config
+
+REQUEST_ID: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+_REQUEST_ID_VALIDO = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Com PROMETHEUS_MULTIPROC_DIR definido os gauges somam os valores dos processos vivos
+_MODO_GAUGE = "livesum"
+
+BUCKETS_ETAPA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+DURACAO_HTTP = Histogram(
+    "cvv_http_duracao_segundos",
+    "Duração das requisições HTTP",
+    ["metodo", "rota", "status"],
+    buckets=BUCKETS_ETAPA,
+)
+HTTP_EM_ANDAMENTO = Gauge(
+    "cvv_http_em_andamento",
+    "Requisições HTTP em andamento",
+    ["metodo"],
+    multiprocess_mode=_MODO_GAUGE,
+)
+DURACAO_ETAPA = Histogram(
+    "cvv_etapa_duracao_segundos",
+    "Duração de cada etapa do pipeline",
+    ["etapa"],
+    buckets=BUCKETS_ETAPA,
+)
+ETAPAS_EM_ANDAMENTO = Gauge(
+    "cvv_etapa_em_andamento",
+    "Etapas do pipeline em andamento",
+    ["etapa"],
+    multiprocess_mode=_MODO_GAUGE,
+)
+ERROS_ETAPA = Counter(
+    "cvv_etapa_erros_total",
+    "Etapas do pipeline que terminaram com erro",
+    ["etapa"],
+)
+TOKENS_CONTEXTO = Histogram(
+    "cvv_contexto_tokens",
+    "Tokens estimados do currículo antes e depois da redução de contexto",
+    ["fase"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+CONTEXTO_OBRIGATORIO_CORTADO = Counter(
+    "cvv_contexto_obrigatorio_cortado_total",
+    "Currículos em que só os trechos obrigatórios (cabeçalho e contato) já passavam do orçamento de contexto",
+)
+RESPOSTAS_ESTRUTURADAS = Counter(
+    "cvv_llm_respostas_estruturadas_total",
+    "Respostas do modo estruturado: válidas de primeira, reparadas ou resolvidas pelo modo texto",
+    ["resultado"],
+)
+GERACOES_SECOES = Counter(
+    "cvv_llm_geracoes_secoes_total",
+    "Gerações por seções em paralelo: juntadas ou resolvidas pela chamada única",
+    ["resultado"],
+)
+ESPERA_FILA_LLM = Histogram(
+    "cvv_llm_fila_espera_segundos",
+    "Espera na fila justa antes de cada chamada à IA",
+    buckets=BUCKETS_ETAPA,
+)
+FILA_LLM = Gauge(
+    "cvv_llm_fila_tamanho",
+    "Chamadas à IA aguardando na fila justa",
+    multiprocess_mode=_MODO_GAUGE,
+)
+REJEICOES_ADMISSAO = Counter(
+    "cvv_admissao_rejeicoes_total",
+    "Pedidos rejeitados pelo controle de admissão",
+    ["motivo"],
+)
+PEDIDOS_COALESCIDOS = Counter(
+    "cvv_pedidos_coalescidos_total",
+    "Pedidos que aguardaram uma geração idêntica já em andamento em vez de chamar a IA",
+)
+GERACOES_COMPARTILHADAS = Gauge(
+    "cvv_geracoes_compartilhadas_em_andamento",
+    "Gerações em andamento que podem receber pedidos idênticos",
+    multiprocess_mode=_MODO_GAUGE,
+)
+RETENTATIVAS_LLM = Counter(
+    "cvv_llm_retentativas_total",
+    "Chamadas à IA repetidas após limite de uso ou indisponibilidade do provedor",
+)
+INICIALIZACAO_COMPONENTE = Gauge(
+    "cvv_componente_inicializacao_segundos",
+    "Tempo de inicialização de cada componente pesado (cliente da IA, recuperação, pool de renderização)",
+    ["componente"],
+    multiprocess_mode="livemax",
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _FiltroRequestId(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = REQUEST_ID.get()
+        return True
+
+
+class _FormatadorJson(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            registro["exc"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False)
+
+
+def configurar_logs() -> None:
+    raiz = logging.getLogger()
+    if any(isinstance(f, _FiltroRequestId) for h in raiz.handlers for f in h.filters):
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(_FiltroRequestId())
+    if config.LOG_FORMATO == "json":
+        handler.setFormatter(_FormatadorJson())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    raiz.addHandler(handler)
+    raiz.setLevel(config.LOG_NIVEL)
+
+
+def novo_request_id(recebido: str = "") -> str:
+    if recebido and _REQUEST_ID_VALIDO.match(recebido):
+        return recebido
+    return uuid.uuid4().hex
+
+
+def observar_etapa(nome: str, segundos: float) -> None:
+    DURACAO_ETAPA.labels(nome).observe(segundos)
+
+
+@contextmanager
+def etapa(nome: str) -> Iterator[None]:
+    em_andamento = ETAPAS_EM_ANDAMENTO.labels(nome)
+    em_andamento.inc()
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERROS_ETAPA.labels(nome).inc()
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        em_andamento.dec()
+        observar_etapa(nome, duracao)
+        logger.debug("etapa %s: %.1fms", nome, duracao * 1000)
+
+
+def exportar_metricas() -> bytes:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest(REGISTRY)
+
+
+def _rota(scope) -> str:
+    # O roteador grava a rota encontrada no scope; o template (ex.: /cvv/jobs/{job_id})
+    # evita uma série por caminho
+    return getattr(scope.get("route"), "path", None) or "desconhecida"
+
+
+class MiddlewareObservabilidade:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = dict(scope.get("headers") or [])
+        request_id = novo_request_id(cabecalhos.get(b"x-request-id", b"").decode("latin-1"))
+        token = REQUEST_ID.set(request_id)
+        metodo = scope["method"]
+        status_code = 500
+
+        async def enviar(mensagem):
+            nonlocal status_code
+            if mensagem["type"] == "http.response.start":
+                status_code = mensagem["status"]
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(mensagem)
+
+        inicio = time.perf_counter()
+        try:
+            with HTTP_EM_ANDAMENTO.labels(metodo).track_inprogress():
+                await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            DURACAO_HTTP.labels(metodo, _rota(scope), str(status_code)).observe(duracao)
+            logger.info("%s %s %s %.1fms", metodo, scope.get("path", ""), status_code, duracao * 1000)
+            REQUEST_ID.reset(token)
@@ -0,0 +1,198 @@
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECOES_LINHA_UNICA = ("NOME", "CARGO", "RESUMO")
+SECOES_LISTA = ("EXPERIENCIA", "FORMACAO", "COMPETENCIAS", "CONTATO")
+
+MAPA_SECOES = {
+    "EXPERIENCIA": "EXPERIENCIA",
+    "EXPERIÊNCIA": "EXPERIENCIA",
+    "EXPERIÊNCIAS": "EXPERIENCIA",
+    "FORMAÇÃO": "FORMACAO",
+    "FORMACAO": "FORMACAO",
+    "FORMAÇÕES": "FORMACAO",
+    "COMPETENCIA": "COMPETENCIAS",
+    "COMPETÊNCIA": "COMPETENCIAS",
+    "COMPETENCIAS": "COMPETENCIAS",
+    "COMPETÊNCIAS": "COMPETENCIAS",
+    "HABILIDADES": "COMPETENCIAS",
+    "CONTATO": "CONTATO",
+    "CONTATOS": "CONTATO"
+}
+
+_SECOES_LINHA_UNICA = frozenset(SECOES_LINHA_UNICA)
+_MARCADORES_ITEM = "-•* "
+
+# (tipo, nome, conteudo): tipo é "secao" ou "experiencia"
+Evento = Tuple[str, str, Any]
+
+
+def sem_marca_titulo(texto: str) -> str:
+    # "## " e "### " marcam títulos no texto extraído do PDF; a IA às vezes os copia para a resposta
+    return texto.strip().lstrip("#").strip()
+
+
+def dados_vazios() -> Dict[str, Any]:
+    return {
+        "NOME": "",
+        "CARGO": "",
+        "RESUMO": "",
+        "EXPERIENCIA": [],
+        "FORMACAO": [],
+        "COMPETENCIAS": [],
+        "CONTATO": [],
+        "METADADOS": {
+            "TITULO": "",
+            "AUTOR": "",
+            "PALAVRAS_CHAVE": "",
+            "DESCRICAO": "",
+            "CATEGORIA": "currículo"
+        }
+    }
+
+
+class ParserIncremental:
+    def __init__(self):
+        self.data = dados_vazios()
+        self._vistos: Dict[str, Set[str]] = {secao: set() for secao in SECOES_LISTA if secao != "EXPERIENCIA"}
+        self._secao: Optional[str] = None
+        self._partes: List[str] = []
+        self._eventos: List[Evento] = []
+
+    def alimentar(self, trecho: str) -> List[Evento]:
+        if "\n" not in trecho:
+            self._partes.append(trecho)
+            return []
+        self._partes.append(trecho)
+        *linhas, resto = "".join(self._partes).split("\n")
+        self._partes = [resto] if resto else []
+        for linha in linhas:
+            self._processar_linha(linha)
+        return self._coletar_eventos()
+
+    def finalizar(self) -> List[Evento]:
+        if self._partes:
+            self._processar_linha("".join(self._partes))
+            self._partes = []
+        self._mudar_secao(None)
+        return self._coletar_eventos()
+
+    def resultado(self) -> Dict[str, Any]:
+        return self.data
+
+    def _coletar_eventos(self) -> List[Evento]:
+        eventos, self._eventos = self._eventos, []
+        return eventos
+
+    def _emitir_secao(self, secao: str) -> None:
+        conteudo = self.data[secao]
+        if isinstance(conteudo, list):
+            conteudo = list(conteudo)
+        elif isinstance(conteudo, dict):
+            conteudo = dict(conteudo)
+        self._eventos.append(("secao", secao, conteudo))
+
+    def _mudar_secao(self, secao: Optional[str]) -> None:
+        anterior = self._secao
+        if anterior == "METADADOS" and secao is None:
+            self._emitir_secao("METADADOS")
+        elif anterior in SECOES_LISTA:
+            if anterior == "EXPERIENCIA" and self.data["EXPERIENCIA"]:
+                self._eventos.append(("experiencia", "EXPERIENCIA", self.data["EXPERIENCIA"][-1]))
+            self._emitir_secao(anterior)
+        self._secao = secao
+
+    def _processar_linha(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+
+        if line.startswith("```") and "METADADOS" in line.upper():
+            self._mudar_secao("METADADOS")
+            return
+
+        # O prompt pede "```" numa linha e "METADADOS:" na seguinte
+        if line.rstrip(":").strip().upper() == "METADADOS":
+            self._mudar_secao("METADADOS")
+            return
+
+        if self._secao == "METADADOS":
+            if line.startswith("```"):
+                self._mudar_secao(None)
+                return
+            if ":" in line:
+                key_part, value = line.split(":", 1)
+                key_part = key_part.strip().upper()
+                if key_part in self.data["METADADOS"]:
+                    self.data["METADADOS"][key_part] = value.strip()
+                    return
+                if key_part not in _SECOES_LINHA_UNICA and line.rstrip(":").strip().upper() not in MAPA_SECOES:
+                    return
+                # Metadados sem a cerca de fechamento terminam na primeira seção do currículo
+                self._mudar_secao(None)
+            else:
+                return
+
+        if ":" in line:
+            key_part, value = line.split(":", 1)
+            key_part = key_part.strip().upper()
+            if key_part in _SECOES_LINHA_UNICA:
+                value = sem_marca_titulo(value)
+                self._mudar_secao(None)
+                if value:
+                    self.data[key_part] = value
+                    self._emitir_secao(key_part)
+                return
+
+        if line.endswith(":"):
+            self._mudar_secao(MAPA_SECOES.get(line[:-1].strip().upper()))
+            return
+
+        secao = self._secao
+        if secao is None:
+            return
+        content = line.lstrip(_MARCADORES_ITEM).strip()
+        if not content:
+            return
+
+        itens = self.data[secao]
+        if secao == "EXPERIENCIA":
+            if "|" in content:
+                if itens:
+                    self._eventos.append(("experiencia", secao, itens[-1]))
+                itens.append({"titulo": content, "detalhes": []})
+            elif itens:
+                itens[-1]["detalhes"].append(content)
+        elif content not in self._vistos[secao]:
+            self._vistos[secao].add(content)
+            itens.append(content)
+
+
+def parse_resposta_ia(texto_ia: str) -> Dict[str, Any]:
+    if not texto_ia or not isinstance(texto_ia, str) or not texto_ia.strip():
+        logger.error("Texto da IA vazio ou inválido")
+        return dados_vazios()
+
+    parser = ParserIncremental()
+    parser.alimentar(texto_ia)
+    parser.finalizar()
+    return parser.resultado()
+
+
+def formatar_resposta_texto(dados: Dict[str, Any]) -> str:
+    # Inverso de parse_resposta_ia: gera o texto no formato que o prompt pede à IA
+    metadados = {**dados_vazios()["METADADOS"], **(dados.get("METADADOS") or {})}
+    partes = ["```", "METADADOS:"]
+    partes += [f"{chave}: {valor}" for chave, valor in metadados.items()]
+    partes += ["```", ""]
+    for secao in SECOES_LINHA_UNICA:
+        partes += [f"{secao}: {dados.get(secao, '')}", ""]
+    partes.append("EXPERIENCIA:")
+    for experiencia in dados.get("EXPERIENCIA", []):
+        partes.append(f"- {experiencia['titulo']}")
+        partes += [f"  - {detalhe}" for detalhe in experiencia.get("detalhes", [])]
+    for secao in ("COMPETENCIAS", "FORMACAO", "CONTATO"):
+        partes += ["", f"{secao}:"] + [f"- {item}" for item in dados.get(secao, [])]
+    return "\n".join(partes)
@@ -0,0 +1,405 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from abc import abstractmethod
+from operator import itemgetter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from langchain_core.runnables import Runnable, RunnableMap, RunnablePassthrough
+from pydantic import Field
+
+from services import config
+from services.parser import formatar_resposta_texto, parse_resposta_ia, sem_marca_titulo
+from services.vaga import eh_tecnologia
+
+logger = logging.getLogger(__name__)
+
+PROVEDORES = ("google", "local", "replay")
+
+# Mesma estimativa usada na redução de contexto (~4 caracteres por token)
+CARACTERES_POR_TOKEN = 4
+# Tamanho dos pedaços emitidos no streaming simulado
+TOKENS_POR_PEDACO = 16
+
+_MARCADOR_CURRICULO = "CURRÍCULO ORIGINAL:"
+_MARCADOR_VAGA = "VAGA DESCRITA:"
+_MARCADOR_PALAVRAS = "PALAVRAS-CHAVE DA VAGA"
+_MARCADOR_REPARO = "RESPOSTA ANTERIOR:"
+_MARCADOR_SECOES = "SEÇÕES PEDIDAS:"
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_TELEFONE = re.compile(r"\(?\d{2}\)?\s?9?\d{4}[-\s]?\d{4}")
+_ANO = re.compile(r"\b(19|20)\d{2}\b")
+_FORMACAO = re.compile(r"bacharel|gradua|tecn[oó]log|mestrad|doutorad|licenciatura|universidade|faculdade|mba", re.I)
+
+VERBOS = ["Orquestrei", "Otimizei", "Escalei", "Implementei", "Liderei", "Automatizei", "Reestruturei", "Entreguei"]
+RESULTADOS = [
+    "reduzindo o tempo de resposta em {n}%",
+    "aumentando a produtividade do time em {n}%",
+    "cortando custos de infraestrutura em {n}%",
+    "elevando a cobertura de testes para {n}%",
+    "diminuindo incidentes em produção em {n}%",
+]
+
+
+class LimiteProvedor(Exception):
+    # Simula o 429 do provedor (ResourceExhausted no Gemini) nos provedores offline
+    code = 429
+
+
+def chave_mensagens(mensagens: List[BaseMessage]) -> str:
+    conteudo = json.dumps([(m.type, m.content) for m in mensagens], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def estimar_tokens(texto: str) -> int:
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+class ModeloLatencia:
+    # Latência = base + custo por token de entrada + custo por token de saída, multiplicada
+    # por um fator lognormal (jitter) sorteado pela semente do pedido, para ser reprodutível
+    def __init__(self, base_ms: float, ms_por_token_entrada: float, ms_por_token_saida: float, jitter: float):
+        self.base_ms = base_ms
+        self.ms_por_token_entrada = ms_por_token_entrada
+        self.ms_por_token_saida = ms_por_token_saida
+        self.jitter = jitter
+
+    @classmethod
+    def da_configuracao(cls) -> "ModeloLatencia":
+        return cls(
+            config.LLM_LATENCIA_BASE_MS,
+            config.LLM_LATENCIA_MS_POR_TOKEN_ENTRADA,
+            config.LLM_LATENCIA_MS_POR_TOKEN_SAIDA,
+            config.LLM_LATENCIA_JITTER,
+        )
+
+    def fator(self, rng: random.Random) -> float:
+        return rng.lognormvariate(0.0, self.jitter) if self.jitter > 0 else 1.0
+
+    def primeiro_token(self, tokens_entrada: int, fator: float) -> float:
+        return (self.base_ms + tokens_entrada * self.ms_por_token_entrada) * fator / 1000
+
+    def por_token_saida(self, fator: float) -> float:
+        return self.ms_por_token_saida * fator / 1000
+
+    def total(self, tokens_entrada: int, tokens_saida: int, fator: float) -> float:
+        return self.primeiro_token(tokens_entrada, fator) + tokens_saida * self.por_token_saida(fator)
+
+
+def _entre(texto: str, inicio: str, fim: Optional[str]) -> str:
+    posicao = texto.find(inicio)
+    if posicao < 0:
+        return ""
+    trecho = texto[posicao + len(inicio):]
+    if fim and fim in trecho:
+        trecho = trecho[:trecho.find(fim)]
+    return trecho.strip()
+
+
+def _linhas(texto: str) -> List[str]:
+    return [" ".join(linha.split()) for linha in texto.splitlines() if linha.strip()]
+
+
+def curriculo_sintetico(mensagens: List[BaseMessage], rng: random.Random) -> Dict[str, Any]:
+    # Currículo plausível montado só com o que está no prompt: o nome e os contatos vêm do CV,
+    # as experiências das linhas com "|" ou anos, e as conquistas combinam as palavras-chave da vaga
+    prompt = "\n".join(str(m.content) for m in mensagens)
+    # Sem as marcas "## "/"### " da extração, que o prompt pede para não copiar
+    curriculo = [linha for linha in map(sem_marca_titulo, _linhas(_entre(prompt, _MARCADOR_CURRICULO, _MARCADOR_VAGA))) if linha]
+    vaga = _linhas(_entre(prompt, _MARCADOR_VAGA, _MARCADOR_PALAVRAS))
+    bloco_palavras = _linhas(_entre(prompt, _MARCADOR_PALAVRAS, None))
+    palavras = [p.strip() for p in (bloco_palavras[-1] if len(bloco_palavras) > 1 else "").split(",") if p.strip()]
+    if palavras == ["nenhuma identificada"]:
+        palavras = []
+    destaques = palavras or ["resultados"]
+
+    nome = curriculo[0][:60] if curriculo else "Candidato"
+    cargo = " ".join(vaga[0].split()[:6]) if vaga else "Profissional"
+    contatos = []
+    for linha in curriculo:
+        email = _EMAIL.search(linha)
+        telefone = _TELEFONE.search(linha)
+        if email and not any("Email" in c for c in contatos):
+            contatos.append(f"Email: {email.group(0)}")
+        if telefone and not any("Telefone" in c for c in contatos):
+            contatos.append(f"Telefone: {telefone.group(0)}")
+        for rede in ("LinkedIn", "GitHub"):
+            if rede.lower() in linha.lower() and not any(rede in c for c in contatos):
+                contatos.append(f"{rede}: {linha.split(':', 1)[-1].strip()}")
+
+    formacao = [linha[:120] for linha in curriculo if _FORMACAO.search(linha)][:3]
+    titulos = [
+        linha[:120] for linha in curriculo[1:]
+        if ("|" in linha or _ANO.search(linha)) and linha[:120] not in formacao and len(linha) <= 160
+    ][:4] or [f"{cargo} | Empresa | Atual"]
+
+    experiencia = []
+    for titulo in titulos:
+        detalhes = []
+        for _ in range(rng.randint(2, 4)):
+            palavra = rng.choice(destaques)
+            resultado = rng.choice(RESULTADOS).format(n=rng.randint(10, 60))
+            detalhes.append(f"{rng.choice(VERBOS)} iniciativas de {palavra}, {resultado}")
+        experiencia.append({"titulo": titulo if "|" in titulo else f"{titulo} | Empresa | Período", "detalhes": detalhes})
+
+    tecnologias = [p for p in palavras if eh_tecnologia(p)]
+    outras = [p for p in palavras if not eh_tecnologia(p)]
+    competencias = []
+    if tecnologias:
+        competencias.append(f"Tecnologias: {', '.join(tecnologias)}")
+    if outras:
+        competencias.append(f"Competências: {', '.join(outras)}")
+
+    lista_palavras = ", ".join(destaques[:5])
+    return {
+        "METADADOS": {
+            "TITULO": cargo,
+            "AUTOR": nome,
+            "PALAVRAS_CHAVE": palavras[:10],
+            "DESCRICAO": " ".join(vaga)[:200],
+            "CATEGORIA": "currículo",
+        },
+        "NOME": nome,
+        "CARGO": cargo,
+        "RESUMO": (
+            f"{cargo} com histórico de entregas em {lista_palavras}. "
+            f"Atuação orientada a resultados, combinando {lista_palavras} para resolver os desafios da vaga."
+        ),
+        "EXPERIENCIA": experiencia,
+        "COMPETENCIAS": competencias,
+        "FORMACAO": formacao,
+        "CONTATO": contatos,
+    }
+
+
+def _em_texto(dados: Dict[str, Any]) -> str:
+    metadados = dict(dados.get("METADADOS") or {})
+    if isinstance(metadados.get("PALAVRAS_CHAVE"), list):
+        metadados["PALAVRAS_CHAVE"] = ", ".join(metadados["PALAVRAS_CHAVE"])
+    return formatar_resposta_texto({**dados, "METADADOS": metadados})
+
+
+def adaptar_formato(resposta: str, formato: str) -> str:
+    # Gravações do modo texto servem ao modo estruturado e vice-versa
+    eh_json = resposta.lstrip().startswith("{")
+    if formato == "json" and not eh_json:
+        dados = parse_resposta_ia(resposta)
+        dados["METADADOS"]["PALAVRAS_CHAVE"] = [
+            p.strip() for p in dados["METADADOS"]["PALAVRAS_CHAVE"].split(",") if p.strip()
+        ]
+        return json.dumps(dados, ensure_ascii=False)
+    if formato == "texto" and eh_json:
+        try:
+            return _em_texto(json.loads(resposta))
+        except (ValueError, TypeError, AttributeError):
+            return resposta
+    return resposta
+
+
+class LLMSimulado(BaseChatModel):
+    # Base dos provedores offline: devolve a resposta de _responder depois da latência simulada
+    modelo: str = "simulado"
+    formato: str = "texto"
+    semente: int = 0
+    taxa_limite: float = 0.0
+    latencia: ModeloLatencia = Field(default_factory=ModeloLatencia.da_configuracao)
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulado"
+
+    @abstractmethod
+    def _responder(self, mensagens: List[BaseMessage], rng: random.Random) -> str: ...
+
+    def _preparar(self, mensagens: List[BaseMessage]) -> Tuple[str, int, float]:
+        if self.taxa_limite > 0 and random.random() < self.taxa_limite:
+            raise LimiteProvedor("Limite de requisições do provedor simulado")
+        chave = chave_mensagens(mensagens)
+        rng = random.Random(f"{self.semente}:{chave}")
+        fator = self.latencia.fator(rng)
+        resposta = self._responder(mensagens, rng)
+        tokens_entrada = sum(estimar_tokens(str(m.content)) for m in mensagens)
+        return resposta, tokens_entrada, fator
+
+    def _resultado(self, resposta: str, tokens_entrada: int) -> ChatResult:
+        # Uso de tokens e nome do modelo como o Gemini reporta, para get_usage_metadata_callback contar
+        tokens_saida = estimar_tokens(resposta)
+        mensagem = AIMessage(
+            content=resposta,
+            response_metadata={"model_name": self.modelo},
+            usage_metadata={
+                "input_tokens": tokens_entrada,
+                "output_tokens": tokens_saida,
+                "total_tokens": tokens_entrada + tokens_saida,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=mensagem)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        resposta, tokens_entrada, fator = self._preparar(messages)
+        time.sleep(self.latencia.total(tokens_entrada, estimar_tokens(resposta), fator))
+        return self._resultado(resposta, tokens_entrada)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        resposta, tokens_entrada, fator = self._preparar(messages)
+        await asyncio.sleep(self.latencia.total(tokens_entrada, estimar_tokens(resposta), fator))
+        return self._resultado(resposta, tokens_entrada)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        resposta, tokens_entrada, fator = self._preparar(messages)
+        await asyncio.sleep(self.latencia.primeiro_token(tokens_entrada, fator))
+        tamanho = TOKENS_POR_PEDACO * CARACTERES_POR_TOKEN
+        for inicio in range(0, len(resposta), tamanho):
+            pedaco = resposta[inicio:inicio + tamanho]
+            await asyncio.sleep(estimar_tokens(pedaco) * self.latencia.por_token_saida(fator))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=pedaco))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(pedaco, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Runnable:
+        # Equivalente ao json_mode do Gemini: a cópia responde em JSON e o parser valida pelo schema
+        llm = self.model_copy(update={"formato": "json"})
+        parser = PydanticOutputParser(pydantic_object=schema)
+        if not include_raw:
+            return llm | parser
+        com_parse = RunnablePassthrough.assign(
+            parsed=itemgetter("raw") | parser, parsing_error=lambda _: None
+        )
+        sem_parse = RunnablePassthrough.assign(parsed=lambda _: None)
+        return RunnableMap(raw=llm) | com_parse.with_fallbacks([sem_parse], exception_key="parsing_error")
+
+
+class LLMLocal(LLMSimulado):
+    @property
+    def _llm_type(self) -> str:
+        return "local"
+
+    def _responder(self, mensagens: List[BaseMessage], rng: random.Random) -> str:
+        prompt = "\n".join(str(m.content) for m in mensagens)
+        if _MARCADOR_REPARO in prompt and _MARCADOR_CURRICULO not in prompt:
+            # Reparo: devolve a resposta anterior no formato pedido
+            anterior = _entre(prompt, _MARCADOR_REPARO, "ERROS DE VALIDAÇÃO:")
+            return adaptar_formato(anterior, self.formato)
+        dados = curriculo_sintetico(mensagens, rng)
+        secoes = _entre(prompt, _MARCADOR_SECOES, "\n")
+        if secoes:
+            # Geração por seções: só as seções pedidas (e nome e cargo), como um modelo real responderia
+            pedidas = {"NOME", "CARGO", *(secao.strip() for secao in secoes.split(","))}
+            dados = {chave: valor for chave, valor in dados.items() if chave in pedidas}
+        if self.formato == "json":
+            return json.dumps(dados, ensure_ascii=False)
+        return _em_texto(dados)
+
+
+def carregar_gravacoes(caminho: str) -> Tuple[Dict[str, str], List[str]]:
+    # JSONL com uma resposta por linha em "resposta", "texto" ou "body"; linhas com "chave"
+    # respondem ao prompt exato gravado, as demais entram no sorteio para prompts desconhecidos
+    por_chave: Dict[str, str] = {}
+    respostas: List[str] = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for numero, linha in enumerate(arquivo, 1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                logger.warning("Linha %s de %s ignorada: JSON inválido", numero, caminho)
+                continue
+            resposta = next((registro[c] for c in ("resposta", "texto", "body") if registro.get(c)), None)
+            if not isinstance(resposta, str):
+                continue
+            respostas.append(resposta)
+            if registro.get("chave"):
+                por_chave[registro["chave"]] = resposta
+    if not respostas:
+        raise ValueError(f"Nenhuma resposta gravada em {caminho}")
+    return por_chave, respostas
+
+
+class LLMReplay(LLMSimulado):
+    por_chave: Dict[str, str] = Field(default_factory=dict)
+    respostas: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _responder(self, mensagens: List[BaseMessage], rng: random.Random) -> str:
+        chave = chave_mensagens(mensagens)
+        resposta = self.por_chave.get(chave)
+        if resposta is None:
+            resposta = self.respostas[int(chave, 16) % len(self.respostas)]
+        return adaptar_formato(resposta, self.formato)
+
+
+class GravadorRespostas(BaseCallbackHandler):
+    # Grava prompt (hash) e resposta de cada chamada real, no formato lido por carregar_gravacoes
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._chaves: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any) -> None:
+        self._chaves[run_id] = chave_mensagens(messages[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        chave = self._chaves.pop(run_id, None)
+        if chave is None or not response.generations or not response.generations[0]:
+            return
+        registro = json.dumps({"chave": chave, "resposta": response.generations[0][0].text}, ensure_ascii=False)
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(registro + "\n")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._chaves.pop(run_id, None)
+
+
+def criar_llm(modelo: str) -> BaseChatModel:
+    provedor = config.LLM_PROVEDOR
+    callbacks = [GravadorRespostas(config.LLM_GRAVACOES)] if config.LLM_GRAVAR else None
+    if provedor == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=modelo,
+            temperature=0.5,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            callbacks=callbacks,
+            # Uma tentativa só: as retentativas ficam no controle de admissão, com jitter
+            # e sem o time.sleep que o cliente do Gemini faz dentro do event loop
+            max_retries=1,
+        )
+    if provedor == "local":
+        logger.warning("Usando o provedor de IA local: respostas sintéticas, sem chamadas ao %s", modelo)
+        return LLMLocal(
+            modelo=modelo, semente=config.LLM_SEMENTE, taxa_limite=config.LLM_SIMULAR_TAXA_LIMITE, callbacks=callbacks
+        )
+    if provedor == "replay":
+        por_chave, respostas = carregar_gravacoes(config.LLM_GRAVACOES)
+        logger.warning("Usando o provedor de IA replay: %s resposta(s) de %s", len(respostas), config.LLM_GRAVACOES)
+        return LLMReplay(
+            modelo=modelo,
+            semente=config.LLM_SEMENTE,
+            taxa_limite=config.LLM_SIMULAR_TAXA_LIMITE,
+            por_chave=por_chave,
+            respostas=respostas,
+            callbacks=callbacks,
+        )
+    raise ValueError(f"LLM_PROVEDOR inválido: '{provedor}'. Use {', '.join(PROVEDORES)}.")
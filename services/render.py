@@ -0,0 +1,299 @@
+import logging
+from io import BytesIO
+from typing import Any, Dict
+
+from services.layout import LayoutPdf
+from services.templates import ALTURA_PAGINA, LARGURA_PAGINA, TEMPLATE_PADRAO, moldura_template, obter_template
+from services.vaga import completar_palavras_chave, extrair_palavras_chave, indice_vaga
+
+logger = logging.getLogger(__name__)
+
+
+def criar_pdf_estilizado_cv(
+    dados_cv: Dict[str, Any], descricao_vaga: str = "", template: str = TEMPLATE_PADRAO
+) -> BytesIO:
+    try:
+        logger.debug("=== DADOS RECEBIDOS PARA GERAÇÃO DO PDF ===")
+        logger.debug("Tipo dos dados: %s", type(dados_cv))
+        logger.debug("Chaves disponíveis: %s", list(dados_cv.keys()))
+        
+        modelo = obter_template(template)
+        layout = LayoutPdf(
+            largura=LARGURA_PAGINA,
+            altura=ALTURA_PAGINA,
+            margem=modelo.margem,
+            moldura=moldura_template(modelo),
+            margem_esquerda=modelo.margem_texto,
+        )
+        doc = layout.doc
+        
+        margem = layout.margem_esquerda
+        espacamento = modelo.tamanho(12)
+        fonte_normal = modelo.fonte_normal
+        fonte_negrito = modelo.fonte_negrito
+        
+        largura = layout.largura
+        
+        cor_titulo = modelo.cor_titulo
+        cor_texto = modelo.cor_texto
+        t = modelo.tamanho
+        
+        def adicionar_texto(texto, fonte, tamanho, cor, x=None, prefixo=""):
+            try:
+                layout.texto(texto, fonte, tamanho, cor, x=x, prefixo=prefixo)
+            except Exception as e:
+                logger.warning("Erro ao adicionar texto: %s", e)
+                layout.y += tamanho * 1.2
+        
+        if dados_cv.get("NOME"):
+            nome = str(dados_cv["NOME"]).upper()
+            logger.debug("--- ADICIONANDO NOME ---")
+            logger.debug("Conteúdo: %s", nome)
+            
+            adicionar_texto(nome, fonte_negrito, t(24), cor_titulo)
+            
+            if modelo.sublinhar_nome:
+                line_width = 1.5
+                line_length = min(500, largura - layout.margem - margem)
+                
+                layout.linha(margem, margem + line_length, layout.y - 5, cor_titulo, line_width)
+            layout.y += t(15)
+        
+        if dados_cv.get("CARGO"):
+            cargo = str(dados_cv["CARGO"])
+            logger.debug("--- ADICIONANDO CARGO ---")
+            logger.debug("Conteúdo: %s", cargo)
+            
+            adicionar_texto(cargo, fonte_negrito, t(14), modelo.cor_cargo)
+            layout.y += espacamento
+        
+        if dados_cv.get("CONTATO"):
+            contato = dados_cv["CONTATO"]
+            logger.debug("--- ADICIONANDO CONTATO ---")
+            logger.debug("Tipo do contato: %s", type(contato))
+            
+            if isinstance(contato, list):
+                logger.debug("Lista de contatos: %s", contato)
+                contato = " | ".join([str(c).strip() for c in contato if str(c).strip()])
+            
+            logger.debug("Texto do contato: %s", contato)
+            
+            adicionar_texto(str(contato), fonte_normal, t(10), cor_texto)
+            layout.y += espacamento
+        
+        layout.linha(margem, largura - layout.margem, layout.y, modelo.cor_separador, 0.5)
+        layout.y += espacamento
+        
+        if dados_cv.get("RESUMO"):
+            resumo = str(dados_cv["RESUMO"])
+            logger.debug("--- ADICIONANDO RESUMO PROFISSIONAL ---")
+            logger.debug("Tamanho do resumo: %s caracteres", len(resumo))
+            logger.debug("Amostra: %.100s", resumo)
+            
+            adicionar_texto("RESUMO PROFISSIONAL", fonte_negrito, t(12), cor_titulo)
+            adicionar_texto(resumo, fonte_normal, t(10), cor_texto)
+            layout.y += espacamento
+        
+        if dados_cv.get("EXPERIENCIA"):
+            logger.debug("--- ADICIONANDO EXPERIÊNCIA PROFISSIONAL ---")
+            
+            experiencias = dados_cv["EXPERIENCIA"]
+            if not isinstance(experiencias, list):
+                experiencias = [experiencias]
+                
+            logger.debug("Número de experiências: %s", len(experiencias))
+            
+            adicionar_texto("EXPERIÊNCIA PROFISSIONAL", fonte_negrito, t(12), cor_titulo)
+            
+            for idx, exp in enumerate(experiencias, 1):
+                if not exp:
+                    logger.debug("Experiência %s: Dados vazios", idx)
+                    continue
+                    
+                logger.debug("Experiência %s:", idx)
+                logger.debug("Tipo: %s", type(exp))
+                logger.debug("Conteúdo: %s", exp)
+                
+                if isinstance(exp, str):
+                    exp = {"titulo": exp, "detalhes": []}
+                elif not isinstance(exp, dict):
+                    logger.debug("Experiência %s: Formato não suportado", idx)
+                    continue
+                
+                cabecalho = []
+                if exp.get("titulo"):
+                    cabecalho.append(str(exp["titulo"]).strip())
+                elif exp.get("cargo"):
+                    cabecalho.append(str(exp["cargo"]).strip())
+                    if exp.get("empresa"):
+                        cabecalho.append(str(exp["empresa"]).strip())
+                    if exp.get("periodo"):
+                        cabecalho.append(f"({str(exp['periodo']).strip()})")
+                
+                if cabecalho:
+                    adicionar_texto(" • ".join(cabecalho), fonte_negrito, t(10.5), cor_texto)
+                
+                if exp.get("detalhes") and isinstance(exp["detalhes"], list):
+                    logger.debug("Número de detalhes: %s", len(exp['detalhes']))
+                    for detalhe in exp["detalhes"]:
+                        if not detalhe:
+                            continue
+                            
+                        logger.debug("Processando detalhe: %.100s...", detalhe)
+                        
+                        adicionar_texto(str(detalhe).strip(), fonte_normal, t(10), cor_texto, x=margem + 20, prefixo="• ")
+                        layout.y += 7  
+                
+                layout.y += 5  
+        
+        if dados_cv.get("FORMACAO"):
+            logger.debug("--- ADICIONANDO FORMAÇÃO ACADÊMICA ---")
+            
+            formacoes = dados_cv["FORMACAO"]
+            if not isinstance(formacoes, list):
+                formacoes = [formacoes]
+                
+            logger.debug("Número de formações: %s", len(formacoes))
+            
+            adicionar_texto("FORMAÇÃO ACADÊMICA", fonte_negrito, t(12), cor_titulo)
+            
+            for idx, form in enumerate(formacoes, 1):
+                if not form:
+                    logger.debug("Formação %s: Dados vazios", idx)
+                    continue
+                    
+                logger.debug("Formação %s:", idx)
+                logger.debug("Tipo: %s", type(form))
+                logger.debug("Conteúdo: %s", form)
+                
+                if isinstance(form, str):
+                    adicionar_texto(form, fonte_normal, t(10), cor_texto, prefixo="• ")
+                elif isinstance(form, dict):
+                    linha = []
+                    if form.get("curso"):
+                        linha.append(str(form["curso"]).strip())
+                    if form.get("instituicao"):
+                        linha.append(str(form["instituicao"]).strip())
+                    if form.get("periodo"):
+                        linha.append(f"({str(form['periodo']).strip()})")
+                    
+                    if linha:
+                        adicionar_texto(" • ".join(linha), fonte_normal, t(10), cor_texto, prefixo="• ")
+                        
+                        if form.get("descricao"):
+                            adicionar_texto(
+                                str(form["descricao"]).strip(),
+                                fonte_normal, t(9), modelo.cor_secundaria, x=margem + 10
+                            )
+                else:
+                    logger.debug("Formação %s: Formato não suportado", idx)
+                    continue
+                
+                layout.y += 3
+        
+        if dados_cv.get("COMPETENCIAS"):
+            logger.debug("--- ADICIONANDO HABILIDADES ---")
+            
+            competencias = dados_cv["COMPETENCIAS"]
+            logger.debug("Tipo das competências: %s", type(competencias))
+            
+            if isinstance(competencias, str):
+                logger.debug("Competências como string: %s", competencias)
+                competencias = [competencias]
+            elif isinstance(competencias, list):
+                logger.debug("Número de competências: %s", len(competencias))
+                logger.debug("Competências: %s", competencias)
+            
+            adicionar_texto("HABILIDADES", fonte_negrito, t(12), cor_titulo)
+            
+            # Cada competência é um bloco indivisível; a quebra acontece entre elas
+            itens = [f"• {str(c).strip()}" for c in competencias if str(c).strip()]
+            try:
+                layout.bloco(itens, fonte_normal, t(10), cor_texto, separador="  ")
+            except Exception as e:
+                logger.warning("Erro ao adicionar texto: %s", e)
+            
+            layout.y += espacamento
+        
+        logger.debug("=== GERANDO PDF FINAL ===")
+        metadata = doc.metadata
+        
+        if dados_cv.get("METADADOS"):
+            metadados = dados_cv["METADADOS"]
+            logger.debug("=== METADADOS EXTRAÍDOS ===")
+            logger.debug("Título: %s", metadados.get('TITULO'))
+            logger.debug("Autor: %s", metadados.get('AUTOR'))
+            logger.debug("Descrição: %s", metadados.get('DESCRICAO'))
+            logger.debug("Palavras-chave: %s", metadados.get('PALAVRAS_CHAVE'))
+            
+            if metadados.get("TITULO"):
+                metadata["title"] = str(metadados["TITULO"])
+                logger.debug("Definindo título do PDF: %s", metadata['title'])
+            elif dados_cv.get("CARGO"):
+                metadata["title"] = str(dados_cv["CARGO"])
+                logger.debug("Usando cargo como título do PDF: %s", metadata['title'])
+            
+            if metadados.get("AUTOR"):
+                metadata["author"] = str(metadados["AUTOR"])
+                logger.debug("Definindo autor do PDF: %s", metadata['author'])
+            elif dados_cv.get("NOME"):
+                metadata["author"] = str(dados_cv["NOME"])
+                logger.debug("Usando nome como autor do PDF: %s", metadata['author'])
+            
+            if metadados.get("DESCRICAO"):
+                descricao = str(metadados["DESCRICAO"])
+                frases = [f.strip() for f in descricao.split('.') if f.strip()]
+                
+                if len(frases) >= 2:
+                    linha1 = frases[0][:200]
+                    linha2 = frases[1][:200] if len(frases) > 1 else linha1
+                else:
+                    meio = len(descricao) // 2
+                    linha1 = descricao[:meio].strip()
+                    linha2 = descricao[meio:].strip()
+                
+                metadata["subject"] = f"{linha1}\n{linha2}"
+                logger.debug("Assunto formatado (2 linhas): %s", metadata['subject'])
+                
+            elif dados_cv.get("RESUMO"):
+                resumo = str(dados_cv["RESUMO"])
+                meio = len(resumo) // 2
+                linha1 = resumo[:meio].strip()
+                linha2 = resumo[meio:].strip()
+                metadata["subject"] = f"{linha1}\n{linha2}"
+                logger.debug("Usando resumo como assunto (2 linhas): %s", metadata['subject'])
+            
+            palavras_chave = metadados.get("PALAVRAS_CHAVE") or []
+            if isinstance(palavras_chave, str):
+                palavras_chave = palavras_chave.split(',')
+            
+            # As palavras da IA são completadas pelo índice da vaga; sem vaga, pelo do resumo
+            if descricao_vaga:
+                indice = indice_vaga(descricao_vaga)
+            else:
+                indice = extrair_palavras_chave(str(dados_cv.get("RESUMO", "")))
+            palavras = completar_palavras_chave(palavras_chave, indice)
+            
+            if palavras:
+                metadata["keywords"] = ", ".join(["currículo"] + palavras)
+                logger.debug("Palavras-chave extraídas: %s", metadata['keywords'])
+            
+            logger.debug("=== FIM DOS METADADOS EXTRAÍDOS ===")
+        
+        doc.set_metadata(metadata)
+        
+        pdf_buffer = layout.salvar()
+        
+        logger.debug("Tamanho do PDF gerado: %s bytes", len(pdf_buffer.getvalue()))
+        logger.debug("Metadados do PDF: %s", metadata)
+        return pdf_buffer
+        
+    except Exception as e:
+        logger.error("Erro ao gerar PDF: %s", e)
+        raise ValueError(f"Erro ao processar o currículo: {str(e)}")
+        
+    finally:
+        try:
+            doc.close()
+        except:
+            pass
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.pool import Pool
+from typing import Any, Dict, Optional, Tuple
+
+from services import config
+from services.componentes import registrar
+from services.executor import executar_cpu
+from services.extraction import extrair_em_serie
+from services.render import criar_pdf_estilizado_cv
+from services.templates import TEMPLATE_PADRAO, TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[Pool] = None
+_pool_lock = threading.Lock()
+
+# Usa um marcador fora do Latin-1 para carregar também a tabela de glifos estendida
+_DADOS_AQUECIMENTO: Dict[str, Any] = {
+    "NOME": "Aquecimento",
+    "CARGO": "Render",
+    "RESUMO": "Documento descartável gerado na inicialização do worker.",
+    "EXPERIENCIA": [{"titulo": "Empresa • Cargo", "detalhes": ["Detalhe"]}],
+    "FORMACAO": ["Curso"],
+    "COMPETENCIAS": ["Python"],
+    "CONTATO": ["email@example.com"],
+}
+
+
+def _aquecer_worker() -> None:
+    from services.observabilidade import configurar_logs
+
+    extrair_em_serie()
+    configurar_logs()
+    for nome in TEMPLATES:
+        criar_pdf_estilizado_cv(_DADOS_AQUECIMENTO, "", nome)
+
+
+def _renderizar_no_worker(dados_cv: Dict[str, Any], descricao_vaga: str, template: str) -> Tuple[str, int]:
+    # O PDF volta por memória compartilhada; pelo pipe do pool só passa o nome do segmento
+    buffer = criar_pdf_estilizado_cv(dados_cv, descricao_vaga, template)
+    tamanho = buffer.getbuffer().nbytes
+    segmento = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+    try:
+        segmento.buf[:tamanho] = buffer.getbuffer()
+    finally:
+        segmento.close()
+    return segmento.name, tamanho
+
+
+def _ler_segmento(nome: str, tamanho: int) -> bytes:
+    segmento = shared_memory.SharedMemory(name=nome)
+    try:
+        return bytes(segmento.buf[:tamanho])
+    finally:
+        segmento.close()
+        segmento.unlink()
+
+
+def pool_render() -> Optional[Pool]:
+    global _pool
+    if config.RENDER_PROCESSOS <= 0 or multiprocessing.current_process().daemon:
+        # Processos daemon (workers de jobs) não podem ter filhos; renderizam no executor local
+        return None
+    if _pool is None:
+        # O aquecimento roda numa thread própria e pode disputar a criação com o primeiro pedido
+        with _pool_lock:
+            if _pool is None:
+                _pool = multiprocessing.get_context("spawn").Pool(
+                    processes=config.RENDER_PROCESSOS,
+                    initializer=_aquecer_worker,
+                    maxtasksperchild=config.RENDER_MAX_JOBS_POR_PROCESSO or None,
+                )
+                logger.info(
+                    "Pool de renderização iniciado com %s processo(s), reciclados a cada %s jobs",
+                    config.RENDER_PROCESSOS,
+                    config.RENDER_MAX_JOBS_POR_PROCESSO or "∞",
+                )
+    return _pool
+
+
+def _aquecer_pool() -> Optional[Pool]:
+    pool = pool_render()
+    if pool is not None:
+        # O initializer roda antes da primeira tarefa: a resposta só chega de um worker já aquecido
+        pool.apply_async(os.getpid).get(timeout=config.RENDER_TIMEOUT_SEGUNDOS)
+    return pool
+
+
+registrar("pool_render", _aquecer_pool)
+
+
+async def renderizar_pdf(dados_cv: Dict[str, Any], descricao_vaga: str = "", template: str = TEMPLATE_PADRAO) -> bytes:
+    pool = pool_render()
+    if pool is None:
+        buffer = await executar_cpu(criar_pdf_estilizado_cv, dados_cv, descricao_vaga, template)
+        return buffer.getvalue()
+
+    loop = asyncio.get_running_loop()
+    futuro = loop.create_future()
+
+    def resolver(resultado: Any, erro: bool) -> None:
+        if futuro.done():
+            return
+        if erro:
+            futuro.set_exception(resultado)
+        else:
+            futuro.set_result(resultado)
+
+    def entregar(resultado: Any, erro: bool = False) -> None:
+        try:
+            loop.call_soon_threadsafe(resolver, resultado, erro)
+        except RuntimeError:
+            pass
+
+    def concluido(resultado: Tuple[str, int]) -> None:
+        # Roda na thread de resultados do pool: o segmento é sempre liberado,
+        # mesmo que quem pediu o render já tenha desistido
+        try:
+            entregar(_ler_segmento(*resultado))
+        except Exception as e:
+            entregar(e, erro=True)
+
+    pool.apply_async(
+        _renderizar_no_worker,
+        (dados_cv, descricao_vaga, template),
+        callback=concluido,
+        error_callback=lambda e: entregar(e, erro=True),
+    )
+    # Um worker que morre no meio de um job não devolve resultado; o timeout evita esperar para sempre
+    return await asyncio.wait_for(futuro, timeout=config.RENDER_TIMEOUT_SEGUNDOS)
+
+
+def encerrar_pool_render() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+    _pool = None
@@ -0,0 +1,92 @@
+import hashlib
+import re
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import Response
+
+from services.observabilidade import etapa
+
+_FAIXA = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+
+class FaixaInvalida(Exception):
+    pass
+
+
+def etag_pdf(pdf: bytes) -> str:
+    return f'"{hashlib.blake2b(pdf, digest_size=16).hexdigest()}"'
+
+
+def _etag_confere(cabecalho: Optional[str], etag: str) -> bool:
+    # If-None-Match usa comparação fraca: W/"x" confere com "x"
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    return any(valor.strip().removeprefix("W/") == etag for valor in cabecalho.split(","))
+
+
+def faixa_pedida(cabecalho: Optional[str], tamanho: int) -> Optional[Tuple[int, int]]:
+    # Só uma faixa por pedido; múltiplas faixas ou sintaxe desconhecida devolvem o arquivo inteiro
+    if not cabecalho:
+        return None
+    encontrado = _FAIXA.match(cabecalho)
+    if encontrado is None:
+        return None
+    inicio, fim = encontrado.groups()
+    if not inicio and not fim:
+        return None
+    if not inicio:
+        sufixo = int(fim)
+        if sufixo == 0 or tamanho == 0:
+            raise FaixaInvalida()
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(inicio)
+    fim = tamanho - 1 if not fim else min(int(fim), tamanho - 1)
+    if inicio >= tamanho or inicio > fim:
+        raise FaixaInvalida()
+    return inicio, fim
+
+
+class RespostaPdf(Response):
+    media_type = "application/pdf"
+
+    def __init__(self, pdf: bytes, nome_arquivo: str, status_cache: str, request: Optional[Request] = None):
+        etag = etag_pdf(pdf)
+        headers = {
+            "Content-Disposition": f"attachment; filename=\"{nome_arquivo}\"",
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "X-Cache": status_cache,
+        }
+        # O corpo é uma fatia memoryview do PDF já pronto: vai inteiro numa única mensagem, sem cópias
+        corpo = memoryview(pdf)
+        codigo = status.HTTP_200_OK
+
+        # Pedidos condicionais e por faixa só fazem sentido em downloads (GET); um POST sempre gera o PDF
+        if request is not None and request.method in ("GET", "HEAD"):
+            if _etag_confere(request.headers.get("if-none-match"), etag):
+                codigo, corpo = status.HTTP_304_NOT_MODIFIED, None
+            elif request.headers.get("if-range", etag).strip() == etag:
+                try:
+                    faixa = faixa_pedida(request.headers.get("range"), len(pdf))
+                except FaixaInvalida:
+                    faixa = None
+                    codigo, corpo = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, None
+                    headers["Content-Range"] = f"bytes */{len(pdf)}"
+                if faixa is not None:
+                    inicio, fim = faixa
+                    codigo, corpo = status.HTTP_206_PARTIAL_CONTENT, corpo[inicio:fim + 1]
+                    headers["Content-Range"] = f"bytes {inicio}-{fim}/{len(pdf)}"
+
+        super().__init__(corpo, status_code=codigo, headers=headers)
+
+    def render(self, content: Any) -> Any:
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+    async def __call__(self, scope, receive, send) -> None:
+        with etapa("resposta"):
+            await super().__call__(scope, receive, send)
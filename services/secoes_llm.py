@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from services.estruturado import CurriculoEnviado, CurriculoIA, serializar_dados, validar_resposta
+from services.observabilidade import GERACOES_SECOES
+from services.parser import dados_vazios
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada seção ~ tamanho esperado da saída; a experiência domina o tempo de geração
+PESOS_SECOES = {
+    "EXPERIENCIA": 6.0,
+    "RESUMO": 2.0,
+    "METADADOS": 1.5,
+    "COMPETENCIAS": 1.5,
+    "FORMACAO": 1.0,
+    "CONTATO": 0.5,
+}
+# Pedidos em todas as partes: são curtos e a consolidação escolhe um valor só
+CAMPOS_COMUNS = ("NOME", "CARGO")
+
+
+def agrupar_secoes(largura: int) -> List[Tuple[str, ...]]:
+    # Maior peso primeiro, sempre no grupo mais leve: a chamada mais lenta define a latência
+    grupos: List[List[str]] = [[] for _ in range(max(1, min(largura, len(PESOS_SECOES))))]
+    pesos = [0.0] * len(grupos)
+    for secao in sorted(PESOS_SECOES, key=PESOS_SECOES.get, reverse=True):
+        indice = pesos.index(min(pesos))
+        grupos[indice].append(secao)
+        pesos[indice] += PESOS_SECOES[secao]
+    return [tuple(grupo) for grupo in grupos]
+
+
+def _normalizar(valor: str) -> str:
+    return " ".join(valor.split()).casefold()
+
+
+def _votar(valores: List[str], preferido: str) -> str:
+    # O valor mais frequente entre as partes; no empate fica o da parte que escreveu o resumo
+    contagem = Counter(_normalizar(v) for v in valores if v.strip())
+    if not contagem:
+        return preferido
+    maximo = max(contagem.values())
+    if contagem.get(_normalizar(preferido)) == maximo:
+        return preferido.strip()
+    vencedor = next(chave for chave, vezes in contagem.items() if vezes == maximo)
+    return next(v.strip() for v in valores if _normalizar(v) == vencedor)
+
+
+def consolidar(grupos: Sequence[Tuple[str, ...]], partes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    dados = dados_vazios()
+    for grupo, parte in zip(grupos, partes):
+        for secao in grupo:
+            dados[secao] = parte[secao]
+    principal = next((parte for grupo, parte in zip(grupos, partes) if "RESUMO" in grupo), partes[0])
+    for campo in CAMPOS_COMUNS:
+        dados[campo] = _votar([parte[campo] for parte in partes], principal[campo])
+    # Metadados escritos por outra parte podem divergir do nome e do cargo escolhidos
+    metadados = dados["METADADOS"]
+    metadados["AUTOR"] = dados["NOME"]
+    if not metadados.get("TITULO", "").strip():
+        metadados["TITULO"] = dados["CARGO"]
+    return dados
+
+
+async def gerar_por_secoes_async(cadeias: Sequence[Tuple[Tuple[str, ...], "Runnable"]], entrada: Dict[str, Any]) -> str:
+    tarefas = [asyncio.ensure_future(cadeia.ainvoke(entrada)) for _, cadeia in cadeias]
+    try:
+        respostas = await asyncio.gather(*tarefas)
+    except BaseException:
+        # Uma parte falhou (limite do provedor, timeout): as demais não servem sozinhas
+        for tarefa in tarefas:
+            tarefa.cancel()
+        raise
+    try:
+        partes = [validar_resposta(resposta, CurriculoEnviado).para_dados() for resposta in respostas]
+        curriculo = CurriculoIA.model_validate(consolidar([grupo for grupo, _ in cadeias], partes))
+    except (ValidationError, ValueError) as e:
+        GERACOES_SECOES.labels("fallback").inc()
+        raise ValueError(f"Resposta por seções inválida: {' '.join(str(e).split())}") from e
+    GERACOES_SECOES.labels("juntada").inc()
+    return serializar_dados(curriculo.para_dados())
@@ -0,0 +1,6 @@
+import json
+from typing import Any
+
+
+def evento_sse(evento: str, dados: Any) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
@@ -0,0 +1,118 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import fitz
+
+from services.layout import Cor
+
+LARGURA_PAGINA = 595
+ALTURA_PAGINA = 842
+
+
+@dataclass(frozen=True)
+class TemplateCv:
+    nome: str
+    descricao: str
+    margem: float = 40
+    margem_esquerda: Optional[float] = None
+    fonte_normal: str = "helv"
+    fonte_negrito: str = "hebo"
+    escala: float = 1.0
+    cor_titulo: Cor = (0.2, 0.4, 0.8)
+    cor_cargo: Cor = (0.3, 0.3, 0.5)
+    cor_texto: Cor = (0.2, 0.2, 0.2)
+    cor_secundaria: Cor = (0.4, 0.4, 0.4)
+    cor_separador: Cor = (0.8, 0.8, 0.8)
+    sublinhar_nome: bool = True
+    moldura: Optional[Callable[[fitz.Page, "TemplateCv"], None]] = None
+
+    @property
+    def margem_texto(self) -> float:
+        return self.margem if self.margem_esquerda is None else self.margem_esquerda
+
+    def tamanho(self, base: float) -> float:
+        return round(base * self.escala, 2)
+
+
+def _moldura_moderno(page: fitz.Page, template: TemplateCv) -> None:
+    faixa = fitz.Rect(0, 0, 14, page.rect.height)
+    page.draw_rect(faixa, color=None, fill=template.cor_titulo)
+    rodape = page.rect.height - template.margem / 2
+    page.draw_line(
+        (template.margem_texto, rodape),
+        (page.rect.width - template.margem, rodape),
+        color=template.cor_separador,
+        width=0.5,
+    )
+
+
+TEMPLATES: Dict[str, TemplateCv] = {
+    "classico": TemplateCv(
+        nome="classico",
+        descricao="Layout original: cabeçalho azul e seções em coluna única",
+    ),
+    "moderno": TemplateCv(
+        nome="moderno",
+        descricao="Faixa lateral colorida, tons de verde-azulado e rodapé fixo",
+        margem_esquerda=50,
+        cor_titulo=(0.0, 0.45, 0.45),
+        cor_cargo=(0.25, 0.35, 0.35),
+        sublinhar_nome=False,
+        moldura=_moldura_moderno,
+    ),
+    "compacto": TemplateCv(
+        nome="compacto",
+        descricao="Margens e fontes menores para caber mais conteúdo por página",
+        margem=30,
+        escala=0.9,
+        fonte_normal="tiro",
+        fonte_negrito="tibo",
+        cor_titulo=(0.15, 0.15, 0.15),
+        cor_cargo=(0.3, 0.3, 0.3),
+    ),
+}
+
+TEMPLATE_PADRAO = "classico"
+
+
+def obter_template(nome: Optional[str] = None) -> TemplateCv:
+    template = TEMPLATES.get((nome or TEMPLATE_PADRAO).strip().lower())
+    if template is None:
+        raise ValueError(f"Template desconhecido: '{nome}'. Disponíveis: {', '.join(TEMPLATES)}")
+    return template
+
+
+_MOLDURAS_PDF: Dict[str, bytes] = {}
+_MOLDURAS_LOCK = threading.Lock()
+_molduras_thread = threading.local()
+
+
+def _gerar_moldura(template: TemplateCv) -> bytes:
+    doc = fitz.open()
+    try:
+        page = doc.new_page(width=LARGURA_PAGINA, height=ALTURA_PAGINA)
+        template.moldura(page, template)
+        return doc.tobytes(garbage=1, deflate=True)
+    finally:
+        doc.close()
+
+
+def moldura_template(template: TemplateCv) -> Optional[fitz.Document]:
+    # A moldura é gerada uma vez por processo; cada thread mantém o próprio
+    # documento aberto porque objetos do PyMuPDF não são compartilháveis entre threads
+    if template.moldura is None:
+        return None
+    abertas = getattr(_molduras_thread, "documentos", None)
+    if abertas is None:
+        abertas = _molduras_thread.documentos = {}
+    doc = abertas.get(template.nome)
+    if doc is None:
+        conteudo = _MOLDURAS_PDF.get(template.nome)
+        if conteudo is None:
+            with _MOLDURAS_LOCK:
+                conteudo = _MOLDURAS_PDF.get(template.nome)
+                if conteudo is None:
+                    conteudo = _MOLDURAS_PDF[template.nome] = _gerar_moldura(template)
+        doc = abertas[template.nome] = fitz.open("pdf", conteudo)
+    return doc
@@ -0,0 +1,344 @@
+import re
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from services import config
+
+ASSINATURA_PDF = b"%PDF-"
+ASSINATURA_ZIP = b"PK\x03\x04"
+_PADRAO_PAGINA = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_SOBREPOSICAO_PAGINA = 32
+# Leitura das entradas de um ZIP em blocos, com teto, sem confiar no tamanho declarado
+_BLOCO_ZIP = 256 * 1024
+# Folga para os cabeçalhos multipart e os demais campos do formulário
+_FOLGA_MULTIPART = 64 * 1024
+
+
+@dataclass
+class UploadPdf:
+    conteudo: bytes
+    nome_arquivo: str
+    campos: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ItemLote:
+    nome_arquivo: str
+    conteudo: bytes
+    erro: Optional[str] = None
+
+
+@dataclass
+class UploadLote:
+    itens: List[ItemLote]
+    campos: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _ArquivoRecebido:
+    nome_arquivo: str
+    compactado: bool = False
+    conteudo: bytearray = field(default_factory=bytearray)
+    paginas: int = 0
+    cauda: bytes = b""
+    erro: Optional[str] = None
+
+
+def _rejeitar(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _muito_grande(limite: int) -> HTTPException:
+    return _rejeitar(
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        f"O arquivo é muito grande. O tamanho máximo permitido é {limite // (1024 * 1024)}MB.",
+    )
+
+
+class _IngestaoMultipart:
+    def __init__(
+        self,
+        boundary: bytes,
+        campos_arquivo: Tuple[str, ...],
+        max_arquivos: int = 1,
+        max_total_bytes: Optional[int] = None,
+        aceitar_zip: bool = False,
+        erro_por_arquivo: bool = False,
+    ):
+        self.campos_arquivo = campos_arquivo
+        self.max_arquivos = max_arquivos
+        self.max_total_bytes = max_total_bytes or config.MAX_UPLOAD_BYTES
+        self.aceitar_zip = aceitar_zip
+        # No lote, um arquivo inválido vira um item com erro em vez de recusar a requisição inteira
+        self.erro_por_arquivo = erro_por_arquivo
+        self.arquivos: List[_ArquivoRecebido] = []
+        self.campos: Dict[str, bytearray] = {}
+        self._total_bytes = 0
+        self._cabecalhos: Dict[bytes, bytes] = {}
+        self._campo_cabecalho = b""
+        self._valor_cabecalho = b""
+        self._parte_atual: Optional[str] = None
+        self._arquivo_atual: Optional[_ArquivoRecebido] = None
+        self.parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._inicio_parte,
+                "on_header_field": self._campo,
+                "on_header_value": self._valor,
+                "on_header_end": self._fim_cabecalho,
+                "on_headers_finished": self._fim_cabecalhos,
+                "on_part_data": self._dados,
+            },
+        )
+
+    def _inicio_parte(self) -> None:
+        self._cabecalhos = {}
+        self._parte_atual = None
+        self._arquivo_atual = None
+
+    def _campo(self, data: bytes, start: int, end: int) -> None:
+        self._campo_cabecalho += data[start:end]
+
+    def _valor(self, data: bytes, start: int, end: int) -> None:
+        self._valor_cabecalho += data[start:end]
+
+    def _fim_cabecalho(self) -> None:
+        self._cabecalhos[self._campo_cabecalho.lower()] = self._valor_cabecalho
+        self._campo_cabecalho = b""
+        self._valor_cabecalho = b""
+
+    def _fim_cabecalhos(self) -> None:
+        _, opcoes = parse_options_header(self._cabecalhos.get(b"content-disposition"))
+        nome = opcoes.get(b"name", b"").decode("utf-8", "replace")
+        self._parte_atual = nome
+        if nome not in self.campos_arquivo:
+            self.campos.setdefault(nome, bytearray())
+            return
+
+        nome_arquivo = opcoes.get(b"filename", b"").decode("utf-8", "replace")
+        if not nome_arquivo:
+            # Campo de arquivo vazio enviado pelo navegador sem seleção
+            if b"filename" in opcoes:
+                self._parte_atual = None
+                return
+            raise _rejeitar(status.HTTP_400_BAD_REQUEST, "Nenhum arquivo foi enviado")
+        if len(self.arquivos) >= self.max_arquivos:
+            if self.max_arquivos == 1:
+                raise _rejeitar(status.HTTP_400_BAD_REQUEST, "Envie apenas um arquivo PDF")
+            raise _rejeitar(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Envie no máximo {self.max_arquivos} arquivos por lote",
+            )
+        compactado = self.aceitar_zip and nome_arquivo.lower().endswith(".zip")
+        self._arquivo_atual = _ArquivoRecebido(nome_arquivo=nome_arquivo, compactado=compactado)
+        if not compactado and not nome_arquivo.lower().endswith(".pdf"):
+            self._recusar_arquivo(self._arquivo_atual, status.HTTP_400_BAD_REQUEST, "O arquivo deve ser um PDF")
+        self.arquivos.append(self._arquivo_atual)
+
+    def _recusar_arquivo(self, arquivo: _ArquivoRecebido, status_code: int, detalhe: str) -> None:
+        if not self.erro_por_arquivo:
+            raise _rejeitar(status_code, detalhe)
+        arquivo.erro = detalhe
+        arquivo.conteudo = bytearray()
+        arquivo.cauda = b""
+
+    def _dados(self, data: bytes, start: int, end: int) -> None:
+        trecho = data[start:end]
+        arquivo = self._arquivo_atual
+        if arquivo is None:
+            if self._parte_atual is None:
+                return
+            valor = self.campos[self._parte_atual]
+            if len(valor) + len(trecho) > config.MAX_CAMPO_FORMULARIO_BYTES:
+                raise _rejeitar(
+                    status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    f"O campo '{self._parte_atual}' excede o tamanho máximo permitido",
+                )
+            valor += trecho
+            return
+
+        self._total_bytes += len(trecho)
+        if self._total_bytes > self.max_total_bytes:
+            raise _muito_grande(self.max_total_bytes)
+        if arquivo.erro:
+            # O restante da parte é descartado: o item já foi registrado com o erro
+            return
+        if not arquivo.compactado and len(arquivo.conteudo) + len(trecho) > config.MAX_UPLOAD_BYTES:
+            if not self.erro_por_arquivo:
+                raise _muito_grande(config.MAX_UPLOAD_BYTES)
+            self._recusar_arquivo(arquivo, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "O arquivo é muito grande")
+            return
+
+        assinatura = ASSINATURA_ZIP if arquivo.compactado else ASSINATURA_PDF
+        inicio_anterior = len(arquivo.conteudo)
+        arquivo.conteudo += trecho
+        if inicio_anterior < len(assinatura) <= len(arquivo.conteudo):
+            if not arquivo.conteudo.startswith(assinatura):
+                if arquivo.compactado:
+                    raise _rejeitar(status.HTTP_400_BAD_REQUEST, "O arquivo enviado não é um ZIP válido")
+                self._recusar_arquivo(arquivo, status.HTTP_400_BAD_REQUEST, "O arquivo enviado não é um PDF válido")
+                return
+        if not arquivo.compactado:
+            self._contar_paginas(arquivo, trecho)
+
+    def _contar_paginas(self, arquivo: _ArquivoRecebido, trecho: bytes) -> None:
+        janela = arquivo.cauda + trecho
+        fim_contado = 0
+        for marcador in _PADRAO_PAGINA.finditer(janela):
+            # Sem o byte seguinte não dá para distinguir /Page de /Pages
+            if marcador.end() >= len(janela):
+                break
+            arquivo.paginas += 1
+            fim_contado = marcador.end()
+        arquivo.cauda = janela[max(fim_contado, len(janela) - _SOBREPOSICAO_PAGINA):]
+        if arquivo.paginas > config.MAX_PAGINAS_PDF:
+            self._recusar_arquivo(
+                arquivo,
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"O PDF tem páginas demais. O máximo permitido é {config.MAX_PAGINAS_PDF}.",
+            )
+
+
+async def _ingerir(request: Request, ingestao_kwargs: dict, max_total_bytes: int) -> _IngestaoMultipart:
+    tipo, opcoes = parse_options_header(request.headers.get("content-type"))
+    boundary = opcoes.get(b"boundary")
+    if tipo != b"multipart/form-data" or not boundary:
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, "A requisição deve ser multipart/form-data")
+
+    tamanho_declarado = request.headers.get("content-length")
+    if tamanho_declarado and tamanho_declarado.isdigit():
+        if int(tamanho_declarado) > max_total_bytes + _FOLGA_MULTIPART:
+            raise _muito_grande(max_total_bytes)
+
+    ingestao = _IngestaoMultipart(boundary, max_total_bytes=max_total_bytes, **ingestao_kwargs)
+    async for chunk in request.stream():
+        if chunk:
+            ingestao.parser.write(chunk)
+    ingestao.parser.finalize()
+    return ingestao
+
+
+def _campos_texto(ingestao: _IngestaoMultipart) -> Dict[str, str]:
+    return {nome: bytes(valor).decode("utf-8", "replace") for nome, valor in ingestao.campos.items()}
+
+
+async def ler_upload_pdf(request: Request, campo_arquivo: str = "pdf_file") -> UploadPdf:
+    ingestao = await _ingerir(request, {"campos_arquivo": (campo_arquivo,)}, config.MAX_UPLOAD_BYTES)
+
+    if not ingestao.arquivos:
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, "Nenhum arquivo foi enviado")
+    arquivo = ingestao.arquivos[0]
+    if not arquivo.conteudo:
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, "O arquivo PDF está vazio")
+    if not arquivo.conteudo.startswith(ASSINATURA_PDF):
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, "O arquivo enviado não é um PDF válido")
+
+    return UploadPdf(
+        conteudo=bytes(arquivo.conteudo),
+        nome_arquivo=arquivo.nome_arquivo,
+        campos=_campos_texto(ingestao),
+    )
+
+
+def _ler_entrada_zip(pacote: zipfile.ZipFile, info: zipfile.ZipInfo, limite: int) -> Optional[bytes]:
+    # Lê no máximo limite + 1 bytes: o tamanho declarado no cabeçalho do ZIP pode mentir
+    partes, lidos = [], 0
+    with pacote.open(info) as entrada:
+        while lidos <= limite:
+            parte = entrada.read(min(_BLOCO_ZIP, limite + 1 - lidos))
+            if not parte:
+                break
+            partes.append(parte)
+            lidos += len(parte)
+    if lidos > limite:
+        return None
+    return b"".join(partes)
+
+
+def _itens_zip(arquivo: _ArquivoRecebido, restantes: int, orcamento: int) -> List[ItemLote]:
+    # orcamento: bytes que ainda podem ser descompactados neste lote (proteção contra zip bomb)
+    try:
+        pacote = zipfile.ZipFile(BytesIO(arquivo.conteudo))
+    except zipfile.BadZipFile:
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, f"O arquivo '{arquivo.nome_arquivo}' não é um ZIP válido")
+
+    itens = []
+    with pacote:
+        for info in pacote.infolist():
+            nome = info.filename.rsplit("/", 1)[-1]
+            if info.is_dir() or not nome.lower().endswith(".pdf") or info.filename.startswith("__MACOSX/"):
+                continue
+            if len(itens) >= restantes:
+                raise _rejeitar(
+                    status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    f"Envie no máximo {config.LOTE_MAX_ITENS} arquivos por lote",
+                )
+            # Cabeçalhos implausíveis são recusados antes de descompactar qualquer byte
+            if info.file_size > config.MAX_UPLOAD_BYTES:
+                itens.append(ItemLote(nome, b"", "O arquivo é muito grande"))
+                continue
+            if info.file_size > config.LOTE_MAX_TAXA_COMPRESSAO * max(info.compress_size, 1):
+                itens.append(ItemLote(nome, b"", "Taxa de compressão suspeita no arquivo"))
+                continue
+            try:
+                conteudo = _ler_entrada_zip(pacote, info, max(min(config.MAX_UPLOAD_BYTES, orcamento), 0))
+            except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError, EOFError, zlib.error):
+                itens.append(ItemLote(nome, b"", "O arquivo está corrompido no ZIP"))
+                continue
+            if conteudo is None:
+                if orcamento < config.MAX_UPLOAD_BYTES:
+                    raise _muito_grande(config.LOTE_MAX_BYTES)
+                itens.append(ItemLote(nome, b"", "O arquivo é muito grande"))
+                continue
+            if not conteudo.startswith(ASSINATURA_PDF):
+                itens.append(ItemLote(nome, b"", "O arquivo enviado não é um PDF válido"))
+                continue
+            orcamento -= len(conteudo)
+            itens.append(ItemLote(nome, conteudo))
+    return itens
+
+
+async def ler_upload_lote(request: Request) -> UploadLote:
+    ingestao = await _ingerir(
+        request,
+        {
+            "campos_arquivo": ("pdf_files", "arquivo_zip"),
+            "max_arquivos": config.LOTE_MAX_ITENS,
+            "aceitar_zip": True,
+            "erro_por_arquivo": True,
+        },
+        config.LOTE_MAX_BYTES,
+    )
+
+    itens: List[ItemLote] = []
+    for arquivo in ingestao.arquivos:
+        if arquivo.erro:
+            itens.append(ItemLote(arquivo.nome_arquivo, b"", arquivo.erro))
+        elif arquivo.compactado:
+            descompactados = sum(len(item.conteudo) for item in itens)
+            itens.extend(_itens_zip(arquivo, config.LOTE_MAX_ITENS - len(itens), config.LOTE_MAX_BYTES - descompactados))
+        elif not arquivo.conteudo:
+            itens.append(ItemLote(arquivo.nome_arquivo, b"", "O arquivo PDF está vazio"))
+        elif not arquivo.conteudo.startswith(ASSINATURA_PDF):
+            itens.append(ItemLote(arquivo.nome_arquivo, b"", "O arquivo enviado não é um PDF válido"))
+        else:
+            itens.append(ItemLote(arquivo.nome_arquivo, bytes(arquivo.conteudo)))
+        if len(itens) > config.LOTE_MAX_ITENS:
+            raise _rejeitar(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Envie no máximo {config.LOTE_MAX_ITENS} arquivos por lote",
+            )
+
+    if not itens:
+        raise _rejeitar(status.HTTP_400_BAD_REQUEST, "Nenhum arquivo foi enviado")
+    return UploadLote(itens=itens, campos=_campos_texto(ingestao))
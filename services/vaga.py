@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services import config
+
+logger = logging.getLogger(__name__)
+
+MAX_PALAVRAS_CHAVE = 10
+
+# Vocabulário de tecnologias com a grafia canônica; a chave é a forma normalizada (minúsculas, sem acento)
+TECNOLOGIAS: Dict[str, str] = {
+    t.lower(): t
+    for t in [
+        "Python", "Java", "JavaScript", "TypeScript", "Go", "Golang", "Rust", "C", "C++", "C#", "PHP", "Ruby",
+        "Kotlin", "Swift", "Scala", "R", "SQL", "NoSQL", "Bash", "Shell", "Dart", "Elixir", "Lua",
+        "Django", "Flask", "FastAPI", "Spring", "Spring Boot", "Node.js", "Express", "NestJS", "Next.js",
+        "React", "React Native", "Angular", "Vue.js", "Svelte", ".NET", "ASP.NET", "Laravel", "Rails",
+        "Flutter", "Pandas", "NumPy", "Spark", "PySpark", "Airflow", "dbt", "Kafka", "RabbitMQ", "Celery",
+        "TensorFlow", "PyTorch", "Scikit-learn", "Keras", "LangChain", "Machine Learning", "Deep Learning",
+        "NLP", "LLM", "Data Science", "Power BI", "Tableau", "Excel", "ETL",
+        "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch", "Oracle", "SQL Server", "DynamoDB",
+        "Cassandra", "SQLite", "BigQuery", "Snowflake",
+        "AWS", "Azure", "GCP", "Google Cloud", "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins",
+        "GitHub Actions", "GitLab", "CI/CD", "Git", "Linux", "Nginx", "Serverless", "Lambda",
+        "REST", "GraphQL", "gRPC", "Microsserviços", "Microservices", "DevOps", "SRE", "TDD", "Scrum",
+        "Kanban", "Agile", "Jira", "Figma", "SAP", "Salesforce", "HTML", "CSS", "Sass", "Tailwind",
+        "Selenium", "Cypress", "Jest", "Pytest", "JUnit", "OAuth", "LGPD", "ITIL",
+    ]
+}
+
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no", "na", "nos",
+    "nas", "por", "para", "pra", "com", "sem", "sob", "sobre", "entre", "e", "ou", "mas", "que", "se", "ao",
+    "aos", "como", "mais", "muito", "muita", "muitos", "muitas", "ser", "estar", "ter", "sera", "voce",
+    "nosso", "nossa", "nossos", "nossas", "seu", "sua", "seus", "suas", "este", "esta", "esse", "essa",
+    "isso", "isto", "ja", "tambem", "bem", "ate", "onde", "quando", "qual", "quais", "sao", "tem", "todo",
+    "toda", "todos", "todas", "pelo", "pela", "pelos", "pelas", "num", "numa", "outros", "outras", "cada",
+    "vaga", "vagas", "empresa", "empresas", "buscamos", "procuramos", "requisitos", "requisito",
+    "desejavel", "desejaveis", "diferencial", "diferenciais", "atividades", "responsabilidades",
+    "beneficios", "conhecimento", "conhecimentos", "experiencia", "experiencias", "profissional",
+    "atuacao", "area", "areas", "trabalho", "time", "equipe", "anos", "ano", "nivel", "bom", "boa",
+    "forte", "solido", "solida", "pessoa", "pessoas", "oportunidade", "local", "remoto", "hibrido",
+    "the", "and", "or", "of", "to", "in", "for", "with", "on", "at", "by", "an", "is", "are", "be", "we",
+    "you", "our", "your", "will", "as", "from", "this", "that", "years", "experience", "knowledge",
+    "requirements", "skills", "team", "work", "strong", "good", "plus",
+}
+
+# Tokens com + # . / - internos (C++, C#, Node.js, CI/CD, scikit-learn)
+_TOKEN = re.compile(r"[A-Za-zÀ-ÿ0-9][A-Za-zÀ-ÿ0-9+#./-]*[A-Za-zÀ-ÿ0-9+#]|[A-Za-zÀ-ÿ]|\.[A-Za-z]+")
+_MAX_TERMOS_COMPOSTOS = max(len(t.split()) for t in TECNOLOGIAS)
+
+
+def _sem_acento(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+def normalizar_vaga(texto: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", texto or "").split())
+
+
+def hash_vaga(texto: str) -> str:
+    # Postagens que só diferem em caixa e espaços caem na mesma entrada
+    return hashlib.sha256(normalizar_vaga(texto).lower().encode("utf-8")).hexdigest()
+
+
+def _tecnologia(tokens: List[str], inicio: int) -> Tuple[Optional[str], int]:
+    for tamanho in range(min(_MAX_TERMOS_COMPOSTOS, len(tokens) - inicio), 0, -1):
+        chave = " ".join(tokens[inicio:inicio + tamanho]).lower()
+        canonica = TECNOLOGIAS.get(chave) or TECNOLOGIAS.get(_sem_acento(chave))
+        if canonica is not None:
+            return canonica, tamanho
+    return None, 1
+
+
+def eh_tecnologia(termo: str) -> bool:
+    return termo.strip().lower() in TECNOLOGIAS
+
+
+@dataclass(frozen=True)
+class IndiceVaga:
+    hash: str
+    tecnologias: Tuple[str, ...]
+    termos: Tuple[str, ...]
+
+    @property
+    def palavras_chave(self) -> Tuple[str, ...]:
+        return (self.tecnologias + self.termos)[:MAX_PALAVRAS_CHAVE]
+
+    def para_prompt(self) -> str:
+        return ", ".join(self.palavras_chave) or "nenhuma identificada"
+
+
+def extrair_palavras_chave(texto: str, hash_texto: str = "") -> IndiceVaga:
+    tokens = _TOKEN.findall(normalizar_vaga(texto))
+    tecnologias: Counter = Counter()
+    siglas: Counter = Counter()
+    termos: Counter = Counter()
+    grafia: Dict[str, str] = {}
+    primeira_posicao: Dict[str, int] = {}
+
+    indice = 0
+    while indice < len(tokens):
+        canonica, consumidos = _tecnologia(tokens, indice)
+        token = tokens[indice]
+        if canonica is not None and (len(canonica) > 1 or token.isupper()):
+            # "C" e "R" só contam escritos como sigla, não como letra solta em minúscula
+            tecnologias[canonica] += 1
+            primeira_posicao.setdefault(canonica, indice)
+        else:
+            consumidos = 1
+            normalizado = _sem_acento(token.lower())
+            if normalizado in STOPWORDS or not any(c.isalpha() for c in normalizado):
+                pass
+            elif len(token) >= 2 and token.isupper() and token.isalpha():
+                siglas[token] += 1
+                primeira_posicao.setdefault(token, indice)
+            elif len(normalizado) >= 4:
+                termos[normalizado] += 1
+                grafia.setdefault(normalizado, token.lower())
+                primeira_posicao.setdefault(normalizado, indice)
+        indice += consumidos
+
+    # Mais citados primeiro; empates ficam na ordem em que aparecem na vaga
+    def ordenar(contagem: Counter) -> List[str]:
+        return sorted(contagem, key=lambda termo: (-contagem[termo], primeira_posicao[termo]))
+
+    return IndiceVaga(
+        hash=hash_texto or hash_vaga(texto),
+        tecnologias=tuple(ordenar(tecnologias) + ordenar(siglas)),
+        termos=tuple(grafia[t] for t in ordenar(termos)),
+    )
+
+
+class CacheVagas:
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[str, IndiceVaga]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.contadores: Dict[str, int] = {"hits": 0, "misses": 0, "remocoes": 0}
+
+    def obter(self, texto: str) -> IndiceVaga:
+        chave = hash_vaga(texto)
+        with self._lock:
+            indice = self._itens.get(chave)
+            if indice is not None:
+                self._itens.move_to_end(chave)
+                self.contadores["hits"] += 1
+                return indice
+            self.contadores["misses"] += 1
+
+        indice = extrair_palavras_chave(texto, chave)
+        if self.max_itens <= 0:
+            return indice
+        with self._lock:
+            self._itens[chave] = indice
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.contadores["remocoes"] += 1
+        return indice
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.contadores, "itens": len(self._itens)}
+
+
+CACHE_VAGAS = CacheVagas(config.VAGA_CACHE_MAX_ITENS)
+
+
+def indice_vaga(texto: str) -> IndiceVaga:
+    return CACHE_VAGAS.obter(texto)
+
+
+def completar_palavras_chave(palavras: Iterable[str], indice: IndiceVaga) -> List[str]:
+    vistas = set()
+    resultado = []
+    for palavra in list(palavras) + list(indice.palavras_chave):
+        palavra = str(palavra).strip()
+        chave = palavra.lower()
+        # Siglas e tecnologias curtas (Go, AWS, SQL) são mantidas; outras palavras curtas, não
+        if not palavra or chave in vistas or (len(palavra) <= 3 and not (eh_tecnologia(palavra) or palavra.isupper())):
+            continue
+        vistas.add(chave)
+        resultado.append(palavra)
+    return resultado[:MAX_PALAVRAS_CHAVE]
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# IA local sem latência, sem pools de processos e sem cotas: os testes não dependem de rede nem de tempo
+os.environ.update({
+    "LLM_PROVEDOR": "local",
+    "LLM_LATENCIA_BASE_MS": "0",
+    "LLM_LATENCIA_MS_POR_TOKEN_ENTRADA": "0",
+    "LLM_LATENCIA_MS_POR_TOKEN_SAIDA": "0",
+    "LLM_LATENCIA_JITTER": "0",
+    "RENDER_PROCESSOS": "0",
+    "EXTRACAO_PROCESSOS": "0",
+    "AQUECIMENTO_HABILITADO": "0",
+    "ADMISSAO_CLIENTE_POR_MINUTO": "0",
+    "ADMISSAO_GLOBAL_POR_MINUTO": "0",
+    "CACHE_DIR": "",
+    "JOBS_BACKEND": "memoria",
+})
+
+
+def gerar_pdf(linhas):
+    import fitz
+
+    documento = fitz.open()
+    pagina = documento.new_page()
+    pagina.insert_text((50, 72), "\n".join(linhas))
+    conteudo = documento.tobytes()
+    documento.close()
+    return conteudo
+
+
+@pytest.fixture
+def pdf_curriculo():
+    return gerar_pdf([
+        "Fulano de Tal",
+        "Desenvolvedor Python",
+        "Experiência: Empresa X 2020-2024, APIs com FastAPI e Django",
+        "Formação: Ciência da Computação",
+        "Contato: fulano@exemplo.com",
+    ])
+
+
+@pytest.fixture
+def cliente():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
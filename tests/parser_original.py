@@ -0,0 +1,135 @@
+# Parser original da resposta da IA, copiado sem alterações do commit de base (575a95e,
+# routes/cvv_route.py). Serve de referência para os testes de paridade do parser incremental
+# e para o benchmark; não deve ser corrigido.
+from typing import Any, Dict
+
+
+def parse_resposta_ia(texto_ia: str) -> Dict[str, Any]:
+    data = {
+        "NOME": "",
+        "CARGO": "",
+        "RESUMO": "",
+        "EXPERIENCIA": [],
+        "FORMACAO": [],
+        "COMPETENCIAS": [],
+        "CONTATO": [],
+        "METADADOS": {
+            "TITULO": "",
+            "AUTOR": "",
+            "PALAVRAS_CHAVE": "",
+            "DESCRICAO": "",
+            "CATEGORIA": "currículo"
+        }
+    }
+    
+    if not texto_ia or not isinstance(texto_ia, str) or not texto_ia.strip():
+        print("ERRO: Texto da IA vazio ou inválido")
+        return data
+    
+    current_section = None
+    
+    try:
+        for line in texto_ia.strip().split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            
+            if line.startswith("```") and "METADADOS" in line.upper():
+                print("\n=== INÍCIO DO BLOCO DE METADADOS ===")
+                current_section = "METADADOS"
+                continue
+                
+            if current_section == "METADADOS":
+                if line.startswith("```"):
+                    print("=== FIM DO BLOCO DE METADADOS ===\n")
+                    print("Metadados extraídos:", data["METADADOS"])
+                    current_section = None
+                    continue
+                    
+                if ":" in line:
+                    key_part = line.split(":", 1)[0].strip().upper()
+                    value = line.split(":", 1)[1].strip()
+                    print(f"Processando metadado: {key_part} = {value}")
+                    if key_part in data["METADADOS"]:
+                        data["METADADOS"][key_part] = value
+                        print(f"Metadado '{key_part}' definido como: {value}")
+                    else:
+                        print(f"AVISO: Chave de metadado desconhecida: {key_part}")
+                continue
+                        
+            if ":" in line and current_section != "METADADOS":
+                key_part = line.split(":", 1)[0].strip().upper()
+                if key_part in ["NOME", "CARGO", "RESUMO"]:
+                    key = key_part
+                    value = line.split(":", 1)[1].strip()
+                    if value:
+                        data[key] = value
+                    current_section = None
+                    continue
+            
+            if line.endswith(':'):
+                section_name = line[:-1].strip().upper()
+                section_map = {
+                    "EXPERIENCIA": "EXPERIENCIA",
+                    "EXPERIÊNCIA": "EXPERIENCIA",
+                    "EXPERIÊNCIAS": "EXPERIENCIA",
+                    "FORMAÇÃO": "FORMACAO",
+                    "FORMACAO": "FORMACAO",
+                    "FORMAÇÕES": "FORMACAO",
+                    "COMPETENCIA": "COMPETENCIAS",
+                    "COMPETÊNCIA": "COMPETENCIAS",
+                    "COMPETENCIAS": "COMPETENCIAS",
+                    "COMPETÊNCIAS": "COMPETENCIAS",
+                    "HABILIDADES": "COMPETENCIAS",
+                    "CONTATO": "CONTATO",
+                    "CONTATOS": "CONTATO"
+                }
+                current_section = section_map.get(section_name, None)
+                continue
+            
+            if current_section and current_section in data:
+                content = line.lstrip('-•* ').strip()
+                if not content:
+                    continue
+                
+                if current_section == "EXPERIENCIA":
+                    if "|" in content:
+                        data[current_section].append({
+                            "titulo": content.strip(),
+                            "detalhes": []
+                        })
+                    elif data[current_section] and isinstance(data[current_section][-1], dict):
+                        if "detalhes" in data[current_section][-1]:
+                            data[current_section][-1]["detalhes"].append(content)
+                else:
+                    if content not in data[current_section]:
+                        data[current_section].append(content)
+        
+        for exp in data["EXPERIENCIA"]:
+            if isinstance(exp, dict) and "detalhes" not in exp:
+                exp["detalhes"] = []
+        
+        for key in ["NOME", "CARGO", "RESUMO"]:
+            if key in data and not data[key]:
+                data[key] = ""
+                
+        for key in ["EXPERIENCIA", "FORMACAO", "COMPETENCIAS", "CONTATO"]:
+            if key in data and isinstance(data[key], list):
+                if key == "EXPERIENCIA":
+                    data[key] = [
+                        exp for exp in data[key] 
+                        if isinstance(exp, dict) and 
+                           (exp.get("titulo") or exp.get("detalhes"))
+                    ]
+                else:
+                    data[key] = [item for item in data[key] if item and str(item).strip()]
+        
+        return data
+        
+    except Exception as e:
+        print(f"ERRO CRÍTICO ao processar resposta da IA: {e}")
+        import traceback
+        traceback.print_exc()
+        print("Estado parcial dos dados:", data)
+        return data
+
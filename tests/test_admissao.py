@@ -0,0 +1,48 @@
+from starlette.requests import Request
+
+from services import config
+from services.admissao import identificar_cliente
+
+
+def _request(cabecalhos=None, ip="10.0.0.1"):
+    return Request({
+        "type": "http",
+        "headers": [(nome.lower().encode(), valor.encode()) for nome, valor in (cabecalhos or {}).items()],
+        "client": (ip, 1234),
+    })
+
+
+def test_cliente_e_o_ip_por_padrao(monkeypatch):
+    monkeypatch.setattr(config, "ADMISSAO_CONFIAR_CABECALHO", False)
+    assert identificar_cliente(_request({"X-Client-Id": "cliente_vip"})) == "10.0.0.1"
+
+
+def test_cabecalho_so_vale_quando_confiavel(monkeypatch):
+    monkeypatch.setattr(config, "ADMISSAO_CONFIAR_CABECALHO", True)
+    assert identificar_cliente(_request({"X-Client-Id": "cliente_vip"})) == "cliente_vip"
+    assert identificar_cliente(_request({"X-Client-Id": "inválido com espaço"})) == "10.0.0.1"
+
+
+def test_lote_cobra_a_cota_antes_de_ler_o_corpo(monkeypatch, cliente, pdf_curriculo):
+    from services.admissao import COTAS
+
+    cobrancas = []
+    monkeypatch.setattr(COTAS, "consumir", lambda cliente, custo: cobrancas.append(custo) or 0.0)
+
+    resposta = cliente.post(
+        "/cvv/create-cvv/lote",
+        files=[("pdf_files", (f"cv{numero}.pdf", pdf_curriculo, "application/pdf")) for numero in range(3)],
+        data={"description": "Vaga Python"},
+    )
+    assert resposta.status_code == 200
+    assert cobrancas == [1, 2]
+
+    cobrancas.clear()
+    monkeypatch.setattr(COTAS, "consumir", lambda cliente, custo: cobrancas.append(custo) or 30.0)
+    resposta = cliente.post(
+        "/cvv/create-cvv/lote",
+        files=[("pdf_files", ("cv.pdf", pdf_curriculo, "application/pdf"))],
+        data={"description": "Vaga Python"},
+    )
+    assert resposta.status_code == 429
+    assert cobrancas == [1]
@@ -0,0 +1,100 @@
+import asyncio
+
+from services.coalescencia import Coalescedor
+
+
+class _Geracao:
+    def __init__(self):
+        self.chamadas = 0
+        self.cancelada = False
+        self.liberar = asyncio.Event()
+
+    async def __call__(self):
+        self.chamadas += 1
+        try:
+            await self.liberar.wait()
+        except asyncio.CancelledError:
+            self.cancelada = True
+            raise
+        return "resultado"
+
+
+async def _ceder():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_cancelar_um_pedido_nao_cancela_a_geracao_dos_demais():
+    async def cenario():
+        coalescedor = Coalescedor()
+        gerar = _Geracao()
+        primeiro = asyncio.ensure_future(coalescedor.executar("chave", gerar))
+        segundo = asyncio.ensure_future(coalescedor.executar("chave", gerar))
+        await _ceder()
+
+        primeiro.cancel()
+        await _ceder()
+        assert primeiro.cancelled()
+        assert not gerar.cancelada
+        assert coalescedor.em_andamento() == 1
+
+        gerar.liberar.set()
+        assert await segundo == ("resultado", True)
+        assert gerar.chamadas == 1
+        assert coalescedor.em_andamento() == 0
+
+    asyncio.run(cenario())
+
+
+def test_cancelar_o_ultimo_pedido_cancela_a_geracao():
+    async def cenario():
+        coalescedor = Coalescedor()
+        gerar = _Geracao()
+        pedidos = [asyncio.ensure_future(coalescedor.executar("chave", gerar)) for _ in range(2)]
+        await _ceder()
+
+        for pedido in pedidos:
+            pedido.cancel()
+        await _ceder()
+        assert all(pedido.cancelled() for pedido in pedidos)
+        assert gerar.cancelada
+        assert coalescedor.em_andamento() == 0
+
+        # Um pedido novo com a mesma chave inicia outra geração em vez de herdar a cancelada
+        outra = _Geracao()
+        outra.liberar.set()
+        assert await coalescedor.executar("chave", outra) == ("resultado", False)
+        assert outra.chamadas == 1
+
+    asyncio.run(cenario())
+
+
+def test_excecao_da_geracao_chega_a_todos_os_pedidos():
+    async def cenario():
+        coalescedor = Coalescedor()
+        liberar = asyncio.Event()
+
+        async def gerar():
+            await liberar.wait()
+            raise ValueError("falha na IA")
+
+        pedidos = [asyncio.ensure_future(coalescedor.executar("chave", gerar)) for _ in range(3)]
+        await _ceder()
+        liberar.set()
+        resultados = await asyncio.gather(*pedidos, return_exceptions=True)
+        assert all(isinstance(r, ValueError) and str(r) == "falha na IA" for r in resultados)
+        assert coalescedor.em_andamento() == 0
+
+    asyncio.run(cenario())
+
+
+def test_chaves_diferentes_nao_se_juntam():
+    async def cenario():
+        coalescedor = Coalescedor()
+        gerar = _Geracao()
+        gerar.liberar.set()
+        resultados = await asyncio.gather(coalescedor.executar("a", gerar), coalescedor.executar("b", gerar))
+        assert resultados == [("resultado", False), ("resultado", False)]
+        assert gerar.chamadas == 2
+
+    asyncio.run(cenario())
@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.documents import Document
+
+from services import config, contexto
+from services.contexto import estimar_tokens, reduzir_contexto
+
+VAGA = "Desenvolvedor backend Python com Django, PostgreSQL, Docker e APIs REST"
+
+
+def _curriculo_longo():
+    experiencias = [
+        "Desenvolvedor Python na Empresa {0}: APIs REST com Django e PostgreSQL, deploy com Docker",
+        "Vendedor na Loja {0}: atendimento ao cliente, metas de vendas e organização de vitrine",
+        "Garçom no Restaurante {0}: atendimento de mesas, caixa e controle de estoque da cozinha",
+    ]
+    linhas = ["Fulano de Tal", "Desenvolvedor Python", "", "EXPERIÊNCIA"]
+    for indice in range(30):
+        linhas.append(experiencias[indice // 10].format(indice))
+    linhas += ["", "FORMAÇÃO", "Ciência da Computação | Universidade Federal | 2015-2019"]
+    linhas += ["", "CONTATO", "Email: fulano@exemplo.com", "Telefone: (11) 99999-0000"]
+    return [Document(page_content="\n".join(linhas), metadata={"source": "cv.pdf", "page": 0})]
+
+
+@pytest.fixture(autouse=True)
+def embeddings_hash(monkeypatch):
+    monkeypatch.setattr(config, "CONTEXTO_EMBEDDINGS", "hash")
+    monkeypatch.setattr(config, "CONTEXTO_TAMANHO_TRECHO", 300)
+    monkeypatch.setattr(config, "CONTEXTO_SOBREPOSICAO_TRECHO", 0)
+    monkeypatch.setattr(contexto, "_EMBEDDINGS", None)
+
+
+def test_curriculo_curto_vai_inteiro(monkeypatch):
+    docs = [Document(page_content="Fulano de Tal\nDesenvolvedor Python", metadata={"page": 0})]
+    monkeypatch.setattr(config, "CONTEXTO_MAX_TOKENS", 3000)
+    assert reduzir_contexto(docs, VAGA) is docs
+
+    # Orçamento desligado também devolve o currículo inteiro
+    monkeypatch.setattr(config, "CONTEXTO_MAX_TOKENS", 0)
+    docs = _curriculo_longo()
+    assert reduzir_contexto(docs, VAGA) is docs
+
+
+def test_contexto_reduzido_respeita_o_orcamento(monkeypatch):
+    docs = _curriculo_longo()
+    orcamento = 400
+    monkeypatch.setattr(config, "CONTEXTO_MAX_TOKENS", orcamento)
+    assert estimar_tokens(docs[0].page_content) > orcamento
+
+    reduzido = reduzir_contexto(docs, VAGA)
+    assert sum(estimar_tokens(d.page_content) for d in reduzido) <= orcamento
+
+    texto = "\n".join(d.page_content for d in reduzido)
+    # Cabeçalho, contato e ao menos um trecho de cada seção ficam; a experiência relevante vem antes da irrelevante
+    assert texto.startswith("Fulano de Tal")
+    assert "fulano@exemplo.com" in texto
+    assert "Universidade Federal" in texto
+    assert texto.count("Desenvolvedor Python na Empresa") > texto.count("Garçom no Restaurante")
+    assert all(d.metadata["source"] == "cv.pdf" and "secao" in d.metadata for d in reduzido)
+
+
+def test_reducao_e_deterministica(monkeypatch):
+    monkeypatch.setattr(config, "CONTEXTO_MAX_TOKENS", 400)
+    primeira = [d.page_content for d in reduzir_contexto(_curriculo_longo(), VAGA)]
+    monkeypatch.setattr(contexto, "_EMBEDDINGS", None)
+    assert [d.page_content for d in reduzir_contexto(_curriculo_longo(), VAGA)] == primeira
+
+
+def test_trechos_obrigatorios_tambem_respeitam_o_orcamento(monkeypatch):
+    from services.observabilidade import CONTEXTO_OBRIGATORIO_CORTADO
+
+    linhas = ["Fulano de Tal", "Desenvolvedor Python", "", "EXPERIÊNCIA", "APIs REST com Django"]
+    linhas += ["", "CONTATO"] + [f"Perfil {indice}: https://exemplo.com/fulano/{indice}" for indice in range(40)]
+    docs = [Document(page_content="\n".join(linhas), metadata={"page": 0})]
+    orcamento = 120
+    monkeypatch.setattr(config, "CONTEXTO_MAX_TOKENS", orcamento)
+    cortes = CONTEXTO_OBRIGATORIO_CORTADO._value.get()
+
+    reduzido = reduzir_contexto(docs, VAGA)
+
+    assert sum(estimar_tokens(d.page_content) for d in reduzido) <= orcamento
+    texto = "\n".join(d.page_content for d in reduzido)
+    assert texto.startswith("Fulano de Tal")
+    assert "Perfil 0:" in texto and "Perfil 39:" not in texto
+    # O corte acontece no fim de uma linha
+    assert set(texto.splitlines()) <= set(linhas)
+    assert CONTEXTO_OBRIGATORIO_CORTADO._value.get() == cortes + 1
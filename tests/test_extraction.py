@@ -0,0 +1,36 @@
+import multiprocessing
+
+import pytest
+
+from services import config, extraction
+
+
+def _pool_no_processo_filho(fila) -> None:
+    config.EXTRACAO_PROCESSOS = 2
+    extraction._pool = "pool"
+    fila.put(extraction.pool_extracao())
+
+
+@pytest.fixture
+def pool_falso(monkeypatch):
+    monkeypatch.setattr(config, "EXTRACAO_PROCESSOS", 2)
+    monkeypatch.setattr(extraction, "_pool", "pool")
+    monkeypatch.setattr(extraction, "_extracao_em_serie", False)
+
+
+def test_processos_auxiliares_extraem_em_serie(pool_falso):
+    assert extraction.pool_extracao() == "pool"
+    extraction.extrair_em_serie()
+    assert extraction.pool_extracao() is None
+
+
+def test_processo_filho_do_servidor_usa_o_pool():
+    # Como os workers do uvicorn com --reload/--workers: filhos por spawn, sem o marcador de série
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_pool_no_processo_filho, args=(fila,))
+    processo.start()
+    try:
+        assert fila.get(timeout=60) == "pool"
+    finally:
+        processo.join(timeout=10)
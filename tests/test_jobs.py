@@ -0,0 +1,167 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from services import config, jobs
+from services.cache import ResultadoCache
+from services.jobs import CONCLUIDO, FilaMemoria, FilaSqlite
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def fila(request, tmp_path):
+    if request.param == "memoria":
+        return FilaMemoria(ttl_segundos=60)
+    return FilaSqlite(str(tmp_path / "jobs.sqlite3"), ttl_segundos=60, timeout_processamento=60)
+
+
+def test_chave_de_idempotencia_vale_por_cliente(fila):
+    primeiro = fila.enfileirar(b"%PDF-a", "vaga", "chave", cliente="cliente-a", hash_pedido="h1")
+    repetido = fila.enfileirar(b"%PDF-a", "vaga", "chave", cliente="cliente-a", hash_pedido="h1")
+    outro_cliente = fila.enfileirar(b"%PDF-b", "vaga", "chave", cliente="cliente-b", hash_pedido="h2")
+
+    assert repetido.id == primeiro.id
+    assert outro_cliente.id != primeiro.id
+    assert outro_cliente.hash_pedido == "h2"
+
+
+def test_chave_repetida_devolve_o_hash_do_pedido_original(fila):
+    primeiro = fila.enfileirar(b"%PDF-a", "vaga", "chave", cliente="cliente-a", hash_pedido="h1")
+    repetido = fila.enfileirar(b"%PDF-outro", "vaga", "chave", cliente="cliente-a", hash_pedido="h2")
+
+    assert repetido.id == primeiro.id
+    assert repetido.hash_pedido == "h1"
+
+
+def test_migra_banco_com_chave_de_idempotencia_global(tmp_path):
+    caminho = str(tmp_path / "antigo.sqlite3")
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, criado_em REAL NOT NULL,"
+            " atualizado_em REAL NOT NULL, description TEXT NOT NULL, conteudo BLOB,"
+            " chave_idempotencia TEXT UNIQUE, texto_ia TEXT, pdf BLOB, nome_arquivo TEXT,"
+            " cache_hit INTEGER NOT NULL DEFAULT 0, erro_status INTEGER, erro TEXT)"
+        )
+        conexao.execute(
+            "INSERT INTO jobs (id, status, criado_em, atualizado_em, description, chave_idempotencia)"
+            " VALUES ('antigo', 'concluido', 1, 1, 'vaga', 'chave')"
+        )
+
+    fila = FilaSqlite(caminho, ttl_segundos=60, timeout_processamento=60)
+    novo = fila.enfileirar(b"%PDF-a", "vaga", "chave", cliente="cliente-a", hash_pedido="h1")
+
+    assert novo.id != "antigo"
+    assert fila.obter("antigo").cliente == "-"
+
+
+def test_rota_recusa_chave_reutilizada_com_outro_pedido(cliente, pdf_curriculo):
+    def enviar(description):
+        return cliente.post(
+            "/cvv/jobs",
+            files={"pdf_file": ("cv.pdf", pdf_curriculo, "application/pdf")},
+            data={"description": description},
+            headers={"Idempotency-Key": "pedido-1"},
+        )
+
+    primeiro = enviar("Vaga Python")
+    assert primeiro.status_code == 202
+    assert enviar("Vaga Python").json()["id"] == primeiro.json()["id"]
+
+    outro = enviar("Vaga Java")
+    assert outro.status_code == 422
+    assert outro.json()["detail"] == "A chave de idempotência já foi usada com outro pedido"
+
+
+def _concluir(fila, conteudo=b"%PDF-a"):
+    job = fila.enfileirar(conteudo, "vaga")
+    reservado = fila.reservar()
+    assert reservado.id == job.id and reservado.conteudo == conteudo
+    fila.concluir(job.id, ResultadoCache(texto_ia="NOME: Fulano", pdf=b"%PDF-resultado", nome_arquivo="cv.pdf"), False)
+    return job.id
+
+
+def test_obter_nunca_devolve_o_upload(fila):
+    job_id = _concluir(fila)
+    pendente = fila.enfileirar(b"%PDF-b", "vaga")
+    assert fila.obter(pendente.id).conteudo is None
+    assert fila.obter(pendente.id, True).conteudo is None
+
+    assert fila.obter(job_id).resultado is None
+    assert fila.obter(job_id, True).resultado.pdf == b"%PDF-resultado"
+
+
+def test_memoria_limita_resultados_guardados():
+    fila = FilaMemoria(ttl_segundos=60, max_resultados=2)
+    primeiro, segundo, terceiro = (_concluir(fila) for _ in range(3))
+
+    assert fila.obter(primeiro) is None
+    assert fila.obter(segundo, True).status == CONCLUIDO
+    assert fila.obter(terceiro, True).status == CONCLUIDO
+
+
+def test_aguardar_job_le_o_resultado_uma_vez(monkeypatch, tmp_path):
+    class FilaContada(FilaSqlite):
+        leituras = []
+
+        def obter(self, job_id, com_resultado=False):
+            self.leituras.append(com_resultado)
+            if len(self.leituras) == 3:
+                self.concluir(job_id, ResultadoCache(texto_ia="", pdf=b"%PDF-r", nome_arquivo="cv.pdf"), False)
+            return super().obter(job_id, com_resultado)
+
+    fila = FilaContada(str(tmp_path / "jobs.sqlite3"), ttl_segundos=60, timeout_processamento=60)
+    monkeypatch.setattr(jobs, "_fila", fila)
+    monkeypatch.setattr(config, "JOBS_INTERVALO_POLL", 0.001)
+    job = fila.enfileirar(b"%PDF-a", "vaga")
+    fila.reservar()
+
+    concluido = asyncio.run(jobs.aguardar_job(job.id, timeout=5))
+
+    assert concluido.resultado.pdf == b"%PDF-r"
+    assert fila.leituras == [False, False, False, True]
+
+
+def test_workers_voltam_depois_de_reiniciar_o_lifespan(pdf_curriculo):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    for _ in range(2):
+        with TestClient(app) as cliente:
+            resposta = cliente.post(
+                "/cvv/create-cvv",
+                files={"pdf_file": ("cv.pdf", pdf_curriculo, "application/pdf")},
+                data={"description": "Vaga Python", "formato": "json"},
+            )
+            assert resposta.status_code == 200
+
+
+def test_worker_da_fila_compartilhada_para_quando_outro_processo_cancela(monkeypatch, tmp_path):
+    from services.jobs import CANCELADO
+
+    fila = FilaSqlite(str(tmp_path / "jobs.sqlite3"), ttl_segundos=60, timeout_processamento=60)
+    monkeypatch.setattr(config, "JOBS_INTERVALO_POLL", 0.01)
+    cancelado, concluido = fila.enfileirar(b"%PDF-a", "vaga"), fila.enfileirar(b"%PDF-b", "vaga")
+    interrompidos = []
+
+    async def processar(conteudo, description, template, formato):
+        if conteudo == b"%PDF-b":
+            return ResultadoCache(texto_ia="", pdf=b"%PDF-r", nome_arquivo="cv.pdf"), False
+        # O DELETE chega por outro processo: só a linha da tabela muda
+        fila.cancelar(cancelado.id)
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            interrompidos.append(conteudo)
+            raise
+
+    async def cenario():
+        for _ in range(2):
+            await asyncio.wait_for(jobs._executar_job(fila, processar, fila.reservar()), timeout=5)
+
+    asyncio.run(cenario())
+
+    assert interrompidos == [b"%PDF-a"]
+    assert fila.obter(cancelado.id).status == CANCELADO
+    assert fila.obter(concluido.id).status == CONCLUIDO
+    assert not jobs._cancelados
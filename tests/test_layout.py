@@ -0,0 +1,37 @@
+import fitz
+import pytest
+
+from services import layout
+from services.render import criar_pdf_estilizado_cv
+from services.templates import TEMPLATES
+
+CURRICULO = {
+    "NOME": "Fulano de Tal • Ünïcode ✓",
+    "CARGO": "Desenvolvedor Python",
+    "CONTATO": ["Telefone: 11 99999-0000", "Email: fulano@example.com"],
+    "RESUMO": "Desenvolvedor Python com experiência em Django e AWS — integrações, APIs e observabilidade.",
+    "EXPERIENCIA": [
+        {"titulo": "Desenvolvedor Backend | Empresa X | 2020-2024", "detalhes": ["Otimizei APIs REST em 40%", "Ação → resultado"]},
+    ],
+    "FORMACAO": ["Ciência da Computação | Universidade Z | 2015-2019"],
+    "COMPETENCIAS": ["Linguagens: Python, SQL", "Nuvem: AWS, Docker"],
+    "METADADOS": {"TITULO": "Desenvolvedor Python", "AUTOR": "Fulano de Tal", "PALAVRAS_CHAVE": "Python, Django"},
+}
+
+
+def _paginas(pdf: bytes):
+    with fitz.open(stream=pdf, filetype="pdf") as documento:
+        return [(pagina.get_text(), pagina.get_pixmap(dpi=72).samples) for pagina in documento]
+
+
+@pytest.mark.skipif(not layout.GLIFOS_COMPARTILHADOS, reason="versão do PyMuPDF sem a troca das tabelas de glifos")
+@pytest.mark.parametrize("template", list(TEMPLATES))
+def test_tabelas_de_glifos_compartilhadas_nao_mudam_o_pdf(monkeypatch, template):
+    layout._LarguraGlifosCache._tabelas.clear()
+    # Duas vezes: a segunda usa as tabelas calculadas pelo primeiro documento
+    criar_pdf_estilizado_cv(CURRICULO, "", template)
+    com_cache = criar_pdf_estilizado_cv(CURRICULO, "", template).getvalue()
+    monkeypatch.setattr(layout, "GLIFOS_COMPARTILHADOS", False)
+    sem_cache = criar_pdf_estilizado_cv(CURRICULO, "", template).getvalue()
+
+    assert _paginas(com_cache) == _paginas(sem_cache)
@@ -0,0 +1,133 @@
+import io
+import json
+import zipfile
+
+
+def _relatorio(resposta):
+    pacote = zipfile.ZipFile(io.BytesIO(resposta.content))
+    return pacote, json.loads(pacote.read("relatorio.json"))
+
+
+def test_lote_com_pdf_invalido_gera_item_com_erro(cliente, pdf_curriculo):
+    resposta = cliente.post(
+        "/cvv/create-cvv/lote",
+        files=[
+            ("pdf_files", ("valido.pdf", pdf_curriculo, "application/pdf")),
+            ("pdf_files", ("invalido.pdf", b"notpdf", "application/pdf")),
+        ],
+        data={"description": "Vaga Python"},
+    )
+
+    assert resposta.status_code == 200
+    pacote, relatorio = _relatorio(resposta)
+    assert (relatorio["total"], relatorio["sucesso"], relatorio["erros"]) == (2, 1, 1)
+    ok, erro = relatorio["itens"]
+    assert (ok["arquivo"], ok["status"]) == ("valido.pdf", "ok")
+    assert ok["pdf"] in pacote.namelist()
+    assert (erro["arquivo"], erro["status"]) == ("invalido.pdf", "erro")
+    assert erro["erro"] == {"status": 400, "detail": "O arquivo enviado não é um PDF válido"}
+
+
+def test_lote_com_extensao_errada_gera_item_com_erro(cliente, pdf_curriculo):
+    resposta = cliente.post(
+        "/cvv/create-cvv/lote",
+        files=[
+            ("pdf_files", ("b.txt", b"texto qualquer", "text/plain")),
+            ("pdf_files", ("valido.pdf", pdf_curriculo, "application/pdf")),
+        ],
+        data={"description": "Vaga Python"},
+    )
+
+    assert resposta.status_code == 200
+    _, relatorio = _relatorio(resposta)
+    assert [(item["arquivo"], item["status"]) for item in relatorio["itens"]] == [
+        ("b.txt", "erro"),
+        ("valido.pdf", "ok"),
+    ]
+    assert relatorio["itens"][0]["erro"]["detail"] == "O arquivo deve ser um PDF"
+
+
+def test_upload_unico_continua_recusando_pdf_invalido(cliente):
+    resposta = cliente.post(
+        "/cvv/create-cvv",
+        files={"pdf_file": ("invalido.pdf", b"notpdf", "application/pdf")},
+        data={"description": "Vaga Python"},
+    )
+
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "O arquivo enviado não é um PDF válido"
+
+
+def _zip(entradas, compressao=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compressao) as pacote:
+        for nome, conteudo in entradas:
+            pacote.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+
+def _enviar_zip(cliente, conteudo):
+    return cliente.post(
+        "/cvv/create-cvv/lote",
+        files={"arquivo_zip": ("lote.zip", conteudo, "application/zip")},
+        data={"description": "Vaga Python"},
+    )
+
+
+def test_zip_com_taxa_de_compressao_suspeita_gera_item_com_erro(cliente, pdf_curriculo):
+    bomba = b"%PDF-" + b"\0" * (5 * 1024 * 1024)
+    resposta = _enviar_zip(cliente, _zip([("valido.pdf", pdf_curriculo), ("bomba.pdf", bomba)]))
+
+    assert resposta.status_code == 200
+    _, relatorio = _relatorio(resposta)
+    assert [(item["arquivo"], item["status"]) for item in relatorio["itens"]] == [
+        ("valido.pdf", "ok"),
+        ("bomba.pdf", "erro"),
+    ]
+    assert relatorio["itens"][1]["erro"]["detail"] == "Taxa de compressão suspeita no arquivo"
+
+
+def test_zip_acima_do_total_descompactado_do_lote_e_recusado(monkeypatch, cliente, pdf_curriculo):
+    from services import config
+
+    # Com a taxa liberada, só o total descompactado do lote barra o pedido; o ZIP enviado é pequeno
+    monkeypatch.setattr(config, "LOTE_MAX_TAXA_COMPRESSAO", 1_000_000)
+    monkeypatch.setattr(config, "LOTE_MAX_BYTES", 2 * 1024 * 1024)
+    entradas = [(f"cv{indice}.pdf", pdf_curriculo + b"\0" * 1024 * 1024) for indice in range(4)]
+    conteudo = _zip(entradas)
+    assert len(conteudo) < 64 * 1024
+
+    resposta = _enviar_zip(cliente, conteudo)
+    assert resposta.status_code == 413
+
+
+def test_desconexao_no_meio_do_lote_aguarda_o_cancelamento_dos_itens(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from routes import lote_route
+    from services.upload import ItemLote
+
+    canceladas = []
+
+    async def gerar_curriculo(conteudo, description, semaforo, template):
+        if conteudo == b"rapido":
+            return SimpleNamespace(nome_arquivo="rapido.pdf", pdf=b"%PDF-rapido"), False
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0)
+            canceladas.append(conteudo)
+            raise
+
+    monkeypatch.setattr(lote_route, "gerar_curriculo", gerar_curriculo)
+
+    async def cenario():
+        itens = [ItemLote("a.pdf", b"rapido"), ItemLote("b.pdf", b"lento"), ItemLote("c.pdf", b"lento")]
+        fluxo = lote_route._transmitir_lote(itens, "Vaga Python", "classico")
+        await fluxo.__anext__()
+        await fluxo.aclose()
+        # O aclose só volta depois que os itens pendentes observaram o cancelamento
+        assert canceladas == [b"lento", b"lento"]
+
+    asyncio.run(cenario())
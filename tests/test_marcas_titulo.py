@@ -0,0 +1,47 @@
+import fitz
+
+from routes.cvv_route import MENSAGEM_USUARIO, _nome_arquivo
+from services.estruturado import CurriculoIA
+from services.parser import parse_resposta_ia
+
+
+def _pdf_com_titulos() -> bytes:
+    documento = fitz.open()
+    pagina = documento.new_page()
+    pagina.insert_text((50, 72), "Fulano de Tal", fontsize=20)
+    pagina.insert_text((50, 110), "Desenvolvedor Python | Empresa X | 2020-2024", fontname="hebo")
+    pagina.insert_text((50, 130), "Trabalhei com APIs em FastAPI e Django, com testes e integração contínua")
+    conteudo = documento.tobytes()
+    documento.close()
+    return conteudo
+
+
+def test_prompt_explica_as_marcas_de_titulo():
+    assert '"##" são títulos de seção' in MENSAGEM_USUARIO
+    assert '"###" são subtítulos' in MENSAGEM_USUARIO
+
+
+def test_nome_e_cargo_perdem_marcas_copiadas():
+    dados = parse_resposta_ia("NOME: ## Fulano de Tal\n\nCARGO: ### Desenvolvedor Python\n\nRESUMO: Resumo")
+    assert (dados["NOME"], dados["CARGO"]) == ("Fulano de Tal", "Desenvolvedor Python")
+
+    curriculo = CurriculoIA(NOME="## Fulano de Tal", CARGO="### Desenvolvedor", RESUMO="Resumo")
+    assert (curriculo.NOME, curriculo.CARGO) == ("Fulano de Tal", "Desenvolvedor")
+
+
+def test_nome_do_arquivo_ignora_marcas():
+    assert _nome_arquivo({"NOME": "## Fulano de Tal"}) == "Fulano_de_Tal-Curriculo.pdf"
+
+
+def test_provedor_local_nao_copia_marcas(cliente):
+    resposta = cliente.post(
+        "/cvv/create-cvv",
+        files={"pdf_file": ("cv.pdf", _pdf_com_titulos(), "application/pdf")},
+        data={"description": "Vaga Python Django", "formato": "json"},
+    )
+
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo["nome_arquivo"] == "Fulano_de_Tal-Curriculo.pdf"
+    assert corpo["curriculo"]["NOME"] == "Fulano de Tal"
+    assert corpo["curriculo"]["EXPERIENCIA"][0]["titulo"] == "Desenvolvedor Python | Empresa X | 2020-2024"
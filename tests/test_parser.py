@@ -0,0 +1,102 @@
+import random
+
+import pytest
+from parser_original import parse_resposta_ia as parse_original
+
+from services.parser import ParserIncremental, parse_resposta_ia
+
+_CABECALHOS = [
+    "EXPERIENCIA:", "Experiência:", "EXPERIÊNCIAS :", "FORMAÇÃO:", "formacao:", "FORMAÇÕES:",
+    "COMPETENCIAS:", "Competências:", "HABILIDADES:", "CONTATO:", "Contatos:", "PROJETOS:", "IDIOMAS:",
+]
+_PALAVRAS = ["Python", "Django", "AWS", "Docker", "SQL", "React", "Kubernetes", "liderança", "API", "ETL"]
+
+
+def _linha_aleatoria(rng: random.Random) -> str:
+    # Corpo do currículo: as variações de METADADOS e as marcas "#" ficam nos casos explícitos abaixo
+    escolha = rng.random()
+    palavras = " ".join(rng.choice(_PALAVRAS) for _ in range(rng.randint(1, 5)))
+    if escolha < 0.08:
+        return rng.choice(_CABECALHOS)
+    if escolha < 0.18:
+        chave = rng.choice(["NOME", "Cargo", "RESUMO", "TITULO", "AUTOR", "OUTRO"])
+        return f"{chave}:{rng.choice(['', ' ', '  '])}{palavras if rng.random() < 0.8 else ''}"
+    if escolha < 0.35:
+        return f"{rng.choice(['-', '  -', '•', '*', ''])} {palavras} | Empresa {rng.randint(1, 3)} | 20{rng.randint(10, 24)}"
+    if escolha < 0.42:
+        return rng.choice(["", "   ", "-", "- ", "•", "* ", "\t", "\r", "```"])
+    return f"{rng.choice(['-', '  -', '•', '* ', ''])} {palavras}{rng.choice(['', ':', '.', ' '])}"
+
+
+def _texto_aleatorio(rng: random.Random) -> str:
+    linhas = [_linha_aleatoria(rng) for _ in range(rng.randint(1, 80))]
+    if rng.random() < 0.3:
+        # Bloco de metadados bem formado, igual nos dois parsers
+        linhas = ["```METADADOS", f"TITULO: {rng.choice(_PALAVRAS)}", "AUTOR: Fulano", "```"] + linhas
+    return "\n".join(linhas)
+
+
+@pytest.mark.parametrize("semente", range(20))
+def test_paridade_com_o_parser_original(semente):
+    rng = random.Random(semente)
+    for _ in range(50):
+        texto = _texto_aleatorio(rng)
+        if not texto.strip():
+            continue
+        esperado = parse_original(texto)
+        assert parse_resposta_ia(texto) == esperado, texto
+
+
+def test_paridade_em_trechos():
+    rng = random.Random(99)
+    for _ in range(200):
+        texto = _texto_aleatorio(rng)
+        parser = ParserIncremental()
+        posicao = 0
+        while posicao < len(texto):
+            tamanho = rng.randint(1, 40)
+            parser.alimentar(texto[posicao:posicao + tamanho])
+            posicao += tamanho
+        parser.finalizar()
+        assert parser.resultado() == parse_resposta_ia(texto), texto
+
+
+# Mudanças deliberadas em relação ao parser original
+
+def test_metadados_fora_da_cerca():
+    # O prompt pede "```" numa linha e "METADADOS:" na seguinte; o original só reconhecia "```METADADOS"
+    texto = "```\nMETADADOS:\nTITULO: Desenvolvedor Python\nAUTOR: Fulano\n```\n\nNOME: Fulano\nCARGO: Dev"
+
+    assert parse_original(texto)["METADADOS"]["TITULO"] == ""
+    dados = parse_resposta_ia(texto)
+    assert dados["METADADOS"]["TITULO"] == "Desenvolvedor Python"
+    assert dados["METADADOS"]["AUTOR"] == "Fulano"
+    assert (dados["NOME"], dados["CARGO"]) == ("Fulano", "Dev")
+
+
+def test_metadados_sem_cerca_de_fechamento():
+    # O original engolia o resto da resposta; agora os metadados terminam na primeira seção
+    texto = "```METADADOS\nTITULO: Dev\nNOME: Fulano\nCOMPETENCIAS:\n- Python"
+
+    assert parse_original(texto)["NOME"] == ""
+    dados = parse_resposta_ia(texto)
+    assert dados["METADADOS"]["TITULO"] == "Dev"
+    assert dados["NOME"] == "Fulano"
+    assert dados["COMPETENCIAS"] == ["Python"]
+
+
+def test_itens_vazios_sem_filtro_final():
+    # O original filtrava itens vazios no fim; o incremental nunca os guarda, então o resultado é o mesmo
+    texto = "COMPETENCIAS:\n-\n- \n•\n- Python\n- Python\nEXPERIENCIA:\n- sem título\n- Dev | Empresa | 2020\n  -\n  - Entreguei"
+
+    dados = parse_resposta_ia(texto)
+    assert dados == parse_original(texto)
+    assert dados["COMPETENCIAS"] == ["Python"]
+    assert dados["EXPERIENCIA"] == [{"titulo": "Dev | Empresa | 2020", "detalhes": ["Entreguei"]}]
+
+
+def test_marcas_de_titulo_copiadas():
+    texto = "NOME: ## Fulano de Tal\nCARGO: ### Dev"
+
+    assert parse_original(texto)["NOME"] == "## Fulano de Tal"
+    assert (parse_resposta_ia(texto)["NOME"], parse_resposta_ia(texto)["CARGO"]) == ("Fulano de Tal", "Dev")
@@ -0,0 +1,12 @@
+import pytest
+
+from services.provedores_llm import LLMLocal, LLMSimulado
+
+
+def test_provedor_simulado_sem_responder_falha_ao_instanciar():
+    class Incompleto(LLMSimulado):
+        pass
+
+    with pytest.raises(TypeError):
+        Incompleto()
+    assert isinstance(LLMLocal(), LLMSimulado)
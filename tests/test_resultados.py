@@ -0,0 +1,43 @@
+def _gerar(cliente, pdf, description, **dados):
+    return cliente.post(
+        "/cvv/create-cvv",
+        files={"pdf_file": ("cv.pdf", pdf, "application/pdf")},
+        data={"description": description, **dados},
+    )
+
+
+def test_download_por_get_aceita_etag_e_faixa(cliente, pdf_curriculo):
+    gerado = _gerar(cliente, pdf_curriculo, "Vaga Python para o download por GET")
+    assert gerado.status_code == 200
+    endereco = gerado.headers["Content-Location"]
+    assert endereco.startswith("/cvv/resultados/")
+
+    resposta = cliente.get(endereco)
+    assert resposta.status_code == 200
+    assert resposta.content == gerado.content
+    etag = resposta.headers["ETag"]
+    assert etag == gerado.headers["ETag"]
+
+    assert cliente.get(endereco, headers={"If-None-Match": etag}).status_code == 304
+    assert cliente.head(endereco).status_code == 200
+
+    parcial = cliente.get(endereco, headers={"Range": "bytes=0-99"})
+    assert parcial.status_code == 206
+    assert parcial.content == gerado.content[:100]
+    assert parcial.headers["Content-Range"] == f"bytes 0-99/{len(gerado.content)}"
+
+
+def test_download_do_resultado_json_renderiza_o_pdf(cliente, pdf_curriculo):
+    gerado = _gerar(cliente, pdf_curriculo, "Vaga Python para o download do JSON", formato="json")
+    resultado_id = gerado.json()["id"]
+
+    resposta = cliente.get(f"/cvv/resultados/{resultado_id}", params={"template": "moderno"})
+    assert resposta.status_code == 200
+    assert resposta.content.startswith(b"%PDF")
+    assert resposta.headers["X-Cache"] == "HIT"
+
+
+def test_download_de_resultado_desconhecido(cliente):
+    resposta = cliente.get("/cvv/resultados/nao-existe")
+    assert resposta.status_code == 404
+    assert cliente.get("/cvv/resultados/nao-existe", params={"template": "inexistente"}).status_code == 404
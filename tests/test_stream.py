@@ -0,0 +1,33 @@
+from routes.cvv_route import CACHE_RESULTADOS, MODO_STREAM, _chave_resultado
+from services import config
+
+
+def _stream(cliente, pdf, description):
+    with cliente.stream(
+        "POST", "/cvv/create-cvv/stream",
+        files={"pdf_file": ("cv.pdf", pdf, "application/pdf")},
+        data={"description": description},
+    ) as resposta:
+        assert resposta.status_code == 200
+        return [linha.split(":", 1)[1].strip() for linha in resposta.iter_lines() if linha.startswith("event:")]
+
+
+def test_stream_guarda_o_resultado_sob_a_chave_do_modo_texto(monkeypatch, cliente, pdf_curriculo):
+    monkeypatch.setattr(config, "LLM_MODO", "estruturado")
+    description = "Vaga Python para o teste de stream"
+
+    eventos = _stream(cliente, pdf_curriculo, description)
+    assert eventos[0] == "inicio" and eventos[-1] == "fim"
+
+    chave_texto = _chave_resultado(pdf_curriculo, description, MODO_STREAM, 0)
+    assert CACHE_RESULTADOS.obter(chave_texto).chave == chave_texto
+    assert CACHE_RESULTADOS.obter(_chave_resultado(pdf_curriculo, description)) is None
+
+    # O modo estruturado não recebe a resposta em texto do stream
+    resposta = cliente.post(
+        "/cvv/create-cvv",
+        files={"pdf_file": ("cv.pdf", pdf_curriculo, "application/pdf")},
+        data={"description": description, "formato": "json"},
+    )
+    assert resposta.headers["X-Cache"] == "MISS"
+    assert CACHE_RESULTADOS.obter(_chave_resultado(pdf_curriculo, description)).texto_ia.startswith("{")